@@ -0,0 +1,214 @@
+"""End-to-end pipeline benchmark against local fixtures.
+
+Starts benchmarks/fixture_server.py, writes a topics.yaml whose sources
+point at it, and runs `pipeline/run.py --force` in a scratch directory
+with the summarizer, TTS and weather endpoints redirected to the stubs.
+The run's `outbox/spans.jsonl` is reduced to wall time per stage and
+throughput (articles/sec, segments/sec) and compared with a stored
+baseline; a metric that regresses by more than the threshold fails the
+benchmark with exit status 1.
+
+Usage:
+    python benchmarks/e2e.py                            # compare with baseline
+    python benchmarks/e2e.py --update-baseline          # record a new baseline
+    python benchmarks/e2e.py --latency "hf=0.2,tts=0.05" --error-rate "hf=0.05"
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Allow `python benchmarks/e2e.py` to import sibling modules
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.fixture_server import FixtureServer, parse_route_values
+
+DEFAULT_BASELINE = ROOT / 'benchmarks' / 'baselines' / 'e2e.json'
+
+# Differences below these floors are noise, whatever the relative change
+MIN_DELTA_S = 0.25
+MIN_DELTA_RATE = 0.5
+
+
+def write_topics(path, base_url, topics, feeds_per_topic, segments):
+    """Write a topics.yaml whose sources are fixture feeds."""
+    lines = []
+    for t in range(topics):
+        lines.append(f'- name: "Bench Topic {t + 1}"')
+        lines.append('  sources:')
+        for f in range(feeds_per_topic):
+            lines.append(f'    - "{base_url}/feeds/t{t}-f{f}.xml"')
+        lines.append('  lookback_hours: 48')
+        lines.append(f'  segments: {segments}')
+        lines.append('')
+    Path(path).write_text('\n'.join(lines), encoding='utf-8')
+
+
+def bench_env(base_url, workdir):
+    """Environment for the pipeline run: stubbed providers, no uploads."""
+    env = dict(os.environ)
+    env.update({
+        'HUGGINGFACE_API_KEY': 'bench',
+        'HUGGINGFACE_API_URL': f'{base_url}/hf/models',
+        'OPENAI_API_KEY': '',
+        'OPENAI_BASE_URL': f'{base_url}/openai/v1',
+        'TTS_HTTP_URL': f'{base_url}/tts',
+        'OPEN_METEO_URL': f'{base_url}/weather',
+        'INTERNET_ARCHIVE_ACCESS_KEY': '',
+        'INTERNET_ARCHIVE_SECRET': '',
+        'ARTICLE_STORE': str(Path(workdir) / 'outbox' / 'state' / 'articles.sqlite3'),
+        'PYTHONPATH': str(ROOT),
+    })
+    return env
+
+
+def summarize_spans(spans_file, wall_s):
+    """Reduce a span file to benchmark metrics.
+
+    Returns:
+        Dict of metric -> value; '*_s' metrics are seconds (lower is better),
+        '*_per_s' metrics are throughput (higher is better)
+    """
+    totals = {}
+    articles = segments = errors = 0
+    for line in Path(spans_file).read_text(encoding='utf-8').splitlines():
+        rec = json.loads(line)
+        name, ok = rec['span'], rec['status'] == 'ok'
+        if not ok:
+            errors += 1
+        if name == 'extract' and ok:
+            articles += 1
+        elif name == 'tts' and ok:
+            segments += 1
+        if name.startswith('stage.') or name in ('concat', 'fetch', 'wait.audio', 'wait.uploads'):
+            totals[name] = totals.get(name, 0.0) + rec['duration_ms'] / 1000
+    metrics = {'wall_s': round(wall_s, 3)}
+    metrics.update({f'{name}_s': round(total, 3) for name, total in sorted(totals.items())})
+    metrics['articles'] = articles
+    metrics['segments'] = segments
+    metrics['span_errors'] = errors
+    metrics['articles_per_s'] = round(articles / wall_s, 3) if wall_s else 0.0
+    metrics['segments_per_s'] = round(segments / wall_s, 3) if wall_s else 0.0
+    return metrics
+
+
+def compare(metrics, baseline, threshold):
+    """List metrics that regressed by more than `threshold` (a fraction).
+
+    Any failed span beyond the baseline's, or fewer articles or segments
+    than the baseline, is a regression regardless of timing.
+    """
+    regressions = []
+    if metrics.get('span_errors', 0) > baseline.get('span_errors', 0):
+        regressions.append(f"span_errors: {baseline.get('span_errors', 0)} -> {metrics['span_errors']}")
+    for name, base in baseline.items():
+        value = metrics.get(name)
+        if value is None:
+            continue
+        if name in ('articles', 'segments'):
+            worse = value < base
+        elif name.endswith('_per_s'):
+            worse = value < base * (1 - threshold) and base - value >= MIN_DELTA_RATE
+        elif name.endswith('_s'):
+            worse = value > base * (1 + threshold) and value - base >= MIN_DELTA_S
+        else:
+            continue
+        if worse:
+            change = f" ({(value - base) / base:+.0%})" if base else ''
+            regressions.append(f"{name}: {base} -> {value}{change}")
+    return regressions
+
+
+def run_benchmark(topics=2, feeds_per_topic=3, items=10, segments=4, latency=None, error_rate=None,
+                  keep=False):
+    """Run the pipeline once against the fixture server.
+
+    Returns:
+        Dict with 'metrics', 'requests' and 'errors' (per fixture route)
+    """
+    server = FixtureServer(items_per_feed=items, latency=latency, error_rate=error_rate).start()
+    workdir = Path(tempfile.mkdtemp(prefix='newsgen-bench-'))
+    try:
+        write_topics(workdir / 'topics.yaml', server.base_url, topics, feeds_per_topic, segments)
+        logging.info(f"Running pipeline in {workdir} against {server.base_url}")
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, str(ROOT / 'pipeline' / 'run.py'), '--force'],
+                              cwd=workdir, env=bench_env(server.base_url, workdir),
+                              capture_output=True, text=True)
+        wall_s = time.perf_counter() - t0
+        (workdir / 'pipeline.log').write_text(proc.stdout + proc.stderr, encoding='utf-8')
+        spans_file = workdir / 'outbox' / 'spans.jsonl'
+        if proc.returncode != 0 or not spans_file.exists():
+            raise RuntimeError(f"Pipeline run failed (exit {proc.returncode}); "
+                               f"last output:\n{(proc.stdout + proc.stderr)[-2000:]}")
+        return {
+            'metrics': summarize_spans(spans_file, wall_s),
+            'requests': dict(server.requests),
+            'errors': dict(server.errors),
+        }
+    finally:
+        server.stop()
+        if keep:
+            logging.info(f"Kept benchmark directory {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end pipeline benchmark against local fixtures')
+    parser.add_argument('--topics', type=int, default=2)
+    parser.add_argument('--feeds-per-topic', type=int, default=3)
+    parser.add_argument('--items', type=int, default=10, help='Items per fixture feed')
+    parser.add_argument('--segments', type=int, default=4, help='TTS segments per topic')
+    parser.add_argument('--latency', type=parse_route_values, default={},
+                        help='Per-route stub latency in seconds, e.g. "hf=0.05,tts=0.02"')
+    parser.add_argument('--error-rate', type=parse_route_values, default={},
+                        help='Per-route failure probability, e.g. "hf=0.05"')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed regression as a fraction of the baseline (default 0.25)')
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch directory')
+    args = parser.parse_args()
+
+    result = run_benchmark(args.topics, args.feeds_per_topic, args.items, args.segments,
+                           args.latency, args.error_rate, keep=args.keep)
+    metrics = result['metrics']
+    width = max(len(k) for k in metrics)
+    print('\n'.join(f"{name:<{width}}  {value}" for name, value in metrics.items()))
+    print(f"fixture requests: {result['requests']}")
+    print(f"injected errors:  {result['errors']}")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline or not baseline_path.exists():
+        if metrics['span_errors']:
+            # A baseline with failed spans would let broken runs pass (e.g. a concat that errors out fast)
+            print(f"Not writing a baseline: {metrics['span_errors']} span(s) failed "
+                  f"(see the pipeline log with --keep)")
+            return 1
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(metrics, indent=2) + '\n', encoding='utf-8')
+        print(f"Baseline written to {baseline_path}")
+        return 0
+
+    regressions = compare(metrics, json.loads(baseline_path.read_text(encoding='utf-8')), args.threshold)
+    if regressions:
+        print(f"REGRESSIONS (threshold {args.threshold:.0%}):")
+        print('\n'.join(f"  {r}" for r in regressions))
+        return 1
+    print(f"No regressions against {baseline_path} (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""Local HTTP fixture server for offline pipeline benchmarks.
+
+Serves recorded RSS feeds and article pages from `benchmarks/fixtures/`
+and stands in for the external services the pipeline calls:
+
+    GET  /feeds/<feed>.xml                 RSS feed (items link to /articles/...)
+    GET  /articles/<feed>/<item>.html      article page
+    POST /hf/models/<model>                Hugging Face Inference API
+    POST /openai/v1/chat/completions       OpenAI chat completions
+    POST /tts                              HTTP TTS backend (returns MP3 bytes)
+    GET  /weather                          Open-Meteo forecast
+    PUT  /upload/<identifier>/<file>       Internet Archive S3-like upload
+
+Each route has a configurable latency (seconds) and error rate (0-1);
+failed requests answer 503. Point the pipeline at it with
+HUGGINGFACE_API_URL, OPENAI_BASE_URL, TTS_HTTP_URL, OPEN_METEO_URL and
+INTERNET_ARCHIVE_S3_ENDPOINT (`<base_url>/upload`). Accepted uploads are
+kept in `FixtureServer.uploads`.
+
+Run standalone with `python benchmarks/fixture_server.py --port 8765`.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+ROUTES = ('feed', 'article', 'hf', 'openai', 'tts', 'weather', 'upload')
+
+# One silent MPEG-1 Layer III frame: 128 kbps, 44.1 kHz, mono, 417 bytes
+_MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0xC4]) + bytes(413)
+SILENT_MP3 = _MP3_FRAME * 38  # ~1 second
+
+
+def parse_route_values(spec):
+    """Parse "hf=0.2,tts=0.05" into {'hf': 0.2, 'tts': 0.05}."""
+    values = {}
+    for part in filter(None, (spec or '').split(',')):
+        route, _, value = part.partition('=')
+        route = route.strip()
+        if route not in ROUTES:
+            raise ValueError(f"Unknown route '{route}' (expected one of {', '.join(ROUTES)})")
+        values[route] = float(value)
+    return values
+
+
+class FixtureServer:
+    """Threaded fixture server running in the background.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        items_per_feed: Items in every feed
+        latency: Dict of route -> seconds added to each response
+        error_rate: Dict of route -> probability of answering 503
+        seed: Seed for the error-rate random generator
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, items_per_feed=10, latency=None, error_rate=None, seed=0):
+        self.items_per_feed = items_per_feed
+        self.latency = latency or {}
+        self.error_rate = error_rate or {}
+        self.requests = {route: 0 for route in ROUTES}
+        self.errors = {route: 0 for route in ROUTES}
+        self.uploads = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._templates = {name: (FIXTURES / f'{name}.xml' if name != 'article' else FIXTURES / 'article.html')
+                           .read_text(encoding='utf-8') for name in ('feed', 'item', 'article')}
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fixture-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _should_fail(self, route):
+        """Count the request, apply latency, and decide whether it fails."""
+        with self._lock:
+            self.requests[route] += 1
+            fail = self._random.random() < self.error_rate.get(route, 0.0)
+            if fail:
+                self.errors[route] += 1
+        if self.latency.get(route):
+            time.sleep(self.latency[route])
+        return fail
+
+    def render_feed(self, feed):
+        now = datetime.now(timezone.utc)
+        items = ''.join(self._templates['item'].format(
+            base=self.base_url, feed=feed, item=i,
+            published=format_datetime(now - timedelta(minutes=5 * i))
+        ) for i in range(self.items_per_feed))
+        return self._templates['feed'].format(base=self.base_url, feed=feed, items=items)
+
+    def render_article(self, feed, item):
+        return self._templates['article'].format(feed=feed, item=item)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type):
+                data = body if isinstance(body, bytes) else body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _fail(self):
+                self._send(503, '{"error": "injected failure"}', 'application/json')
+
+            def _read_json(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    return json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    return {}
+
+            def do_GET(self):
+                m_feed = re.fullmatch(r'/feeds/([\w-]+)\.xml', self.path)
+                m_article = re.fullmatch(r'/articles/([\w-]+)/(\d+)\.html', self.path)
+                if m_feed:
+                    if server._should_fail('feed'):
+                        return self._fail()
+                    return self._send(200, server.render_feed(m_feed.group(1)), 'application/rss+xml')
+                if m_article:
+                    if server._should_fail('article'):
+                        return self._fail()
+                    return self._send(200, server.render_article(*m_article.groups()), 'text/html; charset=utf-8')
+                if self.path.startswith('/weather'):
+                    if server._should_fail('weather'):
+                        return self._fail()
+                    return self._send(200, json.dumps(_weather()), 'application/json')
+                self._send(404, 'not found', 'text/plain')
+
+            def do_POST(self):
+                payload = self._read_json()
+                if self.path.startswith('/hf/models/'):
+                    if server._should_fail('hf'):
+                        return self._fail()
+                    return self._send(200, json.dumps([{'generated_text': _summary(payload.get('inputs', ''))}]),
+                                      'application/json')
+                if self.path.startswith('/openai/v1/chat/completions'):
+                    if server._should_fail('openai'):
+                        return self._fail()
+                    text = (payload.get('messages') or [{}])[-1].get('content', '')
+                    return self._send(200, json.dumps(_chat_completion(_summary(text))), 'application/json')
+                if self.path.startswith('/tts'):
+                    if server._should_fail('tts'):
+                        return self._fail()
+                    return self._send(200, SILENT_MP3, 'audio/mpeg')
+                self._send(404, 'not found', 'text/plain')
+
+            def do_PUT(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if not self.path.startswith('/upload/'):
+                    return self._send(404, 'not found', 'text/plain')
+                if server._should_fail('upload'):
+                    return self._fail()
+                meta = {k.lower(): v for k, v in self.headers.items() if k.lower().startswith('x-archive-meta')}
+                with server._lock:
+                    server.uploads.append({'path': self.path[len('/upload'):], 'size': len(body), 'meta': meta})
+                self._send(200, '', 'text/plain')
+
+        return Handler
+
+
+def _summary(text):
+    # Deterministic "summary": the first ~60 words of the prompt's article text
+    words = text.split(':', 1)[-1].split()
+    return ' '.join(words[:60])
+
+
+def _chat_completion(content):
+    return {
+        'id': 'chatcmpl-fixture',
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': 'gpt-3.5-turbo',
+        'choices': [{'index': 0, 'finish_reason': 'stop',
+                     'message': {'role': 'assistant', 'content': content}}],
+        'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+    }
+
+
+def _weather():
+    today = datetime.now(timezone.utc).date()
+    days = [(today + timedelta(days=i)).isoformat() for i in range(3)]
+    return {
+        'current': {'temperature_2m': 61.0, 'relative_humidity_2m': 55, 'apparent_temperature': 60.0,
+                    'precipitation': 0.0, 'weather_code': 2, 'wind_speed_10m': 7.5},
+        'daily': {'time': days, 'temperature_2m_max': [66.0, 68.0, 64.0],
+                  'temperature_2m_min': [50.0, 52.0, 49.0], 'precipitation_sum': [0.0, 0.1, 0.3],
+                  'weather_code': [2, 3, 61]},
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve benchmark fixtures and stub providers')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--items', type=int, default=10, help='Items per feed')
+    parser.add_argument('--latency', type=parse_route_values, default={},
+                        help='Per-route latency in seconds, e.g. "hf=0.2,tts=0.05"')
+    parser.add_argument('--error-rate', type=parse_route_values, default={},
+                        help='Per-route failure probability, e.g. "hf=0.05"')
+    args = parser.parse_args()
+    srv = FixtureServer(args.host, args.port, args.items, args.latency, args.error_rate).start()
+    print(f'Fixture server listening on {srv.base_url}')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.stop()
@@ -0,0 +1,235 @@
+"""Micro-benchmarks for the pipeline's pure-Python hot paths at scale.
+
+Times each function on synthetic input of every requested size and
+measures CPU time, wall time and peak traced memory:
+
+    feedparser.parse          parsing a synthetic RSS file (reference for fetch_feed)
+    fetch_feed                rss_ingestor.fetch_feed (parse + entry loop + cutoff)
+    dedupe_articles           link dedupe and newest-first sort from pipeline/run.py
+    format_topic              blog_formatter.format_topic (Jekyll)
+    format_topic_all          blog_formatter.format_topic_all (every format)
+    estimate_tokens           TokenUsageTracker.estimate_tokens over every summary
+
+Timings are the best of --repeat runs; peak memory comes from one extra
+run under tracemalloc (tracing slows code down, so it is not timed).
+Each invocation appends one JSON line to benchmarks/results/micro.jsonl
+and prints the change against the previous matching result, so growth
+per entry shows up before 10x more sources are onboarded.
+
+Usage:
+    python benchmarks/micro.py                          # sizes 10000,100000
+    python benchmarks/micro.py --sizes 1000,10000 --only dedupe_articles,format_topic
+    python benchmarks/micro.py --no-save
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from html import escape
+from pathlib import Path
+
+# Allow `python benchmarks/micro.py` to import sibling packages
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import feedparser
+
+from formatter import blog_formatter
+from ingestors import rss_ingestor
+from pipeline.run import dedupe_articles
+from researcher.token_tracker import TokenUsageTracker
+
+DEFAULT_HISTORY = ROOT / 'benchmarks' / 'results' / 'micro.jsonl'
+WORDS = ('council transit plan budget vote market shares energy climate storm election court ruling '
+         'health study school team season launch report policy trade talks city rail bike lane').split()
+
+
+def synthetic_entries(n, seed=0, duplicate_rate=0.1):
+    """Synthetic feed entries, newest first, with some repeated links."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    entries = []
+    for i in range(n):
+        link_id = rng.randrange(i) if i and rng.random() < duplicate_rate else i
+        entries.append({
+            'title': ' '.join(rng.choices(WORDS, k=8)).capitalize(),
+            'link': f'https://example.com/news/{link_id}',
+            # Spread over 72 hours so the 48-hour cutoff drops about a third
+            'published': now - timedelta(seconds=rng.randrange(72 * 3600)),
+            'description': ' '.join(rng.choices(WORDS, k=40)),
+        })
+    return entries
+
+
+def synthetic_summaries(n, seed=0):
+    """Synthetic summary dicts shaped like the summarize stage's output."""
+    rng = random.Random(seed)
+    return [{
+        'title': ' '.join(rng.choices(WORDS, k=8)).capitalize() + (' [live] *update*' if i % 7 == 0 else ''),
+        'summary': ' '.join(rng.choices(WORDS, k=140)),
+        'link': f'https://example.com/news/{i}?ref=feed&id=({i})',
+    } for i in range(n)]
+
+
+def write_rss(path, entries):
+    """Write entries as an RSS 2.0 file."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>'
+                '<title>Synthetic</title><link>https://example.com/</link><description>bench</description>\n')
+        for e in entries:
+            f.write(f"<item><title>{escape(e['title'])}</title><link>{escape(e['link'])}</link>"
+                    f"<guid>{escape(e['link'])}</guid><pubDate>{format_datetime(e['published'])}</pubDate>"
+                    f"<description>{escape(e['description'])}</description></item>\n")
+        f.write('</channel></rss>\n')
+
+
+def build_cases(size, workdir):
+    """Benchmark cases for one input size: name -> zero-argument callable."""
+    entries = synthetic_entries(size)
+    feed_path = Path(workdir) / f'feed-{size}.xml'
+    write_rss(feed_path, entries)
+    articles = [dict(e, published=e['published'].isoformat()) for e in entries]
+    summaries = synthetic_summaries(size)
+    texts = [s['summary'] for s in summaries]
+    tracker = TokenUsageTracker()
+    return {
+        'feedparser.parse': lambda: feedparser.parse(str(feed_path)),
+        'fetch_feed': lambda: rss_ingestor.fetch_feed(str(feed_path), since_hours=48),
+        'dedupe_articles': lambda: dedupe_articles(articles, 50),
+        'format_topic': lambda: blog_formatter.format_topic('Benchmark Topic', summaries, 'jekyll'),
+        'format_topic_all': lambda: blog_formatter.format_topic_all('Benchmark Topic', summaries),
+        'estimate_tokens': lambda: sum(tracker.estimate_tokens(t) for t in texts),
+    }
+
+
+def measure(func, repeat=3):
+    """Best CPU and wall time over `repeat` calls, then peak memory of one traced call."""
+    cpu_times, wall_times = [], []
+    for _ in range(repeat):
+        gc.collect()
+        c0, w0 = time.process_time(), time.perf_counter()
+        func()
+        cpu_times.append(time.process_time() - c0)
+        wall_times.append(time.perf_counter() - w0)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'cpu_s': round(min(cpu_times), 4), 'wall_s': round(min(wall_times), 4),
+            'peak_mb': round(peak / 2 ** 20, 2)}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    path = Path(path)
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines() if line.strip()]
+
+
+def previous_result(history, case, size):
+    """Most recent earlier result for the same case and size, or None."""
+    for run in reversed(history):
+        for res in run.get('results', []):
+            if res['case'] == case and res['size'] == size:
+                return res
+    return None
+
+
+def run_suite(sizes, only=None, repeat=3):
+    """Run every case at every size.
+
+    Returns:
+        List of result dicts (case, size, cpu_s, wall_s, peak_mb, us_per_item)
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix='newsgen-micro-') as workdir:
+        for size in sizes:
+            for case, func in build_cases(size, workdir).items():
+                if only and case not in only:
+                    continue
+                res = {'case': case, 'size': size}
+                res.update(measure(func, repeat))
+                res['us_per_item'] = round(res['cpu_s'] / size * 1e6, 3)
+                results.append(res)
+                print(f"{case:<18} {size:>8} {res['cpu_s']:>9.4f}s cpu {res['wall_s']:>9.4f}s wall "
+                      f"{res['peak_mb']:>9.2f} MB {res['us_per_item']:>9.3f} us/item", flush=True)
+    return results
+
+
+def report(results, history):
+    """Print scaling between sizes and the change against the previous run."""
+    lines = []
+    by_case = {}
+    for res in results:
+        by_case.setdefault(res['case'], []).append(res)
+    for case, rows in by_case.items():
+        rows.sort(key=lambda r: r['size'])
+        for small, big in zip(rows, rows[1:]):
+            # Sub-50ms timings are too noisy to judge scaling
+            if small['cpu_s'] > 0 and big['cpu_s'] >= 0.05:
+                ratio = (big['cpu_s'] / small['cpu_s']) / (big['size'] / small['size'])
+                note = '  <-- superlinear' if ratio > 1.5 else ''
+                lines.append(f"{case}: {small['size']} -> {big['size']} scales at {ratio:.2f}x linear{note}")
+        for res in rows:
+            prev = previous_result(history, case, res['size'])
+            if prev and prev['cpu_s'] > 0:
+                lines.append(f"{case} @ {res['size']}: cpu {(res['cpu_s'] - prev['cpu_s']) / prev['cpu_s']:+.0%}, "
+                             f"peak {res['peak_mb'] - prev['peak_mb']:+.2f} MB vs previous run")
+    if lines:
+        print('\n'.join(lines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmarks for feed parsing, dedupe and formatting')
+    parser.add_argument('--sizes', default='10000,100000', help='Comma-separated input sizes')
+    parser.add_argument('--only', default='', help='Comma-separated case names to run')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--history', default=str(DEFAULT_HISTORY))
+    parser.add_argument('--no-save', action='store_true', help='Do not append to the history file')
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    only = {c.strip() for c in args.only.split(',') if c.strip()}
+    history = load_history(args.history)
+    results = run_suite(sizes, only, args.repeat)
+    report(results, history)
+
+    if not args.no_save:
+        path = Path(args.history)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        run = {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_revision(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'repeat': args.repeat,
+            'results': results,
+        }
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(run) + '\n')
+        print(f"Results appended to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+"""Check the digest's email delivery against a local SMTP stand-in.
+
+Starts a small SMTP server on a free local port and a fake `sendmail` on
+PATH, then delivers a digest with `simple_aggregator.deliver` to five
+recipients:
+
+    ok1@, ok2@       accepted at once
+    temp@            refused with 451 once, accepted on retry
+    drop@            the connection is dropped once, accepted after reconnecting
+    bad@             refused with 550 (permanent)
+
+It checks that the healthy recipients share one SMTP session, that temp@
+is retried within that session and drop@ after one reconnect, and that
+only bad@ falls through: first to a single sendmail invocation, then (with
+sendmail failing) to an .eml file. Exits with status 1 on any mismatch.
+
+Usage:
+    python benchmarks/smtp_check.py
+"""
+
+import logging
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Allow `python benchmarks/smtp_check.py` to import sibling modules
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from pipeline import simple_aggregator
+
+RECIPIENTS = ['ok1@example.com', 'temp@example.com', 'drop@example.com', 'bad@example.com', 'ok2@example.com']
+
+# Fake sendmail: records its arguments, exits with $FAKE_SENDMAIL_STATUS
+FAKE_SENDMAIL = '''#!/bin/sh
+echo "$@" >> "$FAKE_SENDMAIL_LOG"
+cat > /dev/null
+exit "${FAKE_SENDMAIL_STATUS:-0}"
+'''
+
+
+class SMTPStandIn:
+    """Minimal threaded SMTP server that scripts per-recipient answers.
+
+    Args:
+        script: Dict of recipient -> list of answers for its first RCPT
+            commands ('451', '550' or 'drop'); later RCPTs are accepted
+    """
+
+    def __init__(self, script=None):
+        self.script = {addr: list(answers) for addr, answers in (script or {}).items()}
+        self.sessions = 0
+        self.rcpt_attempts = {}
+        self.delivered = []
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _answer(self, addr):
+        with self._lock:
+            self.rcpt_attempts[addr] = self.rcpt_attempts.get(addr, 0) + 1
+            answers = self.script.get(addr)
+            return answers.pop(0) if answers else '250'
+
+    def _handler_class(self):
+        standin = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def _reply(self, line):
+                self.wfile.write(line.encode('ascii') + b'\r\n')
+
+            def handle(self):
+                with standin._lock:
+                    standin.sessions += 1
+                self._reply('220 localhost stand-in')
+                recipients = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    verb, _, arg = line.decode('ascii', 'replace').strip().partition(' ')
+                    verb = verb.upper()
+                    if verb in ('EHLO', 'HELO'):
+                        self._reply('250 localhost')
+                    elif verb == 'MAIL':
+                        recipients = []
+                        self._reply('250 OK')
+                    elif verb == 'RCPT':
+                        addr = arg.split(':', 1)[-1].strip().strip('<>')
+                        answer = standin._answer(addr)
+                        if answer == 'drop':
+                            return
+                        if answer == '250':
+                            recipients.append(addr)
+                            self._reply('250 OK')
+                        elif answer.startswith('4'):
+                            self._reply(f'{answer} try again later')
+                        else:
+                            self._reply(f'{answer} no such user')
+                    elif verb == 'DATA':
+                        self._reply('354 end with .')
+                        while self.rfile.readline() not in (b'.\r\n', b'.\n', b''):
+                            pass
+                        with standin._lock:
+                            standin.delivered.extend(recipients)
+                        self._reply('250 queued')
+                    elif verb in ('RSET', 'NOOP'):
+                        recipients = []
+                        self._reply('250 OK')
+                    elif verb == 'QUIT':
+                        self._reply('221 bye')
+                        return
+                    else:
+                        self._reply('502 not implemented')
+
+        return Handler
+
+
+def run_check(workdir, sendmail_status):
+    """Deliver to RECIPIENTS once; returns (stand-in, deliver result, sendmail invocations)."""
+    log_path = workdir / f'sendmail-{sendmail_status}.log'
+    os.environ['FAKE_SENDMAIL_LOG'] = str(log_path)
+    os.environ['FAKE_SENDMAIL_STATUS'] = str(sendmail_status)
+    standin = SMTPStandIn({'temp@example.com': ['451'], 'drop@example.com': ['drop'],
+                           'bad@example.com': ['550']}).start()
+    try:
+        result = simple_aggregator.deliver(
+            RECIPIENTS, 'news@example.com', 'Digest', 'Hello\n', outbox=workdir / f'outbox-{sendmail_status}',
+            smtp_host='127.0.0.1', smtp_port=standin.port, backoff=0.01, timeout=5)
+    finally:
+        standin.stop()
+    calls = log_path.read_text(encoding='utf-8').splitlines() if log_path.exists() else []
+    return standin, result, calls
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    problems = []
+
+    def expect(label, actual, expected):
+        if actual != expected:
+            problems.append(f'{label}: expected {expected!r}, got {actual!r}')
+
+    with tempfile.TemporaryDirectory(prefix='smtp-check-') as tmp:
+        workdir = Path(tmp)
+        bindir = workdir / 'bin'
+        bindir.mkdir()
+        sendmail = bindir / 'sendmail'
+        sendmail.write_text(FAKE_SENDMAIL, encoding='utf-8')
+        sendmail.chmod(0o755)
+        os.environ['PATH'] = f"{bindir}{os.pathsep}{os.environ.get('PATH', '')}"
+
+        for status in (0, 1):
+            standin, result, calls = run_check(workdir, status)
+            label = f'sendmail exit {status}'
+            # one session for everyone, plus one reconnect after drop@'s dropped connection
+            expect(f'{label}: SMTP sessions', standin.sessions, 2)
+            expect(f'{label}: RCPT attempts', standin.rcpt_attempts,
+                   {'ok1@example.com': 1, 'temp@example.com': 2, 'drop@example.com': 2,
+                    'bad@example.com': 1, 'ok2@example.com': 1})
+            expect(f'{label}: delivered over SMTP', sorted(standin.delivered), sorted(set(RECIPIENTS) - {'bad@example.com'}))
+            expect(f'{label}: reported sent', sorted(result['smtp']), sorted(standin.delivered))
+            expect(f'{label}: sendmail invocations', calls, ['-oi -f news@example.com -- bad@example.com'])
+            if status == 0:
+                expect(f'{label}: sent via sendmail', result['sendmail'], ['bad@example.com'])
+                expect(f'{label}: .eml files', result['eml'], [])
+            else:
+                expect(f'{label}: sent via sendmail', result['sendmail'], [])
+                expect(f'{label}: .eml files', [p.name.rsplit('_', 1)[-1] for p in result['eml']],
+                       ['bad@example.com.eml'])
+                expect(f'{label}: files in outbox', len(list(Path(workdir / 'outbox-1').iterdir())), 1)
+
+    if problems:
+        for problem in problems:
+            logging.error(problem)
+        sys.exit(1)
+    logging.info('SMTP delivery check passed')
+
+
+if __name__ == '__main__':
+    main()
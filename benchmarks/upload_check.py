@@ -0,0 +1,106 @@
+"""Check the upload queue against the fixture server's upload stand-in.
+
+Uploads go through `podcast_publisher.upload_to_internet_archive` with
+its endpoint pointed at benchmarks/fixture_server.py (PUT /upload/...),
+in two runs sharing one state file:
+
+    1. Every upload fails. Episode A is submitted twice for the same topic,
+       episode B once; both must end up failed and persisted to the state
+       file as two items, with A's duplicate folded into one.
+    2. A new queue on the same state file, with half of the uploads
+       failing. It must resume both items, fold a third submission of A
+       into the resumed one, retry until both succeed, and leave the state
+       file empty.
+
+Each episode must be accepted by the server exactly once. Exits with
+status 1 on any mismatch.
+
+Usage:
+    python benchmarks/upload_check.py
+"""
+
+import functools
+import json
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+# Allow `python benchmarks/upload_check.py` to import sibling modules
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from benchmarks.fixture_server import SILENT_MP3, FixtureServer
+from publisher import podcast_publisher, upload_queue
+
+
+def make_queue(server, state_file, max_attempts):
+    uploader = functools.partial(podcast_publisher.upload_to_internet_archive, access_key='check',
+                                 secret='check', endpoint=f'{server.base_url}/upload')
+    return upload_queue.UploadQueue(uploader, state_file=state_file, workers=2,
+                                    max_attempts=max_attempts, backoff_base=0.01)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+    problems = []
+
+    def expect(label, actual, expected):
+        if actual != expected:
+            problems.append(f'{label}: expected {expected!r}, got {actual!r}')
+
+    server = FixtureServer(error_rate={'upload': 1.0}, seed=1).start()
+    try:
+        with tempfile.TemporaryDirectory(prefix='upload-check-') as tmp:
+            workdir = Path(tmp)
+            state_file = workdir / 'state' / 'upload_queue.json'
+            episodes = {}
+            for topic in ('Topic A', 'Topic B'):
+                path = workdir / f"{topic.replace(' ', '_')}_20260101.mp3"
+                path.write_bytes(SILENT_MP3)
+                episodes[topic] = (path, podcast_publisher.generate_ia_metadata(topic))
+
+            # Run 1: every upload fails, items are persisted for the next run
+            queue = make_queue(server, state_file, max_attempts=2)
+            for topic in ('Topic A', 'Topic A', 'Topic B'):
+                path, metadata = episodes[topic]
+                queue.submit(path, metadata, extra={'topic_name': topic})
+            report = queue.flush()
+            expect('run 1 failed uploads', len(report['failed']), 2)
+            expect('run 1 upload requests', server.requests['upload'], 4)
+            persisted = json.loads(state_file.read_text(encoding='utf-8'))
+            expect('run 1 persisted items', sorted(item['extra']['topic_name'] for item in persisted),
+                   ['Topic A', 'Topic B'])
+
+            # Run 2: resumed from the state file, half of the attempts fail
+            server.error_rate['upload'] = 0.5
+            queue = make_queue(server, state_file, max_attempts=20)
+            path, metadata = episodes['Topic A']
+            queue.submit(path, metadata, extra={'topic_name': 'Topic A'})
+            report = queue.flush()
+            expect('run 2 completed uploads', len(report['completed']), 2)
+            expect('run 2 failed or pending uploads', report['failed'] + report['pending'], [])
+            expect('run 2 resumed items', sorted(item['resumed'] for item in report['completed']), [False, True])
+            if server.errors['upload'] <= 4:
+                problems.append('run 2 saw no injected upload failures, so retries were not exercised')
+            expect('state file after run 2', json.loads(state_file.read_text(encoding='utf-8')), [])
+
+            expect('accepted uploads', sorted(u['path'] for u in server.uploads),
+                   sorted(f"/{metadata['identifier']}/{path.name}" for path, metadata in episodes.values()))
+            expect('uploaded sizes', {u['size'] for u in server.uploads}, {len(SILENT_MP3)})
+            expect('uploaded titles', sorted(u['meta'].get('x-archive-meta-title') for u in server.uploads),
+                   sorted(metadata['title'] for _, metadata in episodes.values()))
+    finally:
+        server.stop()
+
+    logging.info(f"Upload requests: {server.requests['upload']} ({server.errors['upload']} injected failures)")
+    if problems:
+        for problem in problems:
+            logging.error(problem)
+        sys.exit(1)
+    logging.info('Upload queue check passed')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,71 @@
+import html
+import json
+import re
 from datetime import datetime, timezone
+from string import Template
+
+FORMATS = ('markdown', 'jekyll', 'hugo', 'html', 'json')
+
+# File extension of each output format
+EXTENSIONS = {
+    'markdown': '.md',
+    'jekyll': '.md',
+    'hugo': '.md',
+    'html': '.html',
+    'json': '.json',
+}
+
+GENERATOR_URL = 'https://github.com/vishc0/NewsGenerator'
+
+# Templates are compiled once at import; values are escaped before substitution
+_HEADERS = {
+    'markdown': Template("# $title ($date)\n\n"),
+    'jekyll': Template("""---
+layout: post
+title: $yaml_title
+date: $datetime
+categories: news $slug
+tags: automated curated
+---
+
+"""),
+    'hugo': Template("""---
+title: $yaml_title
+date: $datetime
+draft: false
+categories: ["news", $yaml_topic]
+tags: ["automated", "curated"]
+---
+
+"""),
+    'html': Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>$html_title</title>
+</head>
+<body>
+<article>
+<h1>$html_title</h1>
+<p><time datetime="$datetime">$date</time></p>
+"""),
+}
+
+_MD_ITEM = Template("## $index. $md_title\n\n")
+_MD_SUMMARY = Template("$md_summary\n\n")
+_MD_LINK = Template("[Read original article →]($md_link)\n\n")
+_MD_EMPTY = "*No articles available for this topic at this time.*\n\n"
+_MD_FOOTER = Template("\n*Generated by [NewsGenerator]($generator) on $date*\n")
+
+_HTML_ITEM = Template("<section>\n<h2>$index. $html_title</h2>\n")
+_HTML_SUMMARY = Template("<p>$html_summary</p>\n")
+_HTML_LINK = Template('<p><a href="$html_link">Read original article →</a></p>\n')
+_HTML_EMPTY = "<p><em>No articles available for this topic at this time.</em></p>\n"
+_HTML_FOOTER = Template('</article>\n<footer><p>Generated by <a href="$generator">NewsGenerator</a> '
+                        'on $date</p></footer>\n</body>\n</html>\n')
+
+_MD_TITLE_ESCAPES = str.maketrans({c: '\\' + c for c in '\\`*_[]'} | {'<': '&lt;'})
+_MD_URL_ESCAPES = str.maketrans({' ': '%20', '(': '%28', ')': '%29', '<': '%3C', '>': '%3E'})
 
 
 def utc_now():
@@ -6,66 +73,133 @@ def utc_now():
     return datetime.now(timezone.utc)
 
 
+def build_document(topic_name, summaries, now=None):
+    """Build the format-independent document model of a topic post.
+
+    Args:
+        topic_name: Name of the topic
+        summaries: List of summary dicts with 'title', 'summary', 'link'
+        now: Publish time (default: now)
+
+    Returns:
+        Dict with the post metadata and an 'items' list
+    """
+    now = now or utc_now()
+    return {
+        'topic': topic_name,
+        'title': f"{topic_name} — Automated Curation",
+        'slug': re.sub(r'[^\w]+', '-', topic_name.lower()).strip('-'),
+        'date': now.strftime('%Y-%m-%d'),
+        'datetime': now.isoformat(),
+        'items': [{
+            'index': idx,
+            'title': s.get('title') or 'Untitled',
+            'summary': s.get('summary') or '',
+            'link': s.get('link') or '',
+        } for idx, s in enumerate(summaries or [], start=1)],
+    }
+
+
+def _json_feed(doc):
+    items = [{
+        'id': item['link'] or f"{doc['slug']}-{doc['date']}-{item['index']}",
+        'url': item['link'] or None,
+        'title': item['title'],
+        'content_text': item['summary'],
+        'date_published': doc['datetime'],
+    } for item in doc['items']]
+    feed = {
+        'version': 'https://jsonfeed.org/version/1.1',
+        'title': doc['title'],
+        'home_page_url': GENERATOR_URL,
+        'items': [{k: v for k, v in item.items() if v is not None} for item in items],
+    }
+    return json.dumps(feed, ensure_ascii=False, indent=2) + '\n'
+
+
+def render(doc, formats=('markdown',)):
+    """Render a document to several formats in one pass over its items.
+
+    Args:
+        doc: Document from build_document
+        formats: Output formats (see FORMATS)
+
+    Returns:
+        Dict mapping each format to the rendered text
+    """
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown blog format(s): {', '.join(sorted(unknown))}")
+    md_formats = [f for f in formats if f in ('markdown', 'jekyll', 'hugo')]
+    want_html = 'html' in formats
+
+    meta = {
+        'title': doc['title'],
+        'date': doc['date'],
+        'datetime': doc['datetime'],
+        'slug': doc['slug'],
+        'yaml_title': json.dumps(doc['title'], ensure_ascii=False),
+        'yaml_topic': json.dumps(doc['topic'], ensure_ascii=False),
+        'html_title': html.escape(doc['title']),
+        'generator': GENERATOR_URL,
+    }
+    headers = {fmt: _HEADERS[fmt].substitute(meta) for fmt in formats if fmt in _HEADERS}
+
+    # Markdown flavours share one body; each item is escaped once per syntax
+    md_body, html_body = [], []
+    for item in doc['items']:
+        if md_formats:
+            md_body.append(_MD_ITEM.substitute(index=item['index'],
+                                               md_title=item['title'].translate(_MD_TITLE_ESCAPES)))
+            if item['summary']:
+                md_body.append(_MD_SUMMARY.substitute(md_summary=item['summary'].replace('<', '&lt;')))
+            if item['link']:
+                md_body.append(_MD_LINK.substitute(md_link=item['link'].translate(_MD_URL_ESCAPES)))
+            md_body.append("---\n\n")
+        if want_html:
+            html_body.append(_HTML_ITEM.substitute(index=item['index'], html_title=html.escape(item['title'])))
+            if item['summary']:
+                html_body.append(_HTML_SUMMARY.substitute(html_summary=html.escape(item['summary'])))
+            if item['link']:
+                html_body.append(_HTML_LINK.substitute(html_link=html.escape(item['link'])))
+            html_body.append("</section>\n")
+    if not doc['items']:
+        md_body.append(_MD_EMPTY)
+        html_body.append(_HTML_EMPTY)
+
+    md_text = ''.join(md_body) + _MD_FOOTER.substitute(meta)
+    html_text = ''.join(html_body) + _HTML_FOOTER.substitute(meta)
+    out = {}
+    for fmt in formats:
+        if fmt == 'json':
+            out[fmt] = _json_feed(doc)
+        elif fmt == 'html':
+            out[fmt] = headers[fmt] + html_text
+        else:
+            out[fmt] = headers[fmt] + md_text
+    return out
+
+
+def format_topic_all(topic_name, summaries, formats=FORMATS):
+    """Format topic summaries as blog posts in several formats at once.
+
+    Returns:
+        Dict mapping each format to the formatted post
+    """
+    return render(build_document(topic_name, summaries), formats)
+
+
 def format_topic(topic_name, summaries, format_type='markdown'):
     """Format topic summaries as blog post.
-    
+
     Args:
         topic_name: Name of the topic
         summaries: List of summary dicts with 'title', 'summary', 'link'
-        format_type: 'markdown' (default), 'jekyll', or 'hugo'
-    
+        format_type: 'markdown' (default), 'jekyll', 'hugo', 'html' or 'json'
+
     Returns:
         Formatted blog post as string
     """
-    now = utc_now()
-    date_str = now.strftime('%Y-%m-%d')
-    datetime_str = now.isoformat()
-    
-    # Generate front matter for static site generators
-    if format_type == 'jekyll':
-        header = f"""---
-layout: post
-title: "{topic_name} — Automated Curation"
-date: {datetime_str}
-categories: news {topic_name.lower().replace(' ', '-')}
-tags: automated curated
----
-
-"""
-    elif format_type == 'hugo':
-        header = f"""---
-title: "{topic_name} — Automated Curation"
-date: {datetime_str}
-draft: false
-categories: ["news", "{topic_name}"]
-tags: ["automated", "curated"]
----
-
-"""
-    else:
-        # Plain markdown
-        header = f"# {topic_name} — Automated Curation ({date_str})\n\n"
-    
-    # Build body
-    body = []
-    if summaries:
-        for idx, s in enumerate(summaries, start=1):
-            title = s.get('title', 'Untitled')
-            summary = s.get('summary', '')
-            link = s.get('link', '')
-            
-            body.append(f"## {idx}. {title}\n\n")
-            
-            if summary:
-                body.append(f"{summary}\n\n")
-            
-            if link:
-                body.append(f"[Read original article →]({link})\n\n")
-            
-            body.append("---\n\n")
-    else:
-        body.append("*No articles available for this topic at this time.*\n\n")
-    
-    footer = f"\n*Generated by [NewsGenerator](https://github.com/vishc0/NewsGenerator) on {date_str}*\n"
-    
-    return header + ''.join(body) + footer
+    if format_type not in FORMATS:
+        format_type = 'markdown'
+    return render(build_document(topic_name, summaries), [format_type])[format_type]
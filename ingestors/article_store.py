@@ -0,0 +1,185 @@
+"""Local SQLite store of ingested feed entries.
+
+Feed entries are written here by every ingestion path (pipeline/run.py
+and pipeline/simple_aggregator.py) and read back with indexed range
+queries on topic and published time, so a consumer can build its output
+from data another run already fetched. One row is kept per topic and
+canonical link; a re-fetched entry updates its row instead of adding a
+duplicate. Only the standard library is used.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DEFAULT_PATH = Path('outbox') / 'state' / 'articles.sqlite3'
+
+# Query parameters that only track the click and never change the article
+TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ocid', 'cmpid', 'smid'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    topic TEXT NOT NULL,
+    source TEXT NOT NULL,
+    canonical_link TEXT NOT NULL,
+    link TEXT NOT NULL,
+    title TEXT,
+    description TEXT,
+    published TEXT NOT NULL,
+    fetched TEXT NOT NULL,
+    UNIQUE (topic, canonical_link)
+);
+CREATE INDEX IF NOT EXISTS idx_articles_topic_published ON articles (topic, published);
+CREATE INDEX IF NOT EXISTS idx_articles_source_published ON articles (source, published);
+CREATE INDEX IF NOT EXISTS idx_articles_canonical_link ON articles (canonical_link);
+CREATE INDEX IF NOT EXISTS idx_articles_published ON articles (published);
+CREATE TABLE IF NOT EXISTS fetches (
+    topic TEXT NOT NULL,
+    source TEXT NOT NULL,
+    fetched TEXT NOT NULL,
+    PRIMARY KEY (topic, source)
+);
+"""
+
+
+def canonical_link(url):
+    """Normalize a URL for deduplication.
+
+    Lowercases scheme and host, drops the fragment, `utm_*` and other
+    tracking parameters, and a trailing slash.
+    """
+    parts = urlsplit((url or '').strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith('utm_') and k.lower() not in TRACKING_PARAMS]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ''))
+
+
+def _to_iso(value, default):
+    """Normalize an ISO 8601 or RFC 2822 date (naive = UTC) to an ISO UTC string."""
+    dt = None
+    if isinstance(value, datetime):
+        dt = value
+    elif value:
+        text = str(value).strip()
+        try:
+            dt = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        except ValueError:
+            try:
+                dt = parsedate_to_datetime(text)
+            except (TypeError, ValueError):
+                dt = None
+    if dt is None:
+        dt = default
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat(timespec='seconds')
+
+
+class ArticleStore:
+    """SQLite-backed article store, safe to share between threads.
+
+    Args:
+        path: Database file (default ARTICLE_STORE or outbox/state/articles.sqlite3)
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or os.getenv('ARTICLE_STORE') or DEFAULT_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+
+    def add_entries(self, topic, source, entries, fetched=None):
+        """Upsert feed entries for a topic and record the fetch time of `source`.
+
+        Args:
+            topic: Topic name
+            source: Feed URL the entries came from
+            entries: Dicts with 'title', 'link', 'published', 'description'
+            fetched: Fetch time (default: now); also used for undated entries
+
+        Returns:
+            Number of entries written
+        """
+        fetched = fetched or datetime.now(timezone.utc)
+        fetched_iso = _to_iso(fetched, fetched)
+        rows = []
+        for e in entries:
+            link = e.get('link')
+            if not link:
+                continue
+            rows.append((topic, source, canonical_link(link), link, e.get('title'),
+                         e.get('description'), _to_iso(e.get('published'), fetched), fetched_iso))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """INSERT INTO articles (topic, source, canonical_link, link, title, description,
+                                         published, fetched)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (topic, canonical_link) DO UPDATE SET
+                       title = excluded.title,
+                       description = excluded.description,
+                       fetched = excluded.fetched""",
+                rows)
+            self._conn.execute(
+                """INSERT INTO fetches (topic, source, fetched) VALUES (?, ?, ?)
+                   ON CONFLICT (topic, source) DO UPDATE SET fetched = excluded.fetched""",
+                (topic, source, fetched_iso))
+        return len(rows)
+
+    def last_fetched(self, topic, source):
+        """Time `source` was last fetched for `topic`, or None."""
+        with self._lock:
+            row = self._conn.execute('SELECT fetched FROM fetches WHERE topic = ? AND source = ?',
+                                     (topic, source)).fetchone()
+        return datetime.fromisoformat(row['fetched']) if row else None
+
+    def is_fresh(self, topic, source, max_age_minutes):
+        """True if `source` was fetched for `topic` less than `max_age_minutes` ago."""
+        if not max_age_minutes:
+            return False
+        last = self.last_fetched(topic, source)
+        return last is not None and datetime.now(timezone.utc) - last < timedelta(minutes=max_age_minutes)
+
+    def articles(self, topic, since=None, until=None, limit=None):
+        """Entries of a topic published in [since, until), newest first.
+
+        Returns:
+            List of dicts with 'title', 'link', 'published', 'description', 'source'
+        """
+        sql = 'SELECT title, link, published, description, source FROM articles WHERE topic = ?'
+        params = [topic]
+        if since is not None:
+            sql += ' AND published >= ?'
+            params.append(_to_iso(since, since))
+        if until is not None:
+            sql += ' AND published < ?'
+            params.append(_to_iso(until, until))
+        sql += ' ORDER BY published DESC, id DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(int(limit))
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def prune(self, older_than_days):
+        """Delete entries published more than `older_than_days` ago; returns the count."""
+        cutoff = _to_iso(datetime.now(timezone.utc) - timedelta(days=older_than_days), None)
+        with self._lock, self._conn:
+            removed = self._conn.execute('DELETE FROM articles WHERE published < ?', (cutoff,)).rowcount
+        if removed:
+            logging.info(f"Article store: pruned {removed} entries older than {older_than_days} days")
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,11 +1,12 @@
-import feedparser
-import requests
-from newspaper import Article
-from newspaper.article import ArticleException
 from datetime import datetime, timedelta
 
+# feedparser, newspaper3k and requests are imported where they are used, so
+# runs without RSS topics (e.g. weather-only) never pay for loading them
+
 
 def fetch_feed(url, since_hours=48):
+    import feedparser
+
     d = feedparser.parse(url)
     cutoff = datetime.utcnow() - timedelta(hours=since_hours)
     entries = []
@@ -34,6 +35,10 @@ def fetch_feed(url, since_hours=48):
 
 def fetch_article_text(url):
     # newspaper3k provides robust extraction for many sites
+    import requests
+    from newspaper import Article
+    from newspaper.article import ArticleException
+
     try:
         art = Article(url)
         art.download()
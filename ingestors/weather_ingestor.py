@@ -1,6 +1,9 @@
-import requests
+import os
 from datetime import datetime
 
+# Overridable for compatible mirrors (or the benchmark stubs)
+OPEN_METEO_URL = os.getenv('OPEN_METEO_URL', 'https://api.open-meteo.com/v1/forecast')
+
 
 def fetch_weather(locations, provider='open-meteo'):
     """Fetch weather data for multiple locations.
@@ -37,7 +40,7 @@ def fetch_weather(locations, provider='open-meteo'):
 
 def _fetch_open_meteo(lat, lon):
     """Fetch weather from Open-Meteo API (free, no API key needed)."""
-    url = "https://api.open-meteo.com/v1/forecast"
+    url = OPEN_METEO_URL
     params = {
         'latitude': lat,
         'longitude': lon,
@@ -50,6 +53,8 @@ def _fetch_open_meteo(lat, lon):
         'forecast_days': 3
     }
     
+    import requests
+
     response = requests.get(url, params=params, timeout=10)
     response.raise_for_status()
     return response.json()
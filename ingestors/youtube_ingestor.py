@@ -1,4 +1,3 @@
-from youtube_transcript_api import YouTubeTranscriptApi
 import re
 
 
@@ -35,6 +34,8 @@ def fetch_transcript(video_url, languages=None):
     if not video_id:
         raise ValueError(f"Could not extract video ID from URL: {video_url}")
     
+    from youtube_transcript_api import YouTubeTranscriptApi
+
     try:
         transcript_list = YouTubeTranscriptApi.get_transcript(video_id, languages=languages)
         transcript_text = ' '.join([entry['text'] for entry in transcript_list])
@@ -0,0 +1,142 @@
+"""Run deadline and per-topic budgets with progressive degradation.
+
+A run may have a wall-clock deadline (`--deadline-minutes` or
+RUN_DEADLINE_MINUTES) and each topic a time budget (`budget_seconds` in
+topics.yaml, default TOPIC_BUDGET_SECONDS) and a budget of estimated
+remote-summarizer tokens (`token_budget`, default TOPIC_TOKEN_BUDGET).
+The pressure on a topic is the largest fraction used of any of these,
+with the run deadline measured against the time left before
+PUBLISH_RESERVE of it, which is kept for encoding, uploads and feeds.
+
+As pressure rises the stages degrade step by step (see LEVELS): feed
+descriptions instead of extracted article text, the local fallback
+summarizer instead of remote APIs, fewer segments, and finally a
+single segment. Every degradation is recorded for the end-of-run report.
+"""
+
+import json
+import logging
+import math
+import threading
+import time
+from pathlib import Path
+
+# Degradation levels and the pressure at which each starts
+FULL, FEED_DESCRIPTIONS, LOCAL_SUMMARIZER, FEWER_SEGMENTS, MINIMAL = range(5)
+LEVELS = ('full', 'feed-descriptions', 'local-summarizer', 'fewer-segments', 'minimal')
+THRESHOLDS = ((1.0, MINIMAL), (0.85, FEWER_SEGMENTS), (0.7, LOCAL_SUMMARIZER), (0.5, FEED_DESCRIPTIONS))
+
+# Share of the run deadline kept free for the publish phase
+PUBLISH_RESERVE = 0.1
+
+
+class RunBudget:
+    """Track the run deadline and per-topic budgets; thread-safe.
+
+    Args:
+        deadline_minutes: Wall-clock limit for the whole run (None = no limit)
+        topic_seconds: Default time budget per topic (None = no limit)
+        topic_tokens: Default estimated-token budget per topic (None = no limit)
+        started: time.perf_counter() value the deadline counts from (default: now)
+    """
+
+    def __init__(self, deadline_minutes=None, topic_seconds=None, topic_tokens=None, started=None):
+        self.deadline_s = deadline_minutes * 60 if deadline_minutes else None
+        self.topic_seconds = topic_seconds
+        self.topic_tokens = topic_tokens
+        self.started = started if started is not None else time.perf_counter()
+        self._topics = {}
+        self._degraded = {}
+        self._lock = threading.Lock()
+
+    def start_topic(self, topic, budget_seconds=None, token_budget=None):
+        """Start a topic's clock (idempotent); topics.yaml values override the defaults."""
+        with self._lock:
+            self._topics.setdefault(topic, {
+                'started': time.perf_counter(),
+                'seconds': budget_seconds or self.topic_seconds,
+                'token_budget': token_budget or self.topic_tokens,
+                'tokens': 0,
+            })
+
+    def add_tokens(self, topic, tokens):
+        """Count estimated tokens spent on remote summarization for `topic`."""
+        with self._lock:
+            if topic in self._topics:
+                self._topics[topic]['tokens'] += tokens
+
+    def remaining(self):
+        """Seconds left before the run deadline (None without a deadline)."""
+        if not self.deadline_s:
+            return None
+        return self.deadline_s - (time.perf_counter() - self.started)
+
+    def pressure(self, topic):
+        """Largest fraction used of the run deadline and the topic's budgets."""
+        now = time.perf_counter()
+        fractions = [0.0]
+        if self.deadline_s:
+            fractions.append((now - self.started) / (self.deadline_s * (1 - PUBLISH_RESERVE)))
+        with self._lock:
+            info = self._topics.get(topic)
+            if info is not None:
+                if info['seconds']:
+                    fractions.append((now - info['started']) / info['seconds'])
+                if info['token_budget']:
+                    fractions.append(info['tokens'] / info['token_budget'])
+        return max(fractions)
+
+    def level(self, topic):
+        """Current degradation level of `topic` (FULL .. MINIMAL)."""
+        pressure = self.pressure(topic)
+        for threshold, level in THRESHOLDS:
+            if pressure >= threshold:
+                return level
+        return FULL
+
+    def segment_limit(self, topic, segments):
+        """Segments a topic may still produce at its current level."""
+        level = self.level(topic)
+        if level >= MINIMAL:
+            return 1
+        if level >= FEWER_SEGMENTS:
+            return max(1, math.ceil(segments / 2))
+        return segments
+
+    def degrade(self, topic, kind, detail=None):
+        """Record one degraded step (e.g. an article summarized locally)."""
+        with self._lock:
+            entry = self._degraded.setdefault(topic, {}).setdefault(kind, {'count': 0})
+            entry['count'] += 1
+            if detail is not None:
+                entry['detail'] = detail
+
+    def report(self):
+        """Degradations per topic, plus the deadline and time used."""
+        with self._lock:
+            return {
+                'deadline_s': self.deadline_s,
+                'elapsed_s': round(time.perf_counter() - self.started, 3),
+                'topics': {topic: {kind: dict(entry) for kind, entry in kinds.items()}
+                           for topic, kinds in self._degraded.items()},
+            }
+
+    def format_report(self, report=None):
+        """One line per degraded topic, e.g. "World News: local-summarizer x4"."""
+        report = report or self.report()
+        if not report['topics']:
+            return "No degradation: every topic ran at full quality"
+        lines = [f"Degraded {len(report['topics'])} topic(s) to stay within budget:"]
+        for topic, kinds in sorted(report['topics'].items()):
+            parts = [f"{kind} x{entry['count']}" + (f" ({entry['detail']})" if 'detail' in entry else '')
+                     for kind, entry in kinds.items()]
+            lines.append(f"  {topic}: {', '.join(parts)}")
+        return '\n'.join(lines)
+
+    def save_report(self, path):
+        """Write the report as JSON; returns it."""
+        report = self.report()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+        logging.info(self.format_report(report))
+        return report
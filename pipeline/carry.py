@@ -0,0 +1,99 @@
+"""Keep the audio that later runs still need inside `outbox/state`.
+
+CI caches `outbox/state` (and text outputs) between runs, but not the MP3
+files, which are too large to cache wholesale. Two kinds of audio must
+survive anyway: dated episodes still waiting in the upload queue, and the
+TTS segments and built episodes recorded by unfinished topics in the run
+journal. At the end of a run those files are linked (or copied) into
+`outbox/state/carry/<original path>`; at the start of the next run any of
+them missing from their original place are put back, so pending uploads
+and `--resume` find their audio again.
+"""
+
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+
+from pipeline import journal
+from publisher import upload_queue
+
+CARRY_DIR = Path('outbox') / 'state' / 'carry'
+
+
+def _link(src, dst):
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.exists():
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def referenced_files(journal_path=journal.DEFAULT_PATH, queue_path=upload_queue.DEFAULT_STATE_FILE,
+                     max_age_hours=12):
+    """Audio files referenced by pending uploads and unfinished journal work.
+
+    Returns:
+        Set of paths relative to the working directory (files elsewhere are skipped)
+    """
+    paths = set()
+    try:
+        paths.update(item['file_path'] for item in json.loads(Path(queue_path).read_text(encoding='utf-8')))
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable upload queue {queue_path}: {e}")
+    for records in journal.unfinished(journal.read_journal(journal_path), max_age_hours).values():
+        for rec in records:
+            paths.update(rec[key] for key in ('file', 'dated_path') if rec.get(key))
+
+    cwd = Path.cwd().resolve()
+    relative = set()
+    for path in paths:
+        try:
+            relative.add(Path(path).resolve().relative_to(cwd))
+        except ValueError:
+            continue
+    return relative
+
+
+def save(carry_dir=CARRY_DIR, **kwargs):
+    """Mirror the referenced audio into `carry_dir` and drop what is no longer referenced.
+
+    Returns:
+        Number of files kept
+    """
+    carry_dir = Path(carry_dir)
+    wanted = {rel for rel in referenced_files(**kwargs) if rel.is_file() and carry_dir not in rel.parents}
+    if carry_dir.exists():
+        for path in sorted(carry_dir.rglob('*'), reverse=True):
+            if path.is_file() and path.relative_to(carry_dir) not in wanted:
+                path.unlink()
+            elif path.is_dir() and not any(path.iterdir()):
+                path.rmdir()
+    for rel in wanted:
+        target = carry_dir / rel
+        if not target.exists() or target.stat().st_size != rel.stat().st_size:
+            _link(rel, target)
+    if wanted:
+        logging.info(f"Kept {len(wanted)} audio file(s) for pending uploads and resumable work in {carry_dir}")
+    return len(wanted)
+
+
+def restore(carry_dir=CARRY_DIR):
+    """Put carried audio back where it is missing; returns how many files were restored."""
+    carry_dir = Path(carry_dir)
+    if not carry_dir.exists():
+        return 0
+    restored = 0
+    for path in carry_dir.rglob('*'):
+        rel = path.relative_to(carry_dir)
+        if path.is_file() and not rel.exists():
+            _link(path, rel)
+            restored += 1
+    if restored:
+        logging.info(f"Restored {restored} audio file(s) from {carry_dir}")
+    return restored
@@ -0,0 +1,455 @@
+"""Record and replay a run's outbound HTTP traffic ("cassettes").
+
+`run.py --record run.cassette` captures every HTTP exchange of the run:
+feeds (feedparser goes through urllib), article pages, weather, the
+summarizer APIs, TTS and uploads (everything else uses requests). A
+cassette is a zip file with one JSON line per exchange in
+`exchanges.jsonl` and each distinct response body stored once under
+`bodies/<sha256>`, deflated unless it is already compressed audio.
+Request headers are never recorded, so API keys do not end up in the
+cassette; request bodies are kept only as hashes.
+
+`run.py --replay run.cassette` serves the recorded responses instead of
+touching the network, either with each exchange's original latency
+(`--replay-timing original`) or immediately (`zero`). Requests are matched
+on method, URL and body hash, then on method and URL. As a last resort an
+unused exchange on the same host is served, but only for uploads (PUT/POST
+to the Internet Archive endpoint, whose identifiers embed the run date) or
+when the URLs differ only by a date; a request with no recorded match
+fails like a connection error.
+
+The cassette also keeps the run's inputs (topics file, sources lists,
+lookback) and configuration, so a production run can be re-executed
+offline, e.g. under the profiler:
+
+    python pipeline/cassette.py info run.cassette
+    python pipeline/cassette.py replay run.cassette --timing zero --profile
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Allow `python pipeline/cassette.py` to import sibling packages
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+FORMAT_VERSION = 1
+TIMINGS = ('original', 'zero')
+# Only whether these were set is recorded; replay sets placeholders so the same backends run
+SECRET_ENV = ('HUGGINGFACE_API_KEY', 'OPENAI_API_KEY', 'INTERNET_ARCHIVE_ACCESS_KEY', 'INTERNET_ARCHIVE_SECRET')
+CONFIG_ENV = ('HUGGINGFACE_API_URL', 'OPENAI_BASE_URL', 'OPEN_METEO_URL', 'TTS_HTTP_URL', 'BLOG_FORMATS',
+              'ARTICLE_STORE_MAX_AGE', 'EPISODE_RETENTION', 'FEED_PAGE_SIZE', 'AUDIO_WORKERS', 'UPLOAD_WORKERS',
+              'TOPIC_BUDGET_SECONDS', 'TOPIC_TOKEN_BUDGET', 'RUN_DEADLINE_MINUTES')
+# Response headers that do not describe the stored body (or carry session data)
+DROPPED_HEADERS = {'set-cookie', 'content-length', 'transfer-encoding'}
+STORED_TYPES = ('audio/', 'image/', 'video/', 'application/zip', 'application/gzip')
+# Dates and timestamps in URLs (2025-11-24, 20251124, 20251124T060000Z), ignored by the host fallback
+DATE_RE = re.compile(r'(?:19|20)\d{2}-?(?:0[1-9]|1[0-2])-?(?:0[1-9]|[12]\d|3[01])(?:T\d{2}:?\d{2}:?\d{2}Z?)?')
+UPLOAD_METHODS = ('PUT', 'POST')
+DEFAULT_UPLOAD_HOST = 's3.us.archive.org'
+
+_active = None
+_originals = {}
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _body_hash(body):
+    """Hash of a request body, or None when it is a stream (e.g. an uploaded file)."""
+    if body is None:
+        return _sha256(b'')
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    if isinstance(body, (bytes, bytearray)):
+        return _sha256(bytes(body))
+    return None
+
+
+def capture_inputs(topics_file, sources_dir='sources', since_hours=48):
+    """Run inputs and configuration stored in a cassette's metadata."""
+    sources = {}
+    if Path(sources_dir).is_dir():
+        for path in sorted(Path(sources_dir).glob('*.txt')):
+            sources[path.name] = path.read_text(encoding='utf-8')
+    return {
+        'topics': Path(topics_file).read_text(encoding='utf-8'),
+        'sources': sources,
+        'since_hours': since_hours,
+        'secrets_set': [name for name in SECRET_ENV if os.getenv(name)],
+        'config': {name: os.environ[name] for name in CONFIG_ENV if name in os.environ},
+    }
+
+
+class Cassette:
+    """Recorded HTTP exchanges of one run; thread-safe.
+
+    Args:
+        path: Cassette file
+        mode: 'record' (start empty, write on save) or 'replay' (load `path`)
+        timing: Replay latency, 'original' or 'zero'
+        meta: Metadata stored with a new recording (see capture_inputs)
+    """
+
+    def __init__(self, path, mode='replay', timing='original', meta=None):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode!r}")
+        if timing not in TIMINGS:
+            raise ValueError(f"Unknown replay timing: {timing!r} (expected one of {', '.join(TIMINGS)})")
+        self.path = Path(path)
+        self.mode = mode
+        self.timing = timing
+        self.meta = dict(meta or {})
+        self.exchanges = []
+        self.bodies = {}
+        self.stats = {'recorded': 0, 'exact': 0, 'url': 0, 'host': 0, 'missed': 0}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        if mode == 'record':
+            self.meta.setdefault('recorded_at', datetime.now(timezone.utc).isoformat())
+        else:
+            self._load()
+            self._index()
+
+    def _load(self):
+        with zipfile.ZipFile(self.path) as zf:
+            self.meta = json.loads(zf.read('meta.json'))
+            if self.meta.get('version') != FORMAT_VERSION:
+                raise ValueError(f"{self.path}: unsupported cassette version {self.meta.get('version')!r}")
+            self.exchanges = [json.loads(line) for line in zf.read('exchanges.jsonl').decode('utf-8').splitlines()
+                              if line.strip()]
+            for name in zf.namelist():
+                if name.startswith('bodies/'):
+                    self.bodies[name[len('bodies/'):]] = zf.read(name)
+
+    def _index(self):
+        # Per match key, the recorded exchanges in order; repeats of a request get the next one
+        self._by_key = defaultdict(deque)
+        self._by_url = defaultdict(deque)
+        self._by_host = defaultdict(deque)
+        for ex in self.exchanges:
+            self._by_key[(ex['method'], ex['url'], ex['body_hash'])].append(ex)
+            self._by_url[(ex['method'], ex['url'])].append(ex)
+            self._by_host[(ex['method'], urlsplit(ex['url']).netloc)].append(ex)
+        self._used = set()
+
+    def record(self, method, url, body_hash, started, response=None, error=None):
+        """Add one exchange: `response` is (status, reason, headers, body) or `error` an exception."""
+        ex = {
+            'method': method,
+            'url': url,
+            'body_hash': body_hash,
+            'offset_s': round(started - self._started, 4),
+            'elapsed_s': round(time.perf_counter() - started, 4),
+        }
+        body = None
+        if error is not None:
+            ex['error'] = type(error).__name__
+            ex['message'] = str(error)
+        else:
+            status, reason, headers, body = response
+            ex.update(status=status, reason=reason, body=_sha256(body),
+                      headers=[[k, v] for k, v in headers if k.lower() not in DROPPED_HEADERS])
+        with self._lock:
+            self.exchanges.append(ex)
+            if body is not None:
+                self.bodies.setdefault(ex['body'], body)
+            self.stats['recorded'] += 1
+
+    def match(self, method, url, body_hash):
+        """The recorded exchange to replay for a request, or None; waits out its original latency."""
+        with self._lock:
+            ex, kind = None, None
+            for kind, queue in (('exact', self._by_key.get((method, url, body_hash))),
+                                ('url', self._by_url.get((method, url))),
+                                ('host', self._by_host.get((method, urlsplit(url).netloc)))):
+                if not queue:
+                    continue
+                if kind == 'host':
+                    # Loosest match: only unused exchanges, and only for uploads or date-only differences
+                    ex = next((e for e in queue if id(e) not in self._used and _may_stand_in(e, method, url)),
+                              None)
+                    if ex is None:
+                        continue
+                else:
+                    # Keep the last one for further repeats (e.g. retries)
+                    ex = queue.popleft() if len(queue) > 1 else queue[0]
+                break
+            if ex is None:
+                self.stats['missed'] += 1
+                logging.warning(f"No recorded response for {method} {url}")
+                return None
+            self._used.add(id(ex))
+            self.stats[kind] += 1
+        if self.timing == 'original' and ex['elapsed_s'] > 0:
+            time.sleep(ex['elapsed_s'])
+        return ex
+
+    def body(self, ex):
+        return self.bodies.get(ex.get('body'), b'')
+
+    def save(self):
+        """Write the recording (zip: meta.json, exchanges.jsonl, bodies/<sha256>)."""
+        with self._lock:
+            meta = dict(self.meta, version=FORMAT_VERSION, exchanges=len(self.exchanges))
+            types = {}
+            for ex in self.exchanges:
+                content_type = dict((k.lower(), v) for k, v in ex.get('headers', [])).get('content-type', '')
+                types[ex.get('body')] = content_type
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            with zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+                zf.writestr('meta.json', json.dumps(meta, indent=2))
+                zf.writestr('exchanges.jsonl', ''.join(json.dumps(ex, ensure_ascii=False) + '\n'
+                                                       for ex in self.exchanges))
+                for digest, body in self.bodies.items():
+                    compress = (zipfile.ZIP_STORED if types.get(digest, '').startswith(STORED_TYPES)
+                                else zipfile.ZIP_DEFLATED)
+                    zf.writestr(f'bodies/{digest}', body, compress_type=compress)
+            os.replace(tmp, self.path)
+        logging.info(f"Recorded {len(self.exchanges)} HTTP exchange(s) to {self.path} "
+                     f"({self.path.stat().st_size / 1024:.0f} KiB)")
+
+
+def _upload_hosts():
+    endpoint = os.getenv('INTERNET_ARCHIVE_S3_ENDPOINT')
+    return {DEFAULT_UPLOAD_HOST} | ({urlsplit(endpoint).netloc} if endpoint else set())
+
+
+def _may_stand_in(ex, method, url):
+    """Whether a recorded exchange on the same host may stand in for `method url`."""
+    if method in UPLOAD_METHODS and urlsplit(url).netloc in _upload_hosts():
+        return True
+    return DATE_RE.sub('{date}', ex['url']) == DATE_RE.sub('{date}', url)
+
+
+def _requests_send(adapter, request, **kwargs):
+    """HTTPAdapter.send replacement: one call per request, redirects included."""
+    cassette = _active
+    method, url = request.method, request.url
+    if cassette is None:
+        return _originals['requests'](adapter, request, **kwargs)
+
+    import requests
+    from urllib3.response import HTTPResponse
+
+    if cassette.mode == 'record':
+        started = time.perf_counter()
+        try:
+            response = _originals['requests'](adapter, request, **kwargs)
+            body = response.content  # read streamed bodies too, so the latency includes the transfer
+        except requests.RequestException as e:
+            cassette.record(method, url, _body_hash(request.body), started, error=e)
+            raise
+        # requests has already decoded the body, so its content-encoding no longer applies
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() != 'content-encoding']
+        cassette.record(method, url, _body_hash(request.body), started,
+                        response=(response.status_code, response.reason, headers, body))
+        return response
+
+    ex = cassette.match(method, url, _body_hash(request.body))
+    if ex is None:
+        raise requests.ConnectionError(f"No recorded response for {method} {url}", request=request)
+    if 'error' in ex:
+        error_type = getattr(requests.exceptions, ex['error'], requests.ConnectionError)
+        raise error_type(ex['message'], request=request)
+    body = cassette.body(ex)
+    raw = HTTPResponse(body=io.BytesIO(body), headers=ex['headers'], status=ex['status'], reason=ex['reason'],
+                       preload_content=False, decode_content=False)
+    response = adapter.build_response(request, raw)
+    response._content = body
+    response._content_consumed = True
+    return response
+
+
+def _urllib_open(opener, fullurl, data=None, timeout=None, **kwargs):
+    """OpenerDirector.open replacement for http(s) URLs (feedparser, urlopen)."""
+    import urllib.error
+    import urllib.request
+    from http.client import HTTPMessage
+    from urllib.response import addinfourl
+
+    cassette = _active
+    request = fullurl if isinstance(fullurl, urllib.request.Request) else urllib.request.Request(fullurl, data)
+    if data is not None:
+        request.data = data
+    url = request.full_url
+    args = (opener, request) if timeout is None else (opener, request, None, timeout)
+    if cassette is None or urlsplit(url).scheme not in ('http', 'https'):
+        return _originals['urllib'](*args, **kwargs)
+    method = request.get_method()
+
+    if cassette.mode == 'record':
+        started = time.perf_counter()
+        try:
+            response = _originals['urllib'](*args, **kwargs)
+        except urllib.error.HTTPError as e:
+            body = e.read()
+            cassette.record(method, url, _body_hash(request.data), started,
+                            response=(e.code, e.reason, list(e.headers.items()), body))
+            raise urllib.error.HTTPError(e.url, e.code, e.reason, e.headers, io.BytesIO(body))
+        except (urllib.error.URLError, OSError) as e:
+            cassette.record(method, url, _body_hash(request.data), started, error=e)
+            raise
+        with response:
+            body = response.read()
+        cassette.record(method, url, _body_hash(request.data), started,
+                        response=(response.status, response.reason, list(response.headers.items()), body))
+        return addinfourl(io.BytesIO(body), response.headers, response.url, response.status)
+
+    ex = cassette.match(method, url, _body_hash(request.data))
+    if ex is None or 'error' in ex:
+        raise urllib.error.URLError(ex['message'] if ex else f"No recorded response for {method} {url}")
+    headers = HTTPMessage()
+    for key, value in ex['headers']:
+        headers[key] = value
+    if ex['status'] >= 400:
+        raise urllib.error.HTTPError(url, ex['status'], ex['reason'], headers, io.BytesIO(cassette.body(ex)))
+    return addinfourl(io.BytesIO(cassette.body(ex)), headers, url, ex['status'])
+
+
+def install(cassette):
+    """Route requests and urllib HTTP through `cassette` until uninstall()."""
+    global _active
+    import urllib.request
+    from requests.adapters import HTTPAdapter
+
+    if not _originals:
+        _originals['requests'] = HTTPAdapter.send
+        _originals['urllib'] = urllib.request.OpenerDirector.open
+        HTTPAdapter.send = _requests_send
+        urllib.request.OpenerDirector.open = _urllib_open
+    _active = cassette
+
+
+def uninstall():
+    global _active
+    import urllib.request
+    from requests.adapters import HTTPAdapter
+
+    _active = None
+    if _originals:
+        HTTPAdapter.send = _originals.pop('requests')
+        urllib.request.OpenerDirector.open = _originals.pop('urllib')
+
+
+@contextlib.contextmanager
+def recording(path, meta=None):
+    """Record all HTTP traffic of the enclosed block to `path` (saved even if it fails)."""
+    cassette = Cassette(path, 'record', meta=meta)
+    install(cassette)
+    try:
+        yield cassette
+    finally:
+        uninstall()
+        cassette.save()
+
+
+@contextlib.contextmanager
+def replaying(path, timing='original'):
+    """Serve all HTTP traffic of the enclosed block from the cassette at `path`."""
+    cassette = Cassette(path, 'replay', timing)
+    missing = [name for name in cassette.meta.get('secrets_set', []) if not os.getenv(name)]
+    if missing:
+        # Without them the run takes other code paths than the recorded one (any value will do)
+        logging.warning(f"Recorded with {', '.join(missing)} set; set them to replay the same backends")
+    install(cassette)
+    try:
+        yield cassette
+    finally:
+        uninstall()
+        logging.info(f"Replayed {path}: {cassette.stats['exact']} exact, {cassette.stats['url']} by URL, "
+                     f"{cassette.stats['host']} by host, {cassette.stats['missed']} unmatched request(s)")
+
+
+def describe(path):
+    """Summary of a cassette: metadata, exchanges and time per host."""
+    cassette = Cassette(path, 'replay', 'zero')
+    hosts = defaultdict(lambda: {'exchanges': 0, 'errors': 0, 'elapsed_s': 0.0, 'bytes': 0})
+    for ex in cassette.exchanges:
+        host = hosts[urlsplit(ex['url']).netloc]
+        host['exchanges'] += 1
+        host['elapsed_s'] += ex['elapsed_s']
+        host['errors'] += 'error' in ex or ex.get('status', 0) >= 400
+        host['bytes'] += len(cassette.body(ex))
+    lines = [f"{path}: {len(cassette.exchanges)} exchange(s) recorded {cassette.meta.get('recorded_at')}, "
+             f"{len(cassette.bodies)} distinct bodies, {Path(path).stat().st_size / 1024:.0f} KiB on disk"]
+    for name, host in sorted(hosts.items(), key=lambda kv: -kv[1]['elapsed_s']):
+        lines.append(f"  {name:<40} {host['exchanges']:>5} req {host['errors']:>4} err "
+                     f"{host['elapsed_s']:>8.2f}s {host['bytes'] / 1024:>9.0f} KiB")
+    return '\n'.join(lines)
+
+
+def replay_run(path, timing='zero', workdir=None, profile=False, extra_args=()):
+    """Re-run a recorded run offline in `workdir` (default: a new temp dir).
+
+    The recorded topics and sources are written to `workdir`, recorded
+    configuration is applied, and backends whose keys were set get a
+    placeholder key so the same code paths run. The lookback grows by the
+    cassette's age so recorded feed entries still fall inside it.
+
+    Returns:
+        (exit code, workdir)
+    """
+    meta = Cassette(path, 'replay', timing).meta
+    workdir = Path(workdir or tempfile.mkdtemp(prefix='newsgen-replay-'))
+    (workdir / 'sources').mkdir(parents=True, exist_ok=True)
+    (workdir / 'topics.yaml').write_text(meta['topics'], encoding='utf-8')
+    for name, text in meta.get('sources', {}).items():
+        (workdir / 'sources' / name).write_text(text, encoding='utf-8')
+
+    env = dict(os.environ)
+    for name in SECRET_ENV:
+        env.pop(name, None)
+    env.update({name: 'replay' for name in meta.get('secrets_set', [])})
+    env.update(meta.get('config', {}))
+    age_h = (datetime.now(timezone.utc) - datetime.fromisoformat(meta['recorded_at'])).total_seconds() / 3600
+    since = int(meta.get('since_hours', 48) + age_h) + 1
+
+    cmd = [sys.executable, str(ROOT / 'pipeline' / 'run.py'), '--topics', 'topics.yaml', '--since', str(since),
+           '--force', '--replay', str(Path(path).resolve()), '--replay-timing', timing]
+    if profile:
+        cmd.append('--profile')
+    cmd.extend(extra_args)
+    logging.info(f"Replaying {path} in {workdir}")
+    return subprocess.run(cmd, cwd=workdir, env=env).returncode, workdir
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Inspect or replay recorded pipeline runs')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_info = sub.add_parser('info', help='Show what a cassette recorded')
+    p_replay = sub.add_parser('replay', help='Re-run a recorded run offline')
+    for p in (p_info, p_replay):
+        p.add_argument('cassette')
+    p_replay.add_argument('--timing', choices=TIMINGS, default='zero',
+                          help='Replay with the recorded latency or none')
+    p_replay.add_argument('--workdir', help='Directory for the replay outputs (default: a temp dir)')
+    p_replay.add_argument('--profile', action='store_true', help='Run under cProfile (see run.py --profile)')
+    args, extra = parser.parse_known_args()
+
+    if args.command == 'info':
+        print(describe(args.cassette))
+    else:
+        code, workdir = replay_run(args.cassette, args.timing, args.workdir, args.profile, extra)
+        print(f"Replay outputs: {workdir}")
+        sys.exit(code)
@@ -0,0 +1,480 @@
+"""Run history: per-run metrics in a local SQLite database, and trend reports.
+
+At the end of every run, `pipeline/run.py` turns the run's spans, token
+usage, cache counters and changed outputs into flat metrics:
+
+    run.duration_s             wall time of the run
+    time.<span>_s              total time in each span (stage.ingest, fetch, summarize, tts, ...)
+    articles.*, segments.*     feed entries fetched, articles extracted and summarized, segments
+    count.<counter>            cache counters (feeds.cached, topics.unchanged, summaries.reused, ...)
+    cache.*_rate               hit rates derived from the counters
+    tokens.*                   estimated summarizer tokens and API calls
+    failures.total             failed feeds, article extractions and uploads
+    output.*                   changed files and their size, size of outbox/ and content/
+
+The metrics go to `outbox/run_metrics.json` and are appended to
+`outbox/state/history.sqlite3` (RUN_HISTORY), with failures per source
+in their own table. The state directory outlives workflow artifacts, so
+the history covers weeks of runs. Each run also records its topic set:
+`report` renders a static HTML or markdown trend report comparing the
+latest run with the median of earlier runs of the same topics (an hourly
+weather-only run is never compared with a full run) and flagging
+regressions:
+
+    python pipeline/history.py report --format html --out outbox/trend_report.html
+    python pipeline/history.py report --format markdown --fail-on-regression
+    python pipeline/history.py list
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from html import escape
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Allow `python pipeline/history.py` to import sibling packages
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+DEFAULT_PATH = Path('outbox') / 'state' / 'history.sqlite3'
+METRICS_FILE = Path('outbox') / 'run_metrics.json'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started TEXT NOT NULL,
+    status TEXT NOT NULL,
+    git_commit TEXT,
+    topic_set TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs (started);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (run_id, name)
+);
+CREATE TABLE IF NOT EXISTS failures (
+    run_id TEXT NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    source TEXT NOT NULL,
+    failures INTEGER NOT NULL,
+    PRIMARY KEY (run_id, source)
+);
+"""
+
+# Cache hit rates: (rate metric, hit counter, miss counter)
+RATES = (
+    ('cache.feeds_hit_rate', 'count.feeds.cached', 'count.feeds.fetched'),
+    ('cache.topics_unchanged_rate', 'count.topics.unchanged', 'count.topics.rebuilt'),
+    ('cache.summaries_reused_rate', 'count.summaries.reused', 'articles.summarized'),
+    ('cache.segments_reused_rate', 'count.segments.reused', 'segments.synthesized'),
+)
+# Which way is worse, by metric prefix: +1 = an increase is a regression, -1 = a drop is
+DIRECTIONS = (('cache.', -1), ('time.', 1), ('run.duration', 1), ('failures.', 1), ('tokens.', 1),
+              ('output.total_bytes', 1))
+# Smallest change worth flagging, by metric prefix (noise floor)
+MIN_DELTAS = (('cache.', 0.1), ('time.', 0.5), ('run.duration', 1.0), ('failures.', 1), ('tokens.', 200),
+              ('output.', 256 * 1024))
+
+_counters = Counter()
+_lock = threading.Lock()
+
+
+def utc_now():
+    """Get current UTC time as timezone-aware datetime."""
+    return datetime.now(timezone.utc)
+
+
+def count(name, n=1):
+    """Add `n` to a run counter (e.g. 'feeds.cached'); safe from stage threads."""
+    with _lock:
+        _counters[name] += n
+
+
+def reset_counters():
+    """Forget the counters (e.g. between runs in one process)."""
+    with _lock:
+        _counters.clear()
+
+
+def counters():
+    with _lock:
+        return dict(_counters)
+
+
+def _prefixed(name, table, default=None):
+    for prefix, value in table:
+        if name.startswith(prefix):
+            return value
+    return default
+
+
+def _tree_bytes(path):
+    path = Path(path)
+    if not path.exists():
+        return 0
+    return sum(p.stat().st_size for p in path.rglob('*') if p.is_file() and 'state' not in p.parts)
+
+
+def derive_rates(metrics):
+    """Add the cache hit rates computable from the counters in `metrics`."""
+    for rate, hits, misses in RATES:
+        total = metrics.get(hits, 0) + metrics.get(misses, 0)
+        if total:
+            metrics[rate] = round(metrics.get(hits, 0) / total, 4)
+    return metrics
+
+
+def topic_set(topics):
+    """Key identifying a set of topic names (sorted JSON list), or None if unknown."""
+    return json.dumps(sorted(topics), ensure_ascii=False) if topics is not None else None
+
+
+def collect(records, run_counters=None, tokens=None, changed=(), roots=('outbox', 'content'), topics=None):
+    """Flat metrics of one run.
+
+    Args:
+        records: The run's span records (spans.end_run())
+        run_counters: Counter values (counters())
+        tokens: Token usage (TokenUsageTracker.to_dict())
+        changed: Paths of the outputs the run changed
+        roots: Output trees whose total size is measured
+        topics: Names of the topics the run selected
+
+    Returns:
+        {'metrics': {name: value}, 'failures': {source: count}, 'topics': [names]}
+    """
+    metrics = Counter()
+    failures = Counter()
+    for rec in records:
+        name, seconds, ok = rec['span'], rec['duration_ms'] / 1000, rec.get('status') == 'ok'
+        if name == 'run':
+            # Shards run side by side: the slowest one is the run's wall time
+            metrics['run.duration_s'] = max(metrics['run.duration_s'], seconds)
+            continue
+        metrics[f'time.{name}_s'] += seconds
+        if name == 'fetch':
+            if ok:
+                metrics['articles.fetched'] += rec.get('entries', 0)
+            else:
+                failures[rec.get('source', '?')] += 1
+        elif name == 'extract':
+            if ok and rec.get('chars'):
+                metrics['articles.extracted'] += 1
+            else:
+                failures[urlsplit(rec.get('link') or '').netloc or '?'] += 1
+        elif name == 'summarize' and ok:
+            metrics['articles.summarized'] += 1
+        elif name == 'tts' and ok:
+            metrics['segments.synthesized'] += 1
+        elif name == 'upload' and not ok:
+            failures['upload'] += 1
+
+    for key, value in (run_counters or {}).items():
+        metrics[f'count.{key}'] += value
+    if tokens:
+        metrics['tokens.input'] += tokens.get('input_tokens', 0)
+        metrics['tokens.output'] += tokens.get('output_tokens', 0)
+        metrics['tokens.total'] += tokens.get('input_tokens', 0) + tokens.get('output_tokens', 0)
+        metrics['tokens.api_calls'] += tokens.get('api_calls', 0)
+        metrics['tokens.failed_calls'] += tokens.get('failed_calls', 0)
+    metrics['failures.total'] = sum(failures.values())
+    metrics['output.changed_files'] = len(changed)
+    metrics['output.changed_bytes'] = sum(Path(p).stat().st_size for p in changed if Path(p).is_file())
+    metrics['output.total_bytes'] = sum(_tree_bytes(root) for root in roots)
+    metrics = {name: round(value, 4) for name, value in metrics.items()}
+    return {'metrics': derive_rates(metrics), 'failures': dict(failures),
+            'topics': sorted(topics) if topics is not None else None}
+
+
+def merge_collected(parts, roots=None):
+    """Combine the metrics of parallel shards: sums, the longest run time, rates recomputed.
+
+    With `roots` (the merged output trees), their size replaces the shards' summed sizes.
+    """
+    metrics, failures = Counter(), Counter()
+    topics = set()
+    for part in parts:
+        topics.update(part.get('topics') or ())
+        for name, value in part.get('metrics', {}).items():
+            if name == 'run.duration_s':
+                metrics[name] = max(metrics[name], value)
+            elif not name.startswith('cache.'):
+                metrics[name] += value
+        failures.update(part.get('failures', {}))
+    if roots is not None:
+        metrics['output.total_bytes'] = sum(_tree_bytes(root) for root in roots)
+    metrics = {name: round(value, 4) for name, value in metrics.items()}
+    return {'metrics': derive_rates(metrics), 'failures': dict(failures), 'topics': sorted(topics)}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class RunHistory:
+    """SQLite history of run metrics, safe to share between threads.
+
+    Args:
+        path: Database file (default RUN_HISTORY or outbox/state/history.sqlite3)
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path or os.getenv('RUN_HISTORY') or DEFAULT_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA foreign_keys=ON')
+            self._conn.executescript(SCHEMA)
+            columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(runs)')}
+            if 'topic_set' not in columns:  # databases created before topic sets were recorded
+                self._conn.execute('ALTER TABLE runs ADD COLUMN topic_set TEXT')
+
+    def record(self, collected, status='ok', started=None, run_id=None, commit=None):
+        """Store one run's collected metrics; returns its run id."""
+        started = started or utc_now()
+        run_id = run_id or started.strftime('%Y%m%dT%H%M%S.%fZ')
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO runs (run_id, started, status, git_commit, topic_set) '
+                               'VALUES (?, ?, ?, ?, ?)', (run_id, started.isoformat(timespec='seconds'), status,
+                                                          commit, topic_set(collected.get('topics'))))
+            self._conn.executemany('INSERT OR REPLACE INTO metrics (run_id, name, value) VALUES (?, ?, ?)',
+                                   [(run_id, name, value) for name, value in collected['metrics'].items()])
+            self._conn.executemany('INSERT OR REPLACE INTO failures (run_id, source, failures) VALUES (?, ?, ?)',
+                                   [(run_id, source, n) for source, n in collected['failures'].items()])
+        return run_id
+
+    def runs(self, limit=30, same_topics_as=None):
+        """The latest `limit` runs, oldest first, each with its metrics and failures.
+
+        With `same_topics_as` (a run from runs()), only runs of the same topic set are returned.
+        """
+        query, params = 'SELECT * FROM runs', ()
+        if same_topics_as is not None:
+            query, params = query + ' WHERE topic_set IS ?', (same_topics_as['topic_set'],)
+        with self._lock:
+            rows = self._conn.execute(query + ' ORDER BY started DESC, run_id DESC LIMIT ?',
+                                      params + (limit,)).fetchall()
+            runs = []
+            for row in reversed(rows):
+                run = dict(row)
+                run['metrics'] = {r['name']: r['value'] for r in self._conn.execute(
+                    'SELECT name, value FROM metrics WHERE run_id = ?', (row['run_id'],))}
+                run['failures'] = {r['source']: r['failures'] for r in self._conn.execute(
+                    'SELECT source, failures FROM failures WHERE run_id = ?', (row['run_id'],))}
+                runs.append(run)
+        return runs
+
+    def prune(self, days):
+        """Drop runs started more than `days` ago; returns how many."""
+        cutoff = (utc_now() - timedelta(days=days)).isoformat(timespec='seconds')
+        with self._lock, self._conn:
+            return self._conn.execute('DELETE FROM runs WHERE started < ?', (cutoff,)).rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def save_run(collected, status='ok', started=None, out_dir=Path('outbox'), path=None):
+    """Write run_metrics.json and append the run to the history database."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / METRICS_FILE.name).write_text(json.dumps(collected, indent=2) + '\n', encoding='utf-8')
+    history = RunHistory(path)
+    try:
+        run_id = history.record(collected, status, started, commit=git_revision())
+        history.prune(int(os.getenv('RUN_HISTORY_DAYS', '365')))
+    finally:
+        history.close()
+    logging.info(f"Run {run_id} recorded in {history.path}")
+    return run_id
+
+
+def find_regressions(runs, window=10, threshold=0.25):
+    """Compare the latest run with the median of up to `window` earlier runs of the same topics.
+
+    Returns:
+        List of dicts (metric, latest, baseline, change, direction, regressed),
+        one per metric of the latest run, regressions first
+    """
+    if not runs:
+        return []
+    latest = runs[-1]
+    previous = [run for run in runs[:-1] if run.get('topic_set') == latest.get('topic_set')][-window:]
+    rows = []
+    for name, value in sorted(latest['metrics'].items()):
+        history = [run['metrics'][name] for run in previous if name in run['metrics']]
+        baseline = statistics.median(history) if history else None
+        direction = _prefixed(name, DIRECTIONS, 0)
+        change = None
+        regressed = False
+        if baseline is not None:
+            delta = value - baseline
+            change = delta / baseline if baseline else None
+            # Needs a few earlier runs, a relative change past the threshold and a change past the noise floor
+            regressed = (len(history) >= 3 and direction != 0 and delta * direction > 0
+                         and abs(delta) >= _prefixed(name, MIN_DELTAS, 0)
+                         and (name.startswith('cache.') or change is None or abs(change) >= threshold))
+        rows.append({'metric': name, 'latest': value, 'baseline': baseline, 'change': change,
+                     'direction': direction, 'regressed': regressed, 'series': history + [value]})
+    rows.sort(key=lambda r: (not r['regressed'], r['metric']))
+    return rows
+
+
+def _fmt(value):
+    if value is None:
+        return '-'
+    if value == int(value) and abs(value) >= 1:
+        return f"{int(value):,}"
+    return f"{value:.3g}" if abs(value) < 1 else f"{value:,.2f}"
+
+
+def _sparkline(values):
+    blocks = '▁▂▃▄▅▆▇█'
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    return ''.join(blocks[int((v - low) / span * (len(blocks) - 1))] for v in values)
+
+
+def _svg(values, width=160, height=28):
+    low, high = min(values), max(values)
+    span = (high - low) or 1
+    step = width / max(len(values) - 1, 1)
+    points = ' '.join(f"{i * step:.1f},{height - 2 - (v - low) / span * (height - 4):.1f}"
+                      for i, v in enumerate(values))
+    return (f'<svg width="{width}" height="{height}"><polyline fill="none" stroke="#36c" stroke-width="1.5" '
+            f'points="{points}"/></svg>')
+
+
+def _failing_sources(runs, limit=10):
+    totals = Counter()
+    for run in runs:
+        totals.update(run['failures'])
+    return totals.most_common(limit)
+
+
+def _topics_label(run):
+    topics = json.loads(run['topic_set']) if run.get('topic_set') else None
+    return ', '.join(topics) if topics else 'unknown topics'
+
+
+def render_markdown(runs, rows):
+    """Trend report as markdown."""
+    latest = runs[-1]
+    regressed = [r for r in rows if r['regressed']]
+    lines = ["# Pipeline trend report", '',
+             f"{len(runs)} run(s) from {runs[0]['started']} to {latest['started']}; latest run "
+             f"`{latest['run_id']}` ({latest['status']}, commit {latest['git_commit'] or '-'}).", '',
+             f"Only runs of the same topics are compared: {_topics_label(latest)}.", '',
+             f"**{len(regressed)} regression(s)**" + (': ' + ', '.join(r['metric'] for r in regressed)
+                                                     if regressed else ''), '',
+             '| Metric | Latest | Median before | Change | Trend | |',
+             '|---|---:|---:|---:|---|---|']
+    for r in rows:
+        change = f"{r['change']:+.0%}" if r['change'] is not None else '-'
+        lines.append(f"| {r['metric']} | {_fmt(r['latest'])} | {_fmt(r['baseline'])} | {change} | "
+                     f"{_sparkline(r['series'])} | {'REGRESSION' if r['regressed'] else ''} |")
+    failing = _failing_sources(runs)
+    if failing:
+        lines += ['', '## Most failing sources', '', '| Source | Failures |', '|---|---:|']
+        lines += [f"| {source} | {n} |" for source, n in failing]
+    return '\n'.join(lines) + '\n'
+
+
+def render_html(runs, rows):
+    """Trend report as a standalone HTML page."""
+    latest = runs[-1]
+    regressed = [r for r in rows if r['regressed']]
+    body = ["<h1>Pipeline trend report</h1>",
+            f"<p>{len(runs)} run(s) from {escape(runs[0]['started'])} to {escape(latest['started'])}; latest run "
+            f"<code>{escape(latest['run_id'])}</code> ({escape(latest['status'])}, commit "
+            f"{escape(latest['git_commit'] or '-')}).</p>",
+            f"<p>Only runs of the same topics are compared: {escape(_topics_label(latest))}.</p>",
+            f"<p class=\"{'bad' if regressed else 'good'}\"><strong>{len(regressed)} regression(s)</strong>"
+            + (': ' + escape(', '.join(r['metric'] for r in regressed)) if regressed else '') + '</p>',
+            '<table><tr><th>Metric</th><th>Latest</th><th>Median before</th><th>Change</th><th>Trend</th></tr>']
+    for r in rows:
+        change = f"{r['change']:+.0%}" if r['change'] is not None else '-'
+        row_class = ' class="bad"' if r['regressed'] else ''
+        body.append(f"<tr{row_class}><td>{escape(r['metric'])}</td>"
+                    f"<td>{_fmt(r['latest'])}</td><td>{_fmt(r['baseline'])}</td><td>{change}</td>"
+                    f"<td>{_svg(r['series'])}</td></tr>")
+    body.append('</table>')
+    failing = _failing_sources(runs)
+    if failing:
+        body.append('<h2>Most failing sources</h2><table><tr><th>Source</th><th>Failures</th></tr>')
+        body += [f"<tr><td>{escape(source)}</td><td>{n}</td></tr>" for source, n in failing]
+        body.append('</table>')
+    style = ('body{font-family:sans-serif;margin:2em}table{border-collapse:collapse}'
+             'td,th{border-bottom:1px solid #ddd;padding:4px 8px;text-align:right}td:first-child{text-align:left}'
+             '.bad{background:#fde2e2}.good{color:#2a7}')
+    return (f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Pipeline trend report</title>"
+            f"<style>{style}</style></head><body>\n" + '\n'.join(body) + '\n</body></html>\n')
+
+
+def report(path=None, limit=30, window=10, threshold=0.25, fmt='markdown'):
+    """Render the trend report; returns (text, regression rows)."""
+    history = RunHistory(path)
+    try:
+        latest = history.runs(1)
+        # Only runs of the latest run's topics are comparable (e.g. not weather-only runs with full ones)
+        runs = history.runs(limit, same_topics_as=latest[0]) if latest else []
+    finally:
+        history.close()
+    if not runs:
+        return 'No runs recorded yet\n', []
+    rows = find_regressions(runs, window, threshold)
+    text = render_html(runs, rows) if fmt == 'html' else render_markdown(runs, rows)
+    return text, [r for r in rows if r['regressed']]
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Run history and trend reports')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_report = sub.add_parser('report', help='Render a trend report and flag regressions')
+    p_list = sub.add_parser('list', help='List recorded runs')
+    for p in (p_report, p_list):
+        p.add_argument('--db', help='History database (default RUN_HISTORY or outbox/state/history.sqlite3)')
+        p.add_argument('--runs', type=int, default=30, help='Number of latest runs to include')
+    p_report.add_argument('--window', type=int, default=10, help='Earlier runs the latest is compared with')
+    p_report.add_argument('--threshold', type=float, default=0.25, help='Relative change flagged as a regression')
+    p_report.add_argument('--format', choices=['markdown', 'html'], default='markdown')
+    p_report.add_argument('--out', help='Write the report here instead of printing it')
+    p_report.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 on regressions')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        history = RunHistory(args.db)
+        for run in history.runs(args.runs):
+            m = run['metrics']
+            print(f"{run['run_id']}  {run['status']:<5} {run['git_commit'] or '-':<8} "
+                  f"{m.get('run.duration_s', 0):>8.1f}s {int(m.get('articles.summarized', 0)):>4} summarized "
+                  f"{int(m.get('tokens.total', 0)):>7} tokens {int(m.get('failures.total', 0)):>3} failures")
+        history.close()
+    else:
+        text, regressions = report(args.db, args.runs, args.window, args.threshold, args.format)
+        if args.out:
+            Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+            Path(args.out).write_text(text, encoding='utf-8')
+            logging.info(f"Trend report written to {args.out} ({len(regressions)} regression(s))")
+        else:
+            print(text, end='')
+        sys.exit(1 if regressions and args.fail_on_regression else 0)
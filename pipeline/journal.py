@@ -0,0 +1,173 @@
+"""Run journal: per-topic, per-stage checkpoints for resumable runs.
+
+Every run appends one JSON line per completed step to
+`outbox/state/run_journal.jsonl`: a topic's feeds fetched (with the
+extracted articles), each article summarized, each TTS segment written,
+the episode concatenated and uploaded. When a topic makes it through the
+whole pipeline the run records it as `done`.
+
+Resumable work is kept per topic: a new journal carries over the records
+of every topic that is not done (and started less than `max_age_hours`
+ago), whichever topics the new run selects. With `run.py --resume` the
+stages reuse those records instead of repeating paid summarization and
+TTS calls; without it, the selected topics start over. A topic that
+crashed stays resumable until a run completes it, so the scheduler can
+pick it up on its next run (see `pending_topics`).
+
+Topic-level stages are listed in STAGES; 'summary' and 'segment' records
+are per item.
+"""
+
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+DEFAULT_PATH = Path('outbox') / 'state' / 'run_journal.jsonl'
+STAGES = ('fetched', 'summarized', 'synthesized', 'concatenated', 'uploaded')
+DONE = 'done'
+
+
+def utc_now():
+    """Get current UTC time as timezone-aware datetime."""
+    return datetime.now(timezone.utc)
+
+
+def read_journal(path=DEFAULT_PATH):
+    """Read journal records; a line cut short by a crash is ignored."""
+    path = Path(path)
+    if not path.exists():
+        return []
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logging.warning(f"Skipping unreadable run journal line in {path}")
+    return records
+
+
+def unfinished(records, max_age_hours=12):
+    """Records of topics not yet done, grouped as {topic: [record, ...]}.
+
+    A topic's records before its latest `done` belong to completed runs of
+    it and are dropped, as are topics whose unfinished work started more
+    than `max_age_hours` ago (None = no limit).
+    """
+    by_topic = {}
+    for rec in records:
+        if 'topic' not in rec:
+            continue
+        if rec['stage'] == DONE:
+            by_topic.pop(rec['topic'], None)
+        else:
+            by_topic.setdefault(rec['topic'], []).append(rec)
+    if max_age_hours is None:
+        return by_topic
+    cutoff = utc_now() - timedelta(hours=max_age_hours)
+    return {topic: recs for topic, recs in by_topic.items() if datetime.fromisoformat(recs[0]['ts']) >= cutoff}
+
+
+def pending_topics(path=DEFAULT_PATH, max_age_hours=12):
+    """Names of topics with resumable (unfinished) work in the journal at `path`."""
+    return list(unfinished(read_journal(path), max_age_hours))
+
+
+class RunJournal:
+    """Append-only journal of one pipeline run, safe to use from stage threads.
+
+    Args:
+        path: Journal file
+        resume: Reuse the recorded work of unfinished topics
+        max_age_hours: Never resume a topic whose unfinished work started longer ago than this
+        topics: Topics this run processes; without `resume`, their earlier
+            records are dropped (None = all topics)
+    """
+
+    def __init__(self, path=DEFAULT_PATH, resume=False, max_age_hours=12, topics=None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        pending = unfinished(read_journal(self.path), max_age_hours)
+        if not resume:
+            # Starting over: only other topics' unfinished work is kept
+            pending = {topic: recs for topic, recs in pending.items() if topics is not None and topic not in topics}
+        self._records = [rec for recs in pending.values() for rec in recs]
+        self.resumed = resume and bool(self._records)
+
+        # Rewrite the journal with just the carried-over records, so it never grows past one run
+        self.run_id = f"{utc_now().strftime('%Y%m%dT%H%M%SZ')}-{uuid.uuid4().hex[:6]}"
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for rec in [{'run': self.run_id, 'event': 'start', 'ts': utc_now().isoformat()}] + self._records:
+                f.write(json.dumps(rec, ensure_ascii=False, default=str) + '\n')
+        os.replace(tmp, self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def _write(self, rec):
+        # One flushed line per record, so a crash loses at most the step in progress
+        self._file.write(json.dumps(rec, ensure_ascii=False, default=str) + '\n')
+        self._file.flush()
+
+    def record(self, topic, stage, **artifacts):
+        """Record that `stage` finished for `topic`, with its artifacts."""
+        rec = {'run': self.run_id, 'topic': topic, 'stage': stage, 'ts': utc_now().isoformat()}
+        rec.update(artifacts)
+        with self._lock:
+            self._records.append(rec)
+            self._write(rec)
+        return rec
+
+    def get(self, topic, stage):
+        """Latest record of `stage` for `topic`, or None."""
+        with self._lock:
+            for rec in reversed(self._records):
+                if rec['topic'] == topic and rec['stage'] == stage:
+                    return rec
+        return None
+
+    def items(self, topic, stage):
+        """All records of a per-item stage ('summary', 'segment') for `topic`, oldest first."""
+        with self._lock:
+            return [rec for rec in self._records if rec['topic'] == topic and rec['stage'] == stage]
+
+    def concatenated_for(self, file_path):
+        """The 'concatenated' record of the episode at `file_path`, or None."""
+        file_path = str(file_path)
+        with self._lock:
+            for rec in reversed(self._records):
+                if rec['stage'] == 'concatenated' and rec.get('dated_path') == file_path:
+                    return rec
+        return None
+
+    def completed(self):
+        """Topic-level stages recorded so far, as {topic: [stage, ...]}."""
+        done = {}
+        with self._lock:
+            for rec in self._records:
+                if rec['stage'] in STAGES and rec['stage'] not in done.setdefault(rec['topic'], []):
+                    done[rec['topic']].append(rec['stage'])
+        return done
+
+    def finish(self, topics):
+        """Mark `topics` as done (nothing left to resume) and the run as complete.
+
+        Topics not listed, e.g. ones whose stages failed or that this run did
+        not select, keep their records for a later --resume.
+        """
+        for topic in topics:
+            self.record(topic, DONE)
+        with self._lock:
+            self._write({'run': self.run_id, 'event': 'finish', 'ts': utc_now().isoformat()})
+
+    def close(self):
+        with self._lock:
+            self._file.close()
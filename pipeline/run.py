@@ -1,10 +1,22 @@
+import time
+
+_STARTED = time.perf_counter()  # for the startup-time report
+
 import argparse
+import contextlib
 import yaml
 import logging
 from pathlib import Path
 import sys
 import re
-from datetime import datetime, timezone
+import sqlite3
+import hashlib
+import json
+import functools
+import threading
+import cProfile
+from urllib.parse import urlparse
+from datetime import datetime, timedelta, timezone
 
 # Ensure repository root is on sys.path so imports like `ingestors` work
 # when running this file directly (e.g. `python pipeline/run.py`) under CI runners.
@@ -12,15 +24,36 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from ingestors import rss_ingestor, weather_ingestor, file_ingestor, youtube_ingestor
+from ingestors import article_store, rss_ingestor, weather_ingestor, file_ingestor, youtube_ingestor
 from researcher import summarizer, token_tracker
 from formatter import blog_formatter
-from publisher import blog_publisher, podcast_publisher, podcast_rss
-from tts import gtts_tts
+from publisher import (audio_pool, blog_publisher, episode_manifest, output_writer,
+                       podcast_publisher, podcast_rss, upload_queue)
+from tts import gtts_tts, http_tts
+from pipeline import budget, carry, cassette, history, journal, spans, state, stages
 import os
 
+_IMPORTED = time.perf_counter()
+
 logging.basicConfig(level=logging.INFO)
 
+# Default worker threads per stage: network-bound stages get more threads,
+# the API-quota and CPU/ffmpeg stages stay narrow.
+STAGE_WORKERS = {
+    'ingest': 3,
+    'summarize': 1,
+    'format': 1,
+    'tts': 2,
+    'assemble': 1,
+}
+
+YOUTUBE_HOSTS = ['www.youtube.com', 'youtube.com', 'youtu.be', 'm.youtube.com']
+
+# Slow-to-import backends; the modules using them import them on first use
+HEAVY_MODULES = ('feedparser', 'newspaper', 'requests', 'pydub', 'gtts', 'youtube_transcript_api', 'openai')
+
+_startup_reported = False
+
 
 def utc_now():
     """Get current UTC time as timezone-aware datetime."""
@@ -45,202 +78,694 @@ def sanitize_filename(name):
     return re.sub(r'[<>:"/\\|?*]', '_', name).replace(' ', '_')
 
 
-def main(topics_file, since_hours):
-    topics = load_topics(topics_file)
+def topic_fingerprint(summaries):
+    """Hash a topic's final summaries so unchanged topics can skip rebuilding."""
+    payload = [(s.get('title'), s.get('summary'), s.get('link')) for s in summaries]
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def dedupe_articles(articles, cap):
+    """Naive dedupe by link, newest first, truncated to `cap` articles."""
+    seen = set()
+    unique = []
+    for a in sorted(articles, key=lambda x: x.get('published', ''), reverse=True):
+        if a['link'] in seen:
+            continue
+        seen.add(a['link'])
+        unique.append(a)
+    return unique[:cap]
+
+
+def blog_formats_from_env():
+    """Blog output formats from BLOG_FORMATS (e.g. "jekyll,hugo,json"); jekyll is always included."""
+    formats = ['jekyll']
+    for fmt in os.getenv('BLOG_FORMATS', '').split(','):
+        fmt = fmt.strip().lower()
+        if not fmt or fmt in formats:
+            continue
+        if fmt not in blog_formatter.FORMATS:
+            logging.warning(f"Ignoring unknown blog format '{fmt}' in BLOG_FORMATS")
+            continue
+        formats.append(fmt)
+    return formats
+
+
+def make_job(topic):
+    """Build the per-topic work item that flows through the pipeline stages."""
+    return {
+        'topic': topic,
+        'name': topic.get('name'),
+        'type': topic.get('type', 'rss'),  # default to RSS
+        'article_cap': clamp(topic.get('article_cap', 30), 1, 200),
+        'segments': clamp(topic.get('segments', 15), 1, 30),  # default 15 one-minute segments
+        'articles': [],
+        'summaries': [],
+    }
+
+
+def ingest_stage(ctx, job):
+    """Fetch feeds and manual sources, dedupe, and extract article text."""
+    topic = job['topic']
+    name = job['name']
+    logging.info(f"Processing topic: {name} (type={job['type']}, cap={job['article_cap']}, "
+                 f"segments={job['segments']})")
+    ctx['budget'].start_topic(name, topic.get('budget_seconds'), topic.get('token_budget'))
+
+    # Resumed run: reuse the articles the interrupted run already extracted
+    fetched = ctx['journal'].get(name, 'fetched')
+    if fetched is not None:
+        logging.info(f"Resuming {name}: reusing {len(fetched['articles'])} fetched article(s)")
+        job['articles'] = fetched['articles']
+        job['summaries'] = fetched.get('summaries', [])
+        return job
+
+    # Handle weather topics differently
+    if job['type'] == 'weather':
+        locations = topic.get('locations', [])
+        provider = topic.get('provider', 'open-meteo')
+        try:
+            job['summaries'] = weather_ingestor.fetch_weather(locations, provider)
+        except Exception as e:
+            logging.warning(f"Failed to fetch weather data: {e}")
+        if job['summaries']:
+            ctx['journal'].record(name, 'fetched', articles=[], summaries=job['summaries'])
+        return job
+
+    # Handle RSS-based topics: feed entries go through the article store
+    store = ctx['store']
+    for src in topic.get('sources', []):
+        if store.is_fresh(name, src, ctx['store_max_age']):
+            history.count('feeds.cached')
+            continue
+        try:
+            with spans.span('fetch', topic=name, source=src) as attrs:
+                entries = rss_ingestor.fetch_feed(src, ctx['since_hours'])
+                attrs['entries'] = len(entries)
+            store.add_entries(name, src, entries)
+            history.count('feeds.fetched')
+        except Exception as e:
+            logging.warning(f"Failed to ingest {src}: {e}")
+
+    # Range query over the lookback window (includes entries from earlier runs)
+    articles = store.articles(name, since=utc_now() - timedelta(hours=ctx['since_hours']))
+
+    # Add articles from manual URLs in sources/urls.txt
+    for url in ctx['additional_sources']['urls']:
+        articles.append({
+            'title': f"Article from {url}",
+            'link': url,
+            'published': ''
+        })
+
+    # Add YouTube transcripts from sources/youtube_urls.txt
+    for yt_url in ctx['additional_sources']['youtube_urls']:
+        try:
+            video_id = youtube_ingestor.extract_video_id(yt_url)
+            if video_id:
+                articles.append({
+                    'title': f"YouTube Video {video_id}",
+                    'link': yt_url,
+                    'published': ''
+                })
+        except Exception as e:
+            logging.warning(f"Failed to add YouTube URL {yt_url}: {e}")
+
+    unique = dedupe_articles(articles, job['article_cap'])
+
+    # one article -> one segment (best-effort)
+    for art in unique[:limit_segments(ctx, job, job['segments'])]:
+        link = art['link']
+        level = ctx['budget'].level(name)
+        if level >= budget.FEED_DESCRIPTIONS and art.get('description'):
+            # Near the budget: the feed's description stands in for the full text
+            job['articles'].append(dict(art, text=art['description']))
+            ctx['budget'].degrade(name, 'feed-descriptions')
+            continue
+        if level >= budget.MINIMAL:
+            ctx['budget'].degrade(name, 'skipped-articles')
+            continue
+        try:
+            with spans.span('extract', topic=name, link=link) as attrs:
+                if urlparse(link).netloc in YOUTUBE_HOSTS:
+                    text = youtube_ingestor.fetch_transcript(link)
+                else:
+                    text = rss_ingestor.fetch_article_text(link)
+                attrs['chars'] = len(text or '')
+            job['articles'].append(dict(art, text=text))
+        except Exception as e:
+            logging.warning(f"Failed to fetch {link}: {e}")
+    if job['articles']:
+        ctx['journal'].record(name, 'fetched', articles=job['articles'])
+    return job
+
+
+def limit_segments(ctx, job, count):
+    """How many of `count` segments the topic's budget still allows (recording any cut)."""
+    limit = min(count, ctx['budget'].segment_limit(job['name'], job['segments']))
+    if limit < count:
+        ctx['budget'].degrade(job['name'], 'fewer-segments', f"{count} -> {limit}")
+    return limit
+
+
+def summarize_stage(ctx, job):
+    """Summarize each extracted article into a podcast segment."""
+    name = job['name']
+    # Summaries journaled by an interrupted run are reused, never paid for twice
+    done = {rec['link']: rec for rec in ctx['journal'].items(name, 'summary')}
+    reused = 0
+    for art in job['articles'][:limit_segments(ctx, job, len(job['articles']))]:
+        prev = done.get(art.get('link'))
+        if prev is not None:
+            job['summaries'].append({'title': prev['title'], 'summary': prev['summary'], 'link': prev['link']})
+            reused += 1
+            continue
+        # Near the budget: the local fallback summarizer instead of paid remote APIs
+        local = ctx['budget'].level(name) >= budget.LOCAL_SUMMARIZER
+        try:
+            # ask summarizer for short segment sized for ~1 minute (approx 120-160 words)
+            with spans.span('summarize', topic=name, link=art.get('link'), local=local):
+                s = summarizer.summarize(art['text'], model='google/flan-t5-small', local_only=local)
+            if local:
+                ctx['budget'].degrade(name, 'local-summarizer')
+            else:
+                tracker = token_tracker.get_tracker()
+                ctx['budget'].add_tokens(name, tracker.estimate_tokens(art['text']) + tracker.estimate_tokens(s))
+            summary = {'title': art.get('title'), 'summary': s, 'link': art.get('link')}
+            job['summaries'].append(summary)
+            ctx['journal'].record(name, 'summary', **summary)
+        except Exception as e:
+            logging.warning(f"Failed to summarize {art.get('link')}: {e}")
+    if reused:
+        logging.info(f"Resuming {name}: reused {reused} summary(ies)")
+        history.count('summaries.reused', reused)
+    if job['summaries'] and ctx['journal'].get(name, 'summarized') is None:
+        ctx['journal'].record(name, 'summarized', summaries=len(job['summaries']))
+    return job
+
+
+def format_stage(ctx, job):
+    """Write the blog drafts, or drop the job if its summaries are unchanged."""
+    name = job['name']
+    safe_name = sanitize_filename(name)
+    file_path = ctx['out_dir'] / f"{safe_name}.md"
+    job['safe_name'] = safe_name
+    job['fingerprint'] = topic_fingerprint(job['summaries'])
+    if not ctx['force'] and ctx['fingerprints'].get(name) == job['fingerprint'] and file_path.exists():
+        logging.info(f"Summaries unchanged for {name}; skipping format, TTS, concat and upload")
+        history.count('topics.unchanged')
+        return None
+    history.count('topics.rebuilt')
+
+    # Render every configured format in one pass; jekyll feeds the draft and content/
+    posts = blog_formatter.format_topic_all(name, job['summaries'], ctx['blog_formats'])
+    md = posts['jekyll']
+    if output_writer.write_output(file_path, md):
+        logging.info(f"Wrote draft for {name} -> {file_path}")
+    for fmt, text in posts.items():
+        if fmt != 'jekyll':
+            output_writer.write_output(ctx['out_dir'] / fmt / f"{safe_name}{blog_formatter.EXTENSIONS[fmt]}", text)
+
+    # Write to content directory with date-based filename for Jekyll
+    date_prefix = utc_now().strftime('%Y-%m-%d')
+    jekyll_filename = f"{date_prefix}-{safe_name}.md"
+    blog_publisher.write_markdown_to_content(md, jekyll_filename, topic=name)
+    return job
+
+
+def tts_stage(ctx, job):
+    """Synthesize one MP3 per summary."""
+    podcast_dir = ctx['out_dir'] / 'podcasts' / job['safe_name']
+    podcast_dir.mkdir(parents=True, exist_ok=True)
+    job['podcast_dir'] = podcast_dir
+    job['segment_files'] = []
+    name = job['name']
+    done = {rec['segment']: rec for rec in ctx['journal'].items(name, 'segment')}
+    reused = 0
+    summaries = job['summaries'][:limit_segments(ctx, job, len(job['summaries']))]
+    for idx, s in enumerate(summaries, start=1):
+        seg_text = s.get('summary') or s.get('title')
+        # short-circuit very long text by truncating to ~180 words
+        words = seg_text.split()
+        if len(words) > 180:
+            seg_text = ' '.join(words[:180])
+        mp3_path = str(podcast_dir / f"{idx:02d}.mp3")
+        text_hash = hashlib.sha256(seg_text.encode('utf-8')).hexdigest()
+        prev = done.get(idx)
+        if prev is not None and prev['text_hash'] == text_hash and Path(prev['file']).exists():
+            job['segment_files'].append(prev['file'])
+            reused += 1
+            continue
+        try:
+            with spans.span('tts', topic=name, segment=idx, words=min(len(words), 180)):
+                if http_tts.TTS_HTTP_URL:
+                    http_tts.text_to_speech_http(seg_text, mp3_path)
+                else:
+                    gtts_tts.text_to_speech_gtts(seg_text, mp3_path)
+            job['segment_files'].append(mp3_path)
+            ctx['journal'].record(name, 'segment', segment=idx, file=mp3_path, text_hash=text_hash)
+        except Exception as e:
+            logging.warning(f"TTS failed for segment {idx} of {name}: {e}")
+    if reused:
+        logging.info(f"Resuming {name}: reused {reused} TTS segment(s)")
+        history.count('segments.reused', reused)
+    if job['segment_files']:
+        ctx['journal'].record(name, 'synthesized', segments=len(job['segment_files']))
+    return job
+
+
+def assemble_stage(ctx, job):
+    """Submit episode concatenation to the audio process pool.
+
+    The stage returns as soon as the work is queued; `episode_ready` runs
+    when encoding finishes, so encoding never blocks the next topic.
+    """
+    if not job['segment_files']:
+        logging.warning(f"No podcast segments created for {job['name']}")
+        return None
+
+    built = ctx['journal'].get(job['name'], 'concatenated')
+    if built is not None and Path(built['dated_path']).exists():
+        logging.info(f"Resuming {job['name']}: episode already built ({built['dated_path']})")
+        job['episode_path'] = built['episode_path']
+        _queue_episode(ctx, job, built['dated_path'], built['guid'])
+        return job
+
+    job['concat_submitted'] = time.perf_counter()
+    future = podcast_publisher.submit_concat(job['segment_files'], job['podcast_dir'] / 'episode.mp3')
+    done = threading.Event()
+    with ctx['lock']:
+        ctx['audio_pending'].append(done)
+    future.add_done_callback(functools.partial(episode_ready, ctx, job, done))
+    return job
+
+
+def episode_ready(ctx, job, done, future):
+    """Queue the upload (or record the fingerprint) once an episode is encoded."""
+    try:
+        _publish_episode(ctx, job, future)
+    finally:
+        done.set()
+
+
+def _publish_episode(ctx, job, future):
+    name = job['name']
+    # Encoding runs on another process: the span covers queueing plus encoding
+    elapsed = time.perf_counter() - job['concat_submitted']
+    try:
+        episode_path = future.result()
+    except Exception as e:
+        spans.record('concat', elapsed, status='error', topic=name, segments=len(job['segment_files']))
+        logging.warning(f"Episode assembly failed for {name}: {e}")
+        with ctx['lock']:
+            ctx['failed_topics'].add(name)
+        return
+    spans.record('concat', elapsed, topic=name, segments=len(job['segment_files']))
+    job['episode_path'] = episode_path
+    logging.info(f"Created episode: {episode_path}")
+
+    # Keep a dated copy and record it once in the episode manifest
+    dated_path = episode_manifest.archive_episode(episode_path)
+    record = episode_manifest.record_episode(name, dated_path, ctx['out_dir'] / 'podcasts')
+    ctx['journal'].record(name, 'concatenated', episode_path=str(episode_path), dated_path=str(dated_path),
+                          guid=record['guid'])
+    _queue_episode(ctx, job, dated_path, record['guid'])
+
+
+def _queue_episode(ctx, job, dated_path, guid):
+    """Queue upload to Internet Archive if credentials are available."""
+    name = job['name']
+    uploads = ctx['uploads']
+    uploaded = ctx['journal'].get(name, 'uploaded')
+    if uploads is not None and uploaded is not None and uploaded['guid'] == guid:
+        # Uploaded before the interruption; only the manifest and feed still need updating
+        logging.info(f"Resuming {name}: episode already uploaded")
+        with ctx['lock']:
+            ctx['resumed_uploads'].append(dict(uploaded, fingerprint=job['fingerprint']))
+    elif uploads is not None:
+        ia_metadata = podcast_publisher.generate_ia_metadata(
+            name,
+            description=f"Automated news curation for {name}"
+        )
+        uploads.submit(dated_path, ia_metadata,
+                       extra={'topic_name': name, 'fingerprint': job['fingerprint'],
+                              'guid': guid})
+    else:
+        logging.info(f"Skipping Internet Archive upload for {name} (no credentials)")
+        with ctx['lock']:
+            ctx['fingerprints'][name] = job['fingerprint']
+            state.save_state('fingerprints', ctx['fingerprints'])
+
+
+def archive_url(identifier, file_path):
+    """Public Internet Archive download URL of an uploaded file."""
+    return f"https://archive.org/download/{identifier}/{Path(file_path).name}"
+
+
+def timed_upload(uploader, file_path, metadata, run_journal=None):
+    """Run an upload inside an 'upload' span (and profiler, with --profile).
+
+    Successful uploads of episodes built in this run are journaled.
+    """
+    with spans.span('upload', file=str(file_path), identifier=metadata.get('identifier')):
+        ok = spans.profile_call(uploader, file_path, metadata)
+    built = run_journal.concatenated_for(file_path) if ok and run_journal is not None else None
+    if built is not None:
+        run_journal.record(built['topic'], 'uploaded', guid=built['guid'], file=str(file_path),
+                           audio_url=archive_url(metadata['identifier'], file_path))
+    return ok
+
+
+def timed_stage(name, func, ctx, job):
+    """Run one stage for one job inside a 'stage.<name>' span."""
+    with spans.span(f'stage.{name}', topic=job['name']):
+        return spans.profile_call(func, ctx, job)
+
+
+def write_topic_feed(podcast_dir, topic_name):
+    """Write a topic's podcast.rss from the uploaded episodes in the manifest."""
+    with spans.span('feed', topic=topic_name):
+        _write_topic_feed(podcast_dir, topic_name)
+
+
+def _write_topic_feed(podcast_dir, topic_name):
+    rss_episodes = episode_manifest.feed_episodes(podcast_dir, topic=topic_name, uploaded_only=True)
+    rss_file = podcast_dir / sanitize_filename(topic_name) / 'podcast.rss'
+    podcast_rss.write_podcast_rss(
+        rss_file,
+        title=f"NewsGenerator: {topic_name}",
+        description=f"Automated news curation for {topic_name}",
+        author="NewsGenerator",
+        email="news@example.com",  # TODO: Make this configurable
+        link="https://github.com/vishc0/NewsGenerator",
+        image_url="https://via.placeholder.com/1400x1400.png?text=NewsGenerator",  # TODO: Add real artwork
+        episodes=rss_episodes
+    )
+    logging.info(f"Podcast RSS feed saved to: {rss_file} ({episode_manifest.published_count(rss_episodes)} episodes)")
+
+
+def build_stages(ctx, stage_workers=None, queue_size=2):
+    """Wire the stage functions into an executor with per-stage worker counts."""
+    workers = dict(STAGE_WORKERS, **(stage_workers or {}))
+    funcs = [
+        ('ingest', ingest_stage),
+        ('summarize', summarize_stage),
+        ('format', format_stage),
+        ('tts', tts_stage),
+        ('assemble', assemble_stage),
+    ]
+    return stages.StagedExecutor(
+        [stages.Stage(name, functools.partial(timed_stage, name, func, ctx), workers=workers[name],
+                      queue_size=queue_size)
+         for name, func in funcs],
+        describe=lambda job: job['name']
+    )
+
+
+def parse_stage_workers(spec):
+    """Parse a "stage=N,stage=N" string into a dict of worker counts."""
+    workers = {}
+    for part in filter(None, (p.strip() for p in (spec or '').split(','))):
+        stage, _, count = part.partition('=')
+        if stage not in STAGE_WORKERS or not count.isdigit():
+            raise argparse.ArgumentTypeError(f"Invalid stage worker spec: {part!r}")
+        workers[stage] = int(count)
+    return workers
+
+
+def select_topics(topics, topic_names=None, topic_types=None):
+    """Keep only the topics named in `topic_names` and of a type in `topic_types`.
+
+    Either filter is skipped when None.
+    """
+    if topic_names is not None:
+        wanted = set(topic_names)
+        unknown = wanted - {t.get('name') for t in topics}
+        if unknown:
+            logging.warning(f"Unknown topic(s) ignored: {', '.join(sorted(unknown))}")
+        topics = [t for t in topics if t.get('name') in wanted]
+    if topic_types is not None:
+        types = set(topic_types)
+        topics = [t for t in topics if t.get('type', 'rss') in types]
+    return topics
+
+
+def parse_shard(spec):
+    """Parse "i/n" (1-based shard i of n) into (i, n)."""
+    try:
+        index, count = (int(x) for x in spec.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid shard spec: {spec!r} (expected i/n, e.g. 2/4)")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"Shard index out of range: {spec!r}")
+    return index, count
+
+
+def topic_weight(topic):
+    """Relative cost of a topic for sharding: its (clamped) article_cap."""
+    return clamp(topic.get('article_cap', 30), 1, 200)
+
+
+def assign_shards(topics, count):
+    """Partition topics into `count` shards of roughly equal total weight.
+
+    Topics are placed heaviest first (ties broken by a stable hash of the
+    name) on the currently lightest shard, so the assignment depends only
+    on the set of topics and their caps, never on file order or the
+    process's hash seed.
+
+    Returns:
+        List of `count` topic lists
+    """
+    def order(topic):
+        name_hash = hashlib.sha256(str(topic.get('name')).encode('utf-8')).hexdigest()
+        return -topic_weight(topic), name_hash
+
+    shards = [[] for _ in range(count)]
+    loads = [0] * count
+    for topic in sorted(topics, key=order):
+        target = min(range(count), key=lambda i: (loads[i], i))
+        shards[target].append(topic)
+        loads[target] += topic_weight(topic)
+    return shards
+
+
+def select_shard(topics, shard):
+    """Topics of shard `(index, count)` (1-based index), in their topics.yaml order."""
+    if shard is None:
+        return topics
+    index, count = shard
+    names = {t.get('name') for t in assign_shards(topics, count)[index - 1]}
+    return [t for t in topics if t.get('name') in names]
+
+
+def loaded_backends():
+    """Heavy backends imported so far in this process."""
+    return [m for m in HEAVY_MODULES if m in sys.modules]
+
+
+def report_startup(topics_loaded):
+    """Log and record (as a 'startup' span) the time from process start to the first stage.
+
+    Only the first call in a process reports; the scheduler daemon calls main repeatedly.
+    """
+    global _startup_reported
+    if _startup_reported:
+        return
+    _startup_reported = True
+    now = time.perf_counter()
+    backends = loaded_backends()
+    logging.info(f"Startup: {(now - _STARTED) * 1000:.0f} ms (imports {(_IMPORTED - _STARTED) * 1000:.0f} ms, "
+                 f"topics {(now - topics_loaded) * 1000:.0f} ms); "
+                 f"heavy backends loaded: {', '.join(backends) or 'none'}")
+    spans.record('startup', now - _STARTED, imports_ms=round((_IMPORTED - _STARTED) * 1000, 3),
+                 backends=backends)
+
+
+def main(topics_file, since_hours, force=False, stage_workers=None, queue_size=2, topic_names=None,
+         profile=False, topic_types=None, shard=None, sources_dir='sources', resume=False,
+         deadline_minutes=None):
+    topics_loading = time.perf_counter()
+    topics = select_topics(load_topics(topics_file), topic_names, topic_types)
+    topics = select_shard(topics, shard)
+    if shard is not None:
+        logging.info(f"Shard {shard[0]}/{shard[1]}: {', '.join(t.get('name') for t in topics) or 'no topics'}")
+    if not topics:
+        logging.info("No topics selected; nothing to do")
+        return
+    # Each run reports its own changes and token usage (the scheduler daemon calls main repeatedly)
+    output_writer.reset()
+    token_tracker.reset_tracker()
+    history.reset_counters()
+    started = utc_now()
     out_dir = Path('outbox')
     out_dir.mkdir(exist_ok=True)
-    
+    # Audio of pending uploads and resumable work, if the workspace only kept outbox/state
+    carry.restore()
+
+    # Timing spans go to outbox/spans.jsonl; --profile adds cProfile dumps
+    spans.start_run(out_dir / 'spans.jsonl', profile=profile)
+    report_startup(topics_loading)
+    profiler = cProfile.Profile() if profile else None
+    if profiler is not None:
+        profiler.enable()
+    status = 'error'
+    try:
+        with spans.span('run', topics=len(topics)):
+            run_topics(topics, out_dir, since_hours, force, stage_workers, queue_size, sources_dir, resume,
+                       deadline_minutes)
+        status = 'ok'
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            spans.add_profile(profiler)
+        logging.info(f"Heavy backends loaded by the end of the run: {', '.join(loaded_backends()) or 'none'}")
+        report = spans.format_breakdown()
+        logging.info("\n" + report)
+        (out_dir / 'span_report.txt').write_text(report + '\n', encoding='utf-8')
+        if profile:
+            spans.save_profile(out_dir / 'profile.pstats')
+        records = spans.end_run()
+        try:
+            carry.save(max_age_hours=float(os.getenv('RUN_JOURNAL_MAX_AGE_HOURS', '12')))
+        except OSError as e:
+            logging.warning(f"Could not keep audio for pending uploads and resumable work: {e}")
+        # Metrics history for trend reports (pipeline/history.py); never fails the run
+        try:
+            history.save_run(history.collect(records, history.counters(), token_tracker.get_tracker().to_dict(),
+                                             output_writer.changed_outputs(),
+                                             topics=[t.get('name') for t in topics]),
+                             status, started, out_dir)
+        except (OSError, sqlite3.Error) as e:
+            logging.warning(f"Could not record run history: {e}")
+
+
+def run_topics(topics, out_dir, since_hours, force=False, stage_workers=None, queue_size=2,
+               sources_dir='sources', resume=False, deadline_minutes=None):
+    """Run the selected topics through the pipeline and publish the results.
+
+    With `resume`, an unfinished run journal is continued: work it recorded
+    (fetched articles, summaries, TTS segments, episodes, uploads) is reused.
+    With `deadline_minutes` (and per-topic budgets), topics degrade step by
+    step to finish in time; see pipeline/budget.py.
+    """
+    run_budget = budget.RunBudget(deadline_minutes,
+                                  topic_seconds=float(os.getenv('TOPIC_BUDGET_SECONDS', '0')) or None,
+                                  topic_tokens=int(os.getenv('TOPIC_TOKEN_BUDGET', '0')) or None)
+    names = [t.get('name') for t in topics]
+    run_journal = journal.RunJournal(resume=resume, topics=names,
+                                     max_age_hours=float(os.getenv('RUN_JOURNAL_MAX_AGE_HOURS', '12')))
+    if run_journal.resumed:
+        done = {topic: stages_done for topic, stages_done in run_journal.completed().items() if topic in names}
+        logging.info("Resuming unfinished work: " + ('; '.join(
+            f"{topic}: {', '.join(stages_done)}" for topic, stages_done in done.items()) or 'none for these topics'))
+
     # Check for Internet Archive credentials
     ia_access_key = os.getenv('INTERNET_ARCHIVE_ACCESS_KEY')
     ia_secret = os.getenv('INTERNET_ARCHIVE_SECRET')
     enable_ia_upload = bool(ia_access_key and ia_secret)
     
+    uploads = None
     if enable_ia_upload:
         logging.info("Internet Archive credentials found - uploads will be enabled")
+        # Uploads run on background threads so the next topic is not blocked
+        uploader = functools.partial(
+            podcast_publisher.upload_to_internet_archive,
+            access_key=ia_access_key,
+            secret=ia_secret
+        )
+        uploads = upload_queue.UploadQueue(
+            functools.partial(timed_upload, uploader, run_journal=run_journal),
+            workers=int(os.getenv('UPLOAD_WORKERS', '2'))
+        ).start()
     else:
         logging.info("Internet Archive credentials not found - running in dry-run mode")
     
     # Scan sources directory for additional inputs
-    additional_sources = file_ingestor.scan_sources_directory('sources')
+    additional_sources = file_ingestor.scan_sources_directory(sources_dir)
     logging.info(f"Found {len(additional_sources['urls'])} URLs, "
                 f"{len(additional_sources['youtube_urls'])} YouTube URLs in sources/")
     
-    # Track all episodes for RSS feed generation
-    all_episodes = []
-
-    for topic in topics:
-        name = topic.get('name')
-        topic_type = topic.get('type', 'rss')  # default to RSS
-        article_cap = clamp(topic.get('article_cap', 30), 1, 200)
-        segments = clamp(topic.get('segments', 15), 1, 30)  # default 15 one-minute segments
-        logging.info(f"Processing topic: {name} (type={topic_type}, cap={article_cap}, segments={segments})")
-
-        summaries = []
-        
-        # Handle weather topics differently
-        if topic_type == 'weather':
-            locations = topic.get('locations', [])
-            provider = topic.get('provider', 'open-meteo')
-            try:
-                summaries = weather_ingestor.fetch_weather(locations, provider)
-            except Exception as e:
-                logging.warning(f"Failed to fetch weather data: {e}")
-        else:
-            # Handle RSS-based topics
-            sources = topic.get('sources', [])
-            articles = []
-            
-            # Fetch from RSS feeds
-            for src in sources:
-                try:
-                    entries = rss_ingestor.fetch_feed(src, since_hours)
-                    articles.extend(entries)
-                except Exception as e:
-                    logging.warning(f"Failed to ingest {src}: {e}")
-            
-            # Add articles from manual URLs in sources/urls.txt
-            for url in additional_sources['urls']:
-                try:
-                    articles.append({
-                        'title': f"Article from {url}",
-                        'link': url,
-                        'published': ''
-                    })
-                except Exception as e:
-                    logging.warning(f"Failed to add URL {url}: {e}")
-            
-            # Add YouTube transcripts from sources/youtube_urls.txt
-            for yt_url in additional_sources['youtube_urls']:
-                try:
-                    video_id = youtube_ingestor.extract_video_id(yt_url)
-                    if video_id:
-                        articles.append({
-                            'title': f"YouTube Video {video_id}",
-                            'link': yt_url,
-                            'published': ''
-                        })
-                except Exception as e:
-                    logging.warning(f"Failed to add YouTube URL {yt_url}: {e}")
-
-            # naive dedupe by link and keep newest
-            seen = set()
-            unique = []
-            for a in sorted(articles, key=lambda x: x.get('published', ''), reverse=True):
-                if a['link'] in seen:
-                    continue
-                seen.add(a['link'])
-                unique.append(a)
-
-            unique = unique[:article_cap]
-
-            # prepare per-segment summaries: one article -> one segment (best-effort)
-            for art in unique[:segments]:
-                try:
-                    link = art['link']
-                    
-                    # Check if it's a YouTube URL using proper URL parsing
-                    from urllib.parse import urlparse
-                    parsed_url = urlparse(link)
-                    is_youtube = parsed_url.netloc in ['www.youtube.com', 'youtube.com', 'youtu.be', 'm.youtube.com']
-                    
-                    if is_youtube:
-                        text = youtube_ingestor.fetch_transcript(link)
-                    else:
-                        text = rss_ingestor.fetch_article_text(link)
-                    
-                    # ask summarizer for short segment sized for ~1 minute (approx 120-160 words)
-                    s = summarizer.summarize(text, model='google/flan-t5-small')
-                    summaries.append({'title': art.get('title'), 'summary': s, 'link': art.get('link')})
-                except Exception as e:
-                    logging.warning(f"Failed to summarize {art.get('link')}: {e}")
-
-        # write blog draft
-        md = blog_formatter.format_topic(name, summaries, format_type='jekyll')
-        safe_name = sanitize_filename(name)
-        file_path = out_dir / f"{safe_name}.md"
-        file_path.write_text(md, encoding='utf-8')
-        logging.info(f"Wrote draft for {name} -> {file_path}")
-        
-        # Write to content directory with date-based filename for Jekyll
-        date_prefix = utc_now().strftime('%Y-%m-%d')
-        jekyll_filename = f"{date_prefix}-{safe_name}.md"
-        blog_publisher.write_markdown_to_content(md, jekyll_filename)
-
-        # TTS and podcast assembly
-        podcast_dir = out_dir / 'podcasts' / safe_name
-        podcast_dir.mkdir(parents=True, exist_ok=True)
-        segment_files = []
-        for idx, s in enumerate(summaries, start=1):
-            seg_text = s.get('summary') or s.get('title')
-            # short-circuit very long text by truncating to ~180 words
-            words = seg_text.split()
-            if len(words) > 180:
-                seg_text = ' '.join(words[:180])
-            mp3_path = str(podcast_dir / f"{idx:02d}.mp3")
-            try:
-                gtts_tts.text_to_speech_gtts(seg_text, mp3_path)
-                segment_files.append(mp3_path)
-            except Exception as e:
-                logging.warning(f"TTS failed for segment {idx} of {name}: {e}")
-
-        if segment_files:
-            episode_path = podcast_publisher.concat_segments(segment_files, podcast_dir / 'episode.mp3')
-            logging.info(f"Created episode: {episode_path}")
-            
-            # Upload to Internet Archive if credentials are available
-            if enable_ia_upload:
-                ia_metadata = podcast_publisher.generate_ia_metadata(
-                    name,
-                    description=f"Automated news curation for {name}"
-                )
-                success = podcast_publisher.upload_to_internet_archive(
-                    episode_path,
-                    ia_metadata,
-                    access_key=ia_access_key,
-                    secret=ia_secret,
-                    dry_run=not enable_ia_upload
+    # Topics whose feeds need regenerating after uploads finish
+    podcast_dir = out_dir / 'podcasts'
+    updated_topics = set()
+
+    # Fingerprints of each topic's summaries from the last completed build
+    fingerprints = state.load_state('fingerprints')
+
+    ctx = {
+        'out_dir': out_dir,
+        'since_hours': since_hours,
+        'force': force,
+        'additional_sources': additional_sources,
+        'fingerprints': fingerprints,
+        'uploads': uploads,
+        'audio_pending': [],
+        'journal': run_journal,
+        'budget': run_budget,
+        'resumed_uploads': [],
+        # Topics whose stages or episode assembly failed stay resumable in the journal
+        'failed_topics': set(),
+        'lock': threading.Lock(),
+        'blog_formats': blog_formats_from_env(),
+        'store': article_store.ArticleStore(),
+        # Minutes a topic's feed stays fresh in the store (0 = always refetch)
+        'store_max_age': int(os.getenv('ARTICLE_STORE_MAX_AGE', '0')),
+    }
+    # Topics overlap: one topic's audio is assembled while the next is fetched
+    executor = build_stages(ctx, stage_workers, queue_size)
+    executor.run(make_job(t) for t in topics)
+    ctx['failed_topics'].update(err['item'] for err in executor.errors)
+
+    # Collect the episodes still encoding on the audio process pool
+    with spans.span('wait.audio', episodes=len(ctx['audio_pending'])):
+        for done in ctx['audio_pending']:
+            done.wait()
+        audio_pool.shutdown()
+    ctx['store'].prune(int(os.getenv('ARTICLE_STORE_DAYS', '30')))
+    ctx['store'].close()
+
+    # Wait for background uploads; only uploaded episodes go into the feeds
+    protected = set()
+    if uploads is not None:
+        # Past the deadline, failed uploads are not retried (they stay pending for the next run)
+        remaining = run_budget.remaining()
+        cutoff = threading.Timer(max(0.0, remaining), uploads.stop_retrying) if remaining is not None else None
+        if cutoff is not None:
+            cutoff.start()
+        with spans.span('wait.uploads'):
+            report = uploads.flush()
+        if cutoff is not None:
+            cutoff.cancel()
+        for item in report['completed']:
+            topic_name = item['extra'].get('topic_name')
+            identifier = item['metadata']['identifier']
+            if item['extra'].get('guid'):
+                episode_manifest.update_episode(
+                    item['extra']['guid'], podcast_dir,
+                    audio_url=archive_url(identifier, item['file_path']),
+                    uploaded=utc_now().isoformat()
                 )
-                
-                if success and enable_ia_upload:
-                    # Track episode for RSS feed
-                    episode_url = f"https://archive.org/download/{ia_metadata['identifier']}/episode.mp3"
-                    all_episodes.append({
-                        'topic_name': name,
-                        'audio_url': episode_url,
-                        'ia_identifier': ia_metadata['identifier'],
-                        'metadata': ia_metadata
-                    })
-            else:
-                logging.info(f"Skipping Internet Archive upload for {name} (no credentials)")
-        else:
-            logging.warning(f"No podcast segments created for {name}")
-    
-    # Generate podcast RSS feed if we have episodes
-    if all_episodes and enable_ia_upload:
-        logging.info(f"Generating podcast RSS feed with {len(all_episodes)} episodes")
-        
-        # Create RSS feed for each topic's episodes
-        for ep in all_episodes:
-            topic_name = ep['topic_name']
-            rss_episodes = [podcast_rss.generate_episode_metadata(
-                topic_name,
-                f"outbox/podcasts/{sanitize_filename(topic_name)}/episode.mp3",
-                ep['audio_url'].rsplit('/', 1)[0]  # Base URL
-            )]
-            
-            rss_content = podcast_rss.create_podcast_rss(
-                title=f"NewsGenerator: {topic_name}",
-                description=f"Automated news curation for {topic_name}",
-                author="NewsGenerator",
-                email="news@example.com",  # TODO: Make this configurable
-                link="https://github.com/vishc0/NewsGenerator",
-                image_url="https://via.placeholder.com/1400x1400.png?text=NewsGenerator",  # TODO: Add real artwork
-                episodes=rss_episodes
-            )
-            
-            rss_file = out_dir / 'podcasts' / sanitize_filename(topic_name) / 'podcast.rss'
-            podcast_rss.save_podcast_rss(rss_content, rss_file)
-            logging.info(f"Podcast RSS feed saved to: {rss_file}")
+                updated_topics.add(topic_name)
+            if item['extra'].get('fingerprint'):
+                fingerprints[topic_name] = item['extra']['fingerprint']
+        # Uploads journaled by the interrupted run whose results were never applied
+        for uploaded in ctx['resumed_uploads']:
+            episode_manifest.update_episode(uploaded['guid'], podcast_dir, audio_url=uploaded['audio_url'],
+                                            uploaded=utc_now().isoformat())
+            updated_topics.add(uploaded['topic'])
+            fingerprints[uploaded['topic']] = uploaded['fingerprint']
+        state.save_state('fingerprints', fingerprints)
+        protected = {item['file_path'] for item in report['failed'] + report['pending']}
+
+    # Regenerate feeds of topics with newly uploaded episodes from the manifest
+    if updated_topics:
+        logging.info(f"Generating podcast RSS feeds for {len(updated_topics)} topic(s)")
+        for topic_name in sorted(updated_topics):
+            write_topic_feed(podcast_dir, topic_name)
+
+    # Drop old local episode files; manifest history (and uploaded URLs) is kept
+    episode_manifest.apply_retention(int(os.getenv('EPISODE_RETENTION', '14')), podcast_dir,
+                                     protect=protected)
     
     # Log token usage report at the end
     token_tracker.get_tracker().log_report()
@@ -248,12 +773,69 @@ def main(topics_file, since_hours):
     # Save token usage report to file
     tracker_file = out_dir / 'token_usage_report.txt'
     token_tracker.get_tracker().save_report(tracker_file)
+    token_tracker.get_tracker().save_json(out_dir / 'token_usage.json')
     logging.info(f"Token usage report saved to: {tracker_file}")
 
+    # What was cut to stay within the deadline and budgets
+    degraded = run_budget.save_report(out_dir / 'degradation_report.json')
+    history.count('topics.degraded', len(degraded['topics']))
+
+    # List the outputs this run actually changed, for delta uploads/deploys
+    changed = output_writer.save_changes()
+    logging.info(f"{len(changed)} output file(s) changed this run")
+
+    # Completed topics have nothing left to resume; failed ones keep their journaled work
+    run_journal.finish([name for name in names if name not in ctx['failed_topics']])
+    run_journal.close()
+
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--topics', default='topics.yaml')
     parser.add_argument('--since', type=int, default=48)
+    parser.add_argument('--force', action='store_true',
+                        help='Rebuild every topic even if its summaries are unchanged')
+    parser.add_argument('--stage-workers', type=parse_stage_workers, default={},
+                        help='Per-stage worker threads, e.g. "ingest=4,tts=3"')
+    parser.add_argument('--queue-size', type=int, default=2,
+                        help='Capacity of the queue in front of each stage (backpressure)')
+    parser.add_argument('--topic', action='append', dest='topic_names',
+                        help='Only run this topic (repeat for several)')
+    parser.add_argument('--type', action='append', dest='topic_types',
+                        help='Only run topics of this type, e.g. "weather" or "rss" (repeat for several)')
+    parser.add_argument('--shard', type=parse_shard,
+                        help='Only run shard i of n (e.g. 2/4); see pipeline/shards.py to merge shard outputs')
+    parser.add_argument('--output-root',
+                        help='Write outbox/ and content/ under this directory instead of the current one')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted run from outbox/state/run_journal.jsonl')
+    parser.add_argument('--deadline-minutes', type=float,
+                        default=float(os.getenv('RUN_DEADLINE_MINUTES', '0')) or None,
+                        help='Degrade topics as needed to finish within this many minutes (env RUN_DEADLINE_MINUTES)')
+    parser.add_argument('--record', metavar='CASSETTE',
+                        help='Record every HTTP exchange of the run to this cassette (see pipeline/cassette.py)')
+    parser.add_argument('--replay', metavar='CASSETTE',
+                        help='Serve HTTP from a recorded cassette instead of the network')
+    parser.add_argument('--replay-timing', choices=cassette.TIMINGS, default='original',
+                        help='Replay with the recorded latency of each exchange, or with none')
+    parser.add_argument('--profile', action='store_true',
+                        help='Write cProfile stats to outbox/profile.pstats (+ profile.txt)')
     args = parser.parse_args()
-    main(args.topics, args.since)
+    topics_file, sources_dir = Path(args.topics).resolve(), Path('sources').resolve()
+    if args.record:
+        network = cassette.recording(Path(args.record).resolve(),
+                                     cassette.capture_inputs(topics_file, sources_dir, args.since))
+    elif args.replay:
+        network = cassette.replaying(Path(args.replay).resolve(), args.replay_timing)
+    else:
+        network = contextlib.nullcontext()
+    if args.output_root:
+        # All outputs and state are relative to the working directory
+        Path(args.output_root).mkdir(parents=True, exist_ok=True)
+        os.chdir(args.output_root)
+    with network:
+        main(topics_file, args.since, force=args.force,
+             stage_workers=args.stage_workers, queue_size=args.queue_size,
+             topic_names=args.topic_names, profile=args.profile, topic_types=args.topic_types,
+             shard=args.shard, sources_dir=sources_dir, resume=args.resume,
+             deadline_minutes=args.deadline_minutes)
@@ -0,0 +1,192 @@
+"""Cadence-aware scheduler: run each topic `cadence_per_day` times a day.
+
+The day (UTC) is split into slots of `24h / cadence_per_day`, starting at
+midnight. Each topic's last run slot is kept in `outbox/state/schedule.json`
+and a topic is due once the current slot is later than that, so a cron tick
+that starts late still runs the topic in its slot without pushing the next
+one back. A small slack lets a slightly early tick count for the coming
+slot. Only due topics are passed to `pipeline/run.py`.
+
+Usage:
+    python pipeline/scheduler.py run-due          # one shot (e.g. hourly cron)
+    python pipeline/scheduler.py daemon           # long-running loop
+    python pipeline/scheduler.py status           # show when each topic is due
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Allow `python pipeline/scheduler.py` to import sibling packages
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from pipeline import journal, run, state
+
+STATE_NAME = 'schedule'
+DEFAULT_CADENCE = 4  # matches the historical every-6-hours workflow
+
+
+def utc_now():
+    """Get current UTC time as timezone-aware datetime."""
+    return datetime.now(timezone.utc)
+
+
+def interval(topic):
+    """Time between runs of a topic, from its cadence_per_day."""
+    cadence = topic.get('cadence_per_day') or DEFAULT_CADENCE
+    return timedelta(days=1) / max(1, int(cadence))
+
+
+def _slack(topic, slack_minutes):
+    # Never more than a tenth of the interval, so hourly topics stay hourly
+    return min(timedelta(minutes=slack_minutes), interval(topic) / 10)
+
+
+def slot_start(topic, when):
+    """Start of the topic's slot containing `when` (slots restart each UTC midnight)."""
+    midnight = when.replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight + interval(topic) * ((when - midnight) // interval(topic))
+
+
+def next_slot(topic, start):
+    """Start of the slot after the one beginning at `start`."""
+    midnight = start.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    return min(start + interval(topic), midnight)
+
+
+def next_run(topic, last_runs):
+    """When `topic` is next due (None if it has never run, i.e. due now)."""
+    last = last_runs.get(topic.get('name'))
+    if last is None:
+        return None
+    return next_slot(topic, slot_start(topic, datetime.fromisoformat(last)))
+
+
+def due_topics(topics, last_runs, now=None, slack_minutes=10):
+    """Topics whose next slot has started (or starts within `slack_minutes`)."""
+    now = now or utc_now()
+    due = []
+    for topic in topics:
+        nxt = next_run(topic, last_runs)
+        if nxt is None or nxt - _slack(topic, slack_minutes) <= now:
+            due.append(topic)
+    return due
+
+
+def run_due(topics_file, since_hours=48, force=False, dry_run=False, now=None, slack_minutes=10, resume=False,
+            deadline_minutes=None):
+    """Run every due topic once and record the slot it ran for.
+
+    Topics are marked as run when their run starts, so a topic that fails
+    waits for its next slot instead of being retried immediately. With
+    `resume`, topics left unfinished in the run journal (e.g. by a crashed
+    run) are run as well, reusing their journaled work.
+
+    Returns:
+        Names of the topics that were due or resumed
+    """
+    now = now or utc_now()
+    topics = run.load_topics(topics_file)
+    last_runs = state.load_state(STATE_NAME)
+    names = [t.get('name') for t in due_topics(topics, last_runs, now, slack_minutes)]
+    resumable = []
+    if resume:
+        known = {t.get('name') for t in topics}
+        resumable = [name for name in journal.pending_topics(
+            max_age_hours=float(os.getenv('RUN_JOURNAL_MAX_AGE_HOURS', '12'))) if name in known and name not in names]
+        if resumable:
+            logging.info(f"Unfinished topics to resume: {', '.join(resumable)}")
+    if not names and not resumable:
+        logging.info("No topics due")
+        return names
+    logging.info(f"Due topics: {', '.join(names) or 'none'}")
+    if dry_run:
+        return names + resumable
+
+    by_name = {t.get('name'): t for t in topics}
+    for name in names:
+        # The slot (not the start time), so a late start does not delay the next slot
+        topic = by_name[name]
+        last_runs[name] = slot_start(topic, now + _slack(topic, slack_minutes)).isoformat()
+    state.save_state(STATE_NAME, last_runs)
+    run.main(topics_file, since_hours, force=force, topic_names=names + resumable, resume=resume,
+             deadline_minutes=deadline_minutes)
+    return names + resumable
+
+
+def seconds_until_next(topics_file, now=None, slack_minutes=10):
+    """Seconds until the earliest topic becomes due (0 if one is due now)."""
+    now = now or utc_now()
+    topics = run.load_topics(topics_file)
+    last_runs = state.load_state(STATE_NAME)
+    waits = []
+    for topic in topics:
+        nxt = next_run(topic, last_runs)
+        if nxt is None:
+            return 0
+        waits.append((nxt - _slack(topic, slack_minutes) - now).total_seconds())
+    return max(0, min(waits)) if waits else None
+
+
+def daemon(topics_file, since_hours=48, poll_seconds=300, slack_minutes=10):
+    """Run due topics forever, sleeping until the next one is due.
+
+    `topics.yaml` is re-read every cycle, so edits take effect without a
+    restart. Sleeps are capped at `poll_seconds`.
+    """
+    logging.info(f"Scheduler daemon started for {topics_file}")
+    while True:
+        try:
+            run_due(topics_file, since_hours, slack_minutes=slack_minutes)
+        except Exception as e:
+            logging.error(f"Scheduled run failed: {e}")
+        wait = seconds_until_next(topics_file, slack_minutes=slack_minutes)
+        wait = poll_seconds if wait is None else min(max(wait, 1), poll_seconds)
+        logging.info(f"Next scheduler check in {int(wait)}s")
+        time.sleep(wait)
+
+
+def status(topics_file, now=None):
+    """Print each topic's cadence, last run and next due time."""
+    now = now or utc_now()
+    last_runs = state.load_state(STATE_NAME)
+    for topic in run.load_topics(topics_file):
+        name = topic.get('name')
+        nxt = next_run(topic, last_runs)
+        due = 'due now' if nxt is None or nxt <= now else f"due {nxt.strftime('%Y-%m-%d %H:%M UTC')}"
+        print(f"{name}: every {interval(topic)}, last run {last_runs.get(name, 'never')}, {due}")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Run topics according to their cadence_per_day')
+    parser.add_argument('command', choices=['run-due', 'daemon', 'status'])
+    parser.add_argument('--topics', default='topics.yaml')
+    parser.add_argument('--since', type=int, default=48)
+    parser.add_argument('--force', action='store_true',
+                        help='Rebuild due topics even if their summaries are unchanged')
+    parser.add_argument('--dry-run', action='store_true', help='Only list the due topics')
+    parser.add_argument('--resume', action='store_true',
+                        help='Reuse the work of an interrupted run (see pipeline/journal.py)')
+    parser.add_argument('--deadline-minutes', type=float,
+                        default=float(os.getenv('RUN_DEADLINE_MINUTES', '0')) or None,
+                        help='Degrade topics as needed to finish within this many minutes (see pipeline/budget.py)')
+    parser.add_argument('--poll', type=int, default=int(os.getenv('SCHEDULER_POLL_SECONDS', '300')),
+                        help='Longest daemon sleep between checks, in seconds')
+    parser.add_argument('--slack', type=int, default=int(os.getenv('SCHEDULER_SLACK_MINUTES', '10')),
+                        help='Run a topic up to this many minutes early')
+    args = parser.parse_args()
+
+    if args.command == 'run-due':
+        run_due(args.topics, args.since, force=args.force, dry_run=args.dry_run, slack_minutes=args.slack,
+                resume=args.resume, deadline_minutes=args.deadline_minutes)
+    elif args.command == 'daemon':
+        daemon(args.topics, args.since, poll_seconds=args.poll, slack_minutes=args.slack)
+    else:
+        status(args.topics)
@@ -0,0 +1,320 @@
+"""Run topics as parallel shards and merge the shard outputs.
+
+`pipeline/run.py --shard i/n` runs only the topics assigned to shard i
+(see `run.assign_shards`: weighted by article_cap, independent of file
+order). Each shard writes its own outbox/ and content/ tree, either in a
+separate CI matrix job or under `--output-root`. `merge` combines those
+trees into one:
+
+- posts, drafts, audio and per-topic feeds are copied (unchanged files are
+  left alone);
+- the episode and posts manifests are merged line by line;
+- token usage, spans, degradation reports and changed-output lists are
+  combined, and the combined run is added to the run history;
+- JSON state takes from each shard only the entries it changed relative
+  to the state the shards were seeded with;
+- the combined podcast feed and the blog index are rebuilt, and episode
+  retention is applied once over the merged manifest.
+
+Usage:
+    python pipeline/shards.py plan --shards 4          # show the assignment
+    python pipeline/shards.py run --shards 4           # run shards in parallel, then merge
+    python pipeline/shards.py merge shard-1 shard-2 --into .
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+# Allow `python pipeline/shards.py` to import sibling packages
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from pipeline import history, run, spans, state
+from publisher import blog_index, episode_manifest, generate_rss, output_writer
+from researcher import token_tracker
+
+# Append-only JSON-lines manifests, merged line by line
+LINE_LOGS = {
+    Path('outbox') / 'podcasts' / episode_manifest.MANIFEST_NAME,
+    Path('content') / blog_index.MANIFEST_NAME,
+}
+STATE_DIR = Path('outbox') / 'state'
+# Outputs rebuilt by the merge, or which only describe one shard's process
+REBUILT = {
+    Path('outbox') / 'token_usage.json',
+    Path('outbox') / 'token_usage_report.txt',
+    Path('outbox') / 'degradation_report.json',
+    Path('outbox') / 'run_metrics.json',
+    Path('outbox') / 'spans.jsonl',
+    Path('outbox') / 'span_report.txt',
+    Path('outbox') / 'profile.pstats',
+    Path('outbox') / 'profile.txt',
+    Path('content') / blog_index.STATE_NAME,
+}
+
+
+def _is_index_page(rel):
+    """Blog index pages under content/ (rebuilt from the merged manifest)."""
+    if rel.parts[0] != 'content':
+        return False
+    return rel.name.startswith('index') or (len(rel.parts) > 2 and rel.parts[1] in ('topics', 'months'))
+
+
+def plan(topics, count):
+    """Shard assignment as a list of (topic names, total weight)."""
+    return [([t.get('name') for t in shard], sum(run.topic_weight(t) for t in shard))
+            for shard in run.assign_shards(topics, count)]
+
+
+def seed_shard(root, shard_root):
+    """Give a shard root the manifests and state of `root`, so feeds keep their history."""
+    for rel in LINE_LOGS:
+        if (Path(root) / rel).exists():
+            (Path(shard_root) / rel).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(Path(root) / rel, Path(shard_root) / rel)
+    src_state = Path(root) / STATE_DIR
+    if src_state.exists():
+        (Path(shard_root) / STATE_DIR).mkdir(parents=True, exist_ok=True)
+        for path in src_state.glob('*.json'):
+            if path.stem != 'changed_outputs':
+                shutil.copy2(path, Path(shard_root) / STATE_DIR / path.name)
+
+
+def run_parallel(topics_file, count, shards_dir='shards', since_hours=48, force=False, extra_args=()):
+    """Run every shard as its own `run.py` process under `shards_dir/<i>` and wait for all.
+
+    Returns:
+        List of (shard root, exit code)
+    """
+    procs = []
+    for index in range(1, count + 1):
+        shard_root = Path(shards_dir) / str(index)
+        if shard_root.exists():
+            shutil.rmtree(shard_root)
+        shard_root.mkdir(parents=True)
+        seed_shard('.', shard_root)
+        cmd = [sys.executable, str(ROOT / 'pipeline' / 'run.py'), '--topics', str(Path(topics_file).resolve()),
+               '--since', str(since_hours), '--shard', f'{index}/{count}', '--output-root', str(shard_root)]
+        if force:
+            cmd.append('--force')
+        cmd.extend(extra_args)
+        log = open(shard_root / 'run.log', 'w', encoding='utf-8')
+        procs.append((shard_root, subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT), log))
+        logging.info(f"Started shard {index}/{count} (log: {shard_root / 'run.log'})")
+    results = []
+    for shard_root, proc, log in procs:
+        code = proc.wait()
+        log.close()
+        if code != 0:
+            logging.error(f"Shard {shard_root} exited with status {code}")
+        results.append((shard_root, code))
+    return results
+
+
+def _merge_lines(target, sources):
+    """Append lines of `sources` missing from `target` (exact-line dedupe, order kept)."""
+    seen, lines = set(), []
+    for path in [target] + list(sources):
+        if not path.exists():
+            continue
+        for line in path.read_text(encoding='utf-8').splitlines():
+            if line.strip() and line not in seen:
+                seen.add(line)
+                lines.append(line)
+    if lines:
+        output_writer.write_output(target, '\n'.join(lines) + '\n')
+
+
+def _merge_dict(base, shards):
+    """Apply each shard's changes relative to `base` (the state it was seeded with)."""
+    merged = dict(base)
+    for data in shards:
+        for key, value in data.items():
+            if base.get(key) != value:
+                merged[key] = value
+        for key in base.keys() - data.keys():
+            merged.pop(key, None)
+    return merged
+
+
+def _merge_items(base, shards):
+    """Merge lists of items with an `id` (e.g. upload_queue.json) relative to `base`.
+
+    Items a shard added or changed are kept; base items a shard no longer
+    has (e.g. uploads it completed) are dropped.
+    """
+    base_by_id = {item['id']: item for item in base}
+    merged = dict(base_by_id)
+    for data in shards:
+        by_id = {item['id']: item for item in data}
+        for item_id, item in by_id.items():
+            if base_by_id.get(item_id) != item:
+                merged[item_id] = item
+        for item_id in base_by_id.keys() - by_id.keys():
+            merged.pop(item_id, None)
+    return list(merged.values())
+
+
+def _merge_state(target_dir, shard_roots):
+    """Merge the JSON state files of all shards into `target_dir`.
+
+    Every shard starts from a full copy of the state, so only what a shard
+    changed relative to the state in `target_dir` is taken from it; a
+    shard's untouched (stale) copy of another shard's entries is ignored.
+
+    Raises:
+        ValueError: for a state file whose format cannot be merged
+    """
+    names = {p.stem for root in shard_roots for p in (Path(root) / STATE_DIR).glob('*.json')}
+    changed = []
+    for name in sorted(names):
+        if name == 'changed_outputs':
+            for root in shard_roots:
+                path = state.state_path(name, Path(root) / STATE_DIR)
+                if path.exists():
+                    changed.extend(json.loads(path.read_text(encoding='utf-8')).get('changed', []))
+            continue
+        base = state.load_state(name, state_dir=target_dir)
+        shards = [state.load_state(name, default=type(base)(), state_dir=Path(root) / STATE_DIR)
+                  for root in shard_roots if state.state_path(name, Path(root) / STATE_DIR).exists()]
+        if isinstance(base, dict) and all(isinstance(data, dict) for data in shards):
+            merged = _merge_dict(base, shards)
+        elif (not base or isinstance(base, list)) and all(
+                isinstance(data, list) and all(isinstance(item, dict) and 'id' in item for item in data)
+                for data in shards):
+            merged = _merge_items(base or [], shards)
+        else:
+            raise ValueError(f"Cannot merge shard state {name}.json: expected a JSON object or a list of items "
+                             f"with an 'id'")
+        state.save_state(name, merged, state_dir=target_dir)
+    return changed
+
+
+def merge_shards(shard_roots, into='.', base_url=None):
+    """Merge shard output trees into `into`.
+
+    Args:
+        shard_roots: Directories each holding a shard's outbox/ and content/
+        into: Directory receiving the merged outbox/ and content/
+        base_url: Base URL for episode enclosures in the combined feed
+
+    Returns:
+        Dict with 'copied', 'conflicts' and 'topics' counts
+    """
+    into = Path(into)
+    shard_roots = [Path(r) for r in shard_roots]
+    output_writer.reset()
+    copied, conflicts, owners = 0, 0, {}
+
+    for root in shard_roots:
+        for top in ('outbox', 'content'):
+            for path in sorted((root / top).rglob('*')):
+                rel = path.relative_to(root)
+                if (not path.is_file() or rel in LINE_LOGS or rel in REBUILT or _is_index_page(rel)
+                        or STATE_DIR in rel.parents or path.name.endswith('.tmp')):
+                    continue
+                if rel in owners and owners[rel] != root:
+                    conflicts += 1
+                    logging.warning(f"{rel} written by both {owners[rel]} and {root}; keeping {root}")
+                owners[rel] = root
+                if output_writer.write_output(into / rel, path.read_bytes()):
+                    shutil.copystat(path, into / rel)
+                    copied += 1
+
+    for rel in LINE_LOGS:
+        _merge_lines(into / rel, [root / rel for root in shard_roots])
+    shard_changes = _merge_state(into / STATE_DIR, shard_roots)
+
+    # Token usage: sum the shards' JSON reports into one report
+    tracker = token_tracker.TokenUsageTracker()
+    for root in shard_roots:
+        report = root / 'outbox' / 'token_usage.json'
+        if report.exists():
+            tracker.add_usage(json.loads(report.read_text(encoding='utf-8')))
+    (into / 'outbox').mkdir(parents=True, exist_ok=True)
+    tracker.save_report(into / 'outbox' / 'token_usage_report.txt')
+    tracker.save_json(into / 'outbox' / 'token_usage.json')
+
+    # Degradations: each shard reports its own topics
+    degraded = {}
+    for root in shard_roots:
+        report = root / 'outbox' / 'degradation_report.json'
+        if report.exists():
+            degraded.update(json.loads(report.read_text(encoding='utf-8')).get('topics', {}))
+    output_writer.write_output(into / 'outbox' / 'degradation_report.json',
+                               json.dumps({'topics': degraded}, indent=2) + '\n')
+
+    # Spans: one file tagged by shard, and a breakdown over all of them
+    records = []
+    for root in shard_roots:
+        spans_file = root / 'outbox' / 'spans.jsonl'
+        if spans_file.exists():
+            for line in spans_file.read_text(encoding='utf-8').splitlines():
+                if line.strip():
+                    records.append(dict(json.loads(line), shard=root.name))
+    if records:
+        with open(into / 'outbox' / 'spans.jsonl', 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(rec, ensure_ascii=False) + '\n' for rec in records)
+        (into / 'outbox' / 'span_report.txt').write_text(
+            spans.format_breakdown(spans.breakdown(records)) + '\n', encoding='utf-8')
+
+    # Rebuild what spans topics: retention, combined feed, blog index
+    podcast_dir = into / 'outbox' / 'podcasts'
+    episode_manifest.apply_retention(int(os.getenv('EPISODE_RETENTION', '14')), podcast_dir)
+    if episode_manifest.manifest_path(podcast_dir).exists():
+        generate_rss.generate_podcast_rss(podcast_dir, into / 'outbox' / 'podcast_feed.xml', base_url=base_url)
+    if (into / 'content').exists():
+        blog_index.build_index(into / 'content', full=True)
+
+    # Shard paths are relative to their roots; report them under `into`
+    for path in shard_changes:
+        output_writer.record_change(into / path)
+    output_writer.save_changes(into / STATE_DIR / 'changed_outputs.json')
+
+    # Run history: one entry for the whole sharded run
+    parts = [json.loads((root / 'outbox' / 'run_metrics.json').read_text(encoding='utf-8'))
+             for root in shard_roots if (root / 'outbox' / 'run_metrics.json').exists()]
+    if parts:
+        history.save_run(history.merge_collected(parts, roots=[into / 'outbox', into / 'content']),
+                         out_dir=into / 'outbox', path=os.getenv('RUN_HISTORY') or into / history.DEFAULT_PATH)
+
+    topics = {e['topic'] for e in episode_manifest.load_episodes(podcast_dir)}
+    logging.info(f"Merged {len(shard_roots)} shard(s) into {into}: {copied} file(s) copied, "
+                 f"{conflicts} conflict(s)")
+    return {'copied': copied, 'conflicts': conflicts, 'topics': len(topics)}
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Run pipeline shards in parallel and merge their outputs')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_plan = sub.add_parser('plan', help='Show which topics each shard runs')
+    p_run = sub.add_parser('run', help='Run all shards as parallel processes, then merge')
+    p_merge = sub.add_parser('merge', help='Merge shard output directories')
+    for p in (p_plan, p_run):
+        p.add_argument('--topics', default='topics.yaml')
+        p.add_argument('--shards', type=int, required=True)
+    p_run.add_argument('--since', type=int, default=48)
+    p_run.add_argument('--force', action='store_true')
+    p_run.add_argument('--shards-dir', default='shards')
+    p_merge.add_argument('shard_roots', nargs='+', help='Shard output roots (each with outbox/ and content/)')
+    p_merge.add_argument('--into', default='.')
+    p_merge.add_argument('--base-url', help='Base URL for episode enclosures in the combined feed')
+    args = parser.parse_args()
+
+    if args.command == 'plan':
+        for index, (names, weight) in enumerate(plan(run.load_topics(args.topics), args.shards), start=1):
+            print(f"shard {index}/{args.shards} (weight {weight}): {', '.join(names) or '-'}")
+    elif args.command == 'run':
+        results = run_parallel(args.topics, args.shards, args.shards_dir, args.since, args.force)
+        merge_shards([root for root, _ in results])
+        sys.exit(1 if any(code for _, code in results) else 0)
+    else:
+        merge_shards(args.shard_roots, args.into, args.base_url)
@@ -3,31 +3,72 @@
 
 Behavior:
 - Reads `topics.yaml` for feed lists
-- Uses `ingestors/rss_ingestor.fetch_feed` to get recent entries
-- Builds a plain-text summary and attempts to send via local `sendmail`
-- If `sendmail` is unavailable, writes an .eml file to `outbox/`
+- Uses `ingestors/rss_ingestor.fetch_feed` to get recent entries, fetching
+  all feeds concurrently on a thread pool (DIGEST_FETCH_WORKERS, default 8)
+  into the shared article store (`ingestors/article_store.py`), and builds
+  the digest from range queries on that store
+- Builds a plain-text summary (optionally with an HTML alternative)
+- Sends one message per recipient (`--to`, `--recipients-file` or
+  NEWS_TO_EMAIL as a comma-separated list) over a single reused SMTP
+  session when SMTP_HOST is set
+- Hands recipients SMTP could not reach (or all of them without SMTP) to
+  one local `sendmail` invocation as envelope recipients
+- Writes an .eml file to `outbox/` for each recipient that could not be reached
 
 No external API keys required.
 """
 import os
 import sys
 import argparse
+import html
+import re
+import time
 import yaml
 import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from email.message import EmailMessage
-from typing import List
-import os
+from email.utils import parsedate_to_datetime
+from typing import List, Optional
 import xml.etree.ElementTree as ET
 from urllib.request import urlopen, Request
 
+# Allow `python pipeline/simple_aggregator.py` to import sibling packages
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from ingestors import article_store
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+def _parse_date(text: str) -> Optional[datetime]:
+    """Parse an RSS (RFC 2822) or Atom (ISO 8601) date as an aware UTC datetime."""
+    text = (text or "").strip()
+    if not text:
+        return None
+    try:
+        dt = parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        try:
+            dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
 
 def _fallback_fetch_feed(url: str, since_hours: int = 48) -> List[dict]:
     """Minimal RSS parser using stdlib (used for local testing when deps
     are not installed). Returns list of entries with keys: title, link,
     published, description.
+
+    Entries older than `since_hours` are dropped; entries without a
+    parseable date are kept (as `rss_ingestor.fetch_feed` does).
     """
     try:
         req = Request(url, headers={"User-Agent": "news-aggregator/1.0"})
@@ -41,18 +82,23 @@ def _fallback_fetch_feed(url: str, since_hours: int = 48) -> List[dict]:
     except Exception:
         return []
 
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=since_hours)
     items = []
     # Support both RSS and Atom
-    for item in root.findall('.//item') + root.findall('.//{http://www.w3.org/2005/Atom}entry'):
-        title = item.findtext('title') or item.findtext('{http://www.w3.org/2005/Atom}title') or ''
+    for item in root.findall('.//item') + root.findall(f'.//{ATOM}entry'):
+        title = item.findtext('title') or item.findtext(f'{ATOM}title') or ''
         link = item.findtext('link') or ''
         # link in Atom may be in href attr
         if not link:
-            link_el = item.find('{http://www.w3.org/2005/Atom}link')
+            link_el = item.find(f'{ATOM}link')
             if link_el is not None:
                 link = link_el.attrib.get('href', '')
-        pub = item.findtext('pubDate') or item.findtext('updated') or ''
-        desc = item.findtext('description') or item.findtext('summary') or ''
+        pub = (item.findtext('pubDate') or item.findtext(f'{ATOM}published')
+               or item.findtext(f'{ATOM}updated') or '')
+        published = _parse_date(pub)
+        if published is not None and published < cutoff:
+            continue
+        desc = item.findtext('description') or item.findtext(f'{ATOM}summary') or ''
         items.append({'title': title, 'link': link, 'published': pub, 'description': desc})
 
     return items
@@ -80,55 +126,171 @@ def load_topics(path: Path):
         return yaml.safe_load(f)
 
 
-def build_digest(topics, article_limit_per_topic=50):
-    parts = []
-    total = 0
+def _safe_fetch(src, lookback):
+    try:
+        return fetch_feed(src, since_hours=lookback)
+    except Exception:
+        return None
+
+
+def fetch_all(topics, store, workers=None, max_age_minutes=0):
+    """Fetch every stale source of every topic concurrently into the article store.
+
+    Each distinct (source, lookback) pair is fetched once, on a thread pool
+    of `workers` threads (default DIGEST_FETCH_WORKERS or 8), and stored
+    for every topic that lists it. Sources fetched for a topic less than
+    `max_age_minutes` ago (e.g. by pipeline/run.py) are not fetched again.
+
+    Returns:
+        Number of feeds fetched
+    """
+    jobs = {}
     for t in topics:
         name = t.get("name", "Unnamed")
         lookback = t.get("lookback_hours", 48)
-        cap = t.get("article_cap", article_limit_per_topic)
-        parts.append(f"=== {name} ===")
-        collected = 0
         for src in t.get("sources", []):
-            try:
-                entries = fetch_feed(src, since_hours=lookback)
-            except Exception:
-                entries = []
-
+            if not store.is_fresh(name, src, max_age_minutes):
+                jobs.setdefault((src, lookback), []).append(name)
+    if not jobs:
+        return 0
+    workers = workers or int(os.getenv("DIGEST_FETCH_WORKERS", "8"))
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as pool:
+        results = pool.map(lambda job: _safe_fetch(*job), jobs)
+        for job, entries in zip(jobs, results):
+            if entries is None:
+                continue  # failed: leave the source stale so the next run retries
+            for name in jobs[job]:
+                store.add_entries(name, job[0], entries)
+    return len(jobs)
+
+
+def build_digest(topics, article_limit_per_topic=50, workers=None, store=None):
+    """Build the plain-text digest from the article store.
+
+    Stale feeds are refreshed first (see fetch_all; ARTICLE_STORE_MAX_AGE
+    minutes, default 60), then each topic is a range query over its
+    lookback window, newest first, capped at the topic's article_cap.
+    """
+    own_store = store is None
+    store = store or article_store.ArticleStore()
+    try:
+        fetch_all(topics, store, workers, int(os.getenv("ARTICLE_STORE_MAX_AGE", "60")))
+        now = datetime.now(timezone.utc)
+        parts = []
+        total = 0
+        for t in topics:
+            name = t.get("name", "Unnamed")
+            lookback = t.get("lookback_hours", 48)
+            cap = t.get("article_cap", article_limit_per_topic)
+            parts.append(f"=== {name} ===")
+            entries = store.articles(name, since=now - timedelta(hours=lookback), limit=cap)
             for e in entries:
-                if collected >= cap:
-                    break
                 title = e.get("title") or "(no title)"
                 link = e.get("link") or ""
                 pub = e.get("published") or ""
-                desc = e.get("description", "").strip()
+                desc = (e.get("description") or "").strip()
                 if len(desc) > 300:
                     desc = desc[:297] + "..."
 
                 parts.append(f"- {title}\n  {link}\n  {pub}\n  {desc}")
-                collected += 1
                 total += 1
-        if collected == 0:
-            parts.append("(no recent items)")
-        parts.append("")
+            if not entries:
+                parts.append("(no recent items)")
+            parts.append("")
+    finally:
+        if own_store:
+            store.close()
 
     header = f"News digest generated {datetime.utcnow().isoformat()} UTC\nTotal items: {total}\n"
     return header + "\n".join(parts)
 
 
-def send_via_sendmail(from_addr, to_addr, subject, body) -> bool:
-    sendmail_path = shutil.which("sendmail") or shutil.which("/usr/sbin/sendmail")
-    if not sendmail_path:
-        return False
-
+def digest_to_html(body: str) -> str:
+    """Render a plain-text digest from build_digest as a simple HTML document."""
+    out = ["<html><body>"]
+    lines = body.split("\n")
+    in_list = False
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        heading = re.match(r"^=== (.*) ===$", line)
+        if heading:
+            if in_list:
+                out.append("</ul>")
+            out.append(f"<h2>{html.escape(heading.group(1))}</h2>\n<ul>")
+            in_list = True
+        elif line.startswith("- ") and in_list:
+            # item: title line followed by indented link, date and description lines
+            link, pub, desc = [l.strip() for l in (lines[i + 1:i + 4] + ["", "", ""])[:3]]
+            title = html.escape(line[2:])
+            item = f'<a href="{html.escape(link)}">{title}</a>' if link else title
+            if pub:
+                item += f" <small>{html.escape(pub)}</small>"
+            if desc:
+                item += f"<br>{html.escape(desc)}"
+            out.append(f"<li>{item}</li>")
+            i += 3
+        elif line.strip():
+            out.append(f"<li><em>{html.escape(line)}</em></li>" if in_list else f"<p>{html.escape(line)}</p>")
+        i += 1
+    if in_list:
+        out.append("</ul>")
+    out.append("</body></html>")
+    return "\n".join(out) + "\n"
+
+
+def build_message(from_addr, to_addr, subject, body, html_body=None) -> EmailMessage:
+    """Render one recipient's message (text, or text + HTML multipart/alternative)."""
     msg = EmailMessage()
     msg["From"] = from_addr
     msg["To"] = to_addr
     msg["Subject"] = subject
     msg.set_content(body)
+    if html_body:
+        msg.add_alternative(html_body, subtype="html")
+    return msg
+
+
+def load_recipients(to=None, recipients_file=None) -> List[str]:
+    """Collect recipients from a comma/semicolon-separated string and a file.
+
+    The file has one address per line (commas also work); blank lines and
+    `#` comments are ignored. Duplicates are dropped, keeping the first occurrence.
+    """
+    candidates = re.split(r"[,;\s]+", to or "")
+    if recipients_file:
+        for line in Path(recipients_file).read_text(encoding="utf-8").splitlines():
+            candidates += re.split(r"[,;\s]+", line.split("#", 1)[0])
+    recipients = []
+    for addr in candidates:
+        addr = addr.strip()
+        if addr and addr not in recipients:
+            recipients.append(addr)
+    return recipients
+
+
+def send_via_sendmail(from_addr, to_addr, subject, body, html_body=None) -> bool:
+    return send_batch_via_sendmail(from_addr, [to_addr], subject, body, html_body)
+
+
+def send_batch_via_sendmail(from_addr, recipients, subject, body, html_body=None) -> bool:
+    """Hand one message for all recipients to a single local `sendmail` invocation.
+
+    Recipients are passed as envelope addresses rather than read from the
+    headers (`-t`), so they do not see each other: the To header names the
+    recipient when there is one and is `undisclosed-recipients:;` otherwise.
+    sendmail only queues the message, so its exit status covers the batch
+    as a whole.
+    """
+    sendmail_path = shutil.which("sendmail") or shutil.which("/usr/sbin/sendmail")
+    if not sendmail_path or not recipients:
+        return False
+
+    to_header = recipients[0] if len(recipients) == 1 else "undisclosed-recipients:;"
+    msg = build_message(from_addr, to_header, subject, body, html_body)
 
     try:
-        p = subprocess.Popen([sendmail_path, "-t", "-oi"], stdin=subprocess.PIPE)
+        p = subprocess.Popen([sendmail_path, "-oi", "-f", from_addr, "--", *recipients], stdin=subprocess.PIPE)
         p.communicate(msg.as_bytes())
         return p.returncode == 0
     except Exception:
@@ -136,64 +298,153 @@ def send_via_sendmail(from_addr, to_addr, subject, body) -> bool:
 
 
 def send_via_smtp(host, port, username, password, from_addr, to_addr, subject, body) -> bool:
-    msg = EmailMessage()
-    msg["From"] = from_addr
-    msg["To"] = to_addr
-    msg["Subject"] = subject
-    msg.set_content(body)
-
+    sent, _ = send_batch_via_smtp(host, port, username, password, from_addr, [to_addr], subject, body)
+    return bool(sent)
+
+
+def _smtp_connect(host, port, username, password, timeout=30):
+    """Open an authenticated SMTP session (SSL on 465, else STARTTLS when offered)."""
+    port = int(port) if port else 587
+    if port == 465:
+        server = smtplib.SMTP_SSL(host, port, timeout=timeout, context=ssl.create_default_context())
+    else:
+        server = smtplib.SMTP(host, port, timeout=timeout)
+        server.ehlo()
+        if server.has_extn("starttls"):
+            server.starttls(context=ssl.create_default_context())
+            server.ehlo()
+    if username and password:
+        server.login(username, password)
+    return server
+
+
+def send_batch_via_smtp(host, port, username, password, from_addr, recipients, subject, body,
+                        html_body=None, throttle=0.0, max_attempts=3, backoff=2.0, timeout=30):
+    """Send one message per recipient over a single reused SMTP session.
+
+    A dropped connection or a temporary (4xx) error is retried for that
+    recipient after reconnecting, up to `max_attempts` times with
+    exponential backoff; a permanent refusal fails the recipient at once.
+    Other recipients are not affected either way.
+
+    Args:
+        throttle: Seconds to wait between messages (provider rate limits)
+
+    Returns:
+        (sent, failed) where sent is a list of addresses and failed a list
+        of (address, error message) pairs
+    """
+    sent, failed = [], []
+    server = None
     try:
-        port = int(port) if port else None
-        # Try SSL on 465, otherwise STARTTLS
-        if port == 465:
-            context = ssl.create_default_context()
-            with smtplib.SMTP_SSL(host, port, context=context) as server:
-                if username and password:
-                    server.login(username, password)
-                server.send_message(msg)
-        else:
-            # default port 587 for STARTTLS
-            smtp_port = port or 587
-            with smtplib.SMTP(host, smtp_port, timeout=30) as server:
-                server.ehlo()
+        for idx, to_addr in enumerate(recipients):
+            if idx and throttle:
+                time.sleep(throttle)
+            msg = build_message(from_addr, to_addr, subject, body, html_body)
+            for attempt in range(1, max_attempts + 1):
                 try:
-                    server.starttls(context=ssl.create_default_context())
-                    server.ehlo()
-                except Exception:
-                    pass
-                if username and password:
-                    server.login(username, password)
-                server.send_message(msg)
-        return True
+                    if server is None:
+                        server = _smtp_connect(host, port, username, password, timeout)
+                    server.send_message(msg)
+                    sent.append(to_addr)
+                    break
+                except smtplib.SMTPRecipientsRefused as e:
+                    codes = [code for code, _ in e.recipients.values()]
+                    error = f"refused: {e.recipients}"
+                    if all(code >= 500 for code in codes) or attempt == max_attempts:
+                        failed.append((to_addr, error))
+                        break
+                except smtplib.SMTPResponseException as e:
+                    error = f"{e.smtp_code} {e.smtp_error!r}"
+                    if e.smtp_code >= 500 or attempt == max_attempts:
+                        failed.append((to_addr, error))
+                        break
+                    _smtp_close(server)
+                    server = None
+                except (smtplib.SMTPException, OSError) as e:
+                    # dropped session or network error: reconnect and retry
+                    _smtp_close(server)
+                    server = None
+                    if attempt == max_attempts:
+                        failed.append((to_addr, str(e)))
+                        break
+                time.sleep(backoff * 2 ** (attempt - 1))
+    finally:
+        _smtp_close(server)
+    return sent, failed
+
+
+def _smtp_close(server):
+    if server is None:
+        return
+    try:
+        server.quit()
     except Exception:
-        return False
+        server.close()
 
 
-def write_eml(outdir: Path, from_addr, to_addr, subject, body) -> Path:
+def write_eml(outdir: Path, from_addr, to_addr, subject, body, html_body=None) -> Path:
     outdir.mkdir(parents=True, exist_ok=True)
     ts = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-    path = outdir / f"news_digest_{ts}.eml"
-    msg = EmailMessage()
-    msg["From"] = from_addr
-    msg["To"] = to_addr
-    msg["Subject"] = subject
-    msg.set_content(body)
+    safe_to = re.sub(r"[^\w.@-]+", "_", to_addr)
+    path = outdir / f"news_digest_{ts}_{safe_to}.eml"
+    msg = build_message(from_addr, to_addr, subject, body, html_body)
     with path.open("wb") as f:
         f.write(msg.as_bytes())
     return path
 
 
+def deliver(recipients, from_addr, subject, body, html_body=None, outbox="outbox", smtp_host=None,
+            smtp_port=None, smtp_user=None, smtp_pass=None, **smtp_options):
+    """Deliver the digest to every recipient, falling back step by step.
+
+    With `smtp_host`, all recipients share one SMTP session
+    (`send_batch_via_smtp`, which takes `smtp_options`). Recipients it could
+    not reach, or all of them without SMTP, go to one `sendmail` invocation;
+    if that fails too, each of them gets an .eml file in `outbox`.
+
+    Returns:
+        Dict with 'smtp' and 'sendmail' (lists of addresses) and 'eml'
+        (list of written paths)
+    """
+    result = {"smtp": [], "sendmail": [], "eml": []}
+    pending = list(recipients)
+    if smtp_host:
+        sent, failed = send_batch_via_smtp(smtp_host, smtp_port, smtp_user, smtp_pass, from_addr, pending,
+                                           subject, body, html_body=html_body, **smtp_options)
+        print(f"Email sent to {len(sent)} of {len(pending)} recipient(s) via SMTP host {smtp_host}")
+        for to_addr, error in failed:
+            print(f"SMTP delivery to {to_addr} failed: {error}", file=sys.stderr)
+        result["smtp"] = sent
+        pending = [to_addr for to_addr, _ in failed]
+
+    if not pending:
+        return result
+    if send_batch_via_sendmail(from_addr, pending, subject, body, html_body):
+        print(f"Email sent to {len(pending)} recipient(s) via sendmail")
+        result["sendmail"] = pending
+        return result
+    for to_addr in pending:
+        outp = write_eml(Path(outbox), from_addr, to_addr, subject, body, html_body)
+        print(f"Sendmail/SMTP not available or failed for {to_addr}. Wrote message to {outp}")
+        result["eml"].append(outp)
+    return result
+
+
 def main():
     p = argparse.ArgumentParser(description="Simple keyless news aggregator and emailer")
     p.add_argument("--topics", default="topics.yaml", help="path to topics.yaml")
-    p.add_argument("--to", default=os.getenv("NEWS_TO_EMAIL"), help="recipient email (or set NEWS_TO_EMAIL)")
+    p.add_argument("--to", default=os.getenv("NEWS_TO_EMAIL"), help="recipient email(s), comma-separated (or set NEWS_TO_EMAIL)")
+    p.add_argument("--recipients-file", default=os.getenv("NEWS_RECIPIENTS_FILE"), help="file with one recipient per line (or set NEWS_RECIPIENTS_FILE)")
     p.add_argument("--from", dest="from_addr", default=os.getenv("NEWS_FROM_EMAIL", "news@example.com"), help="from email address")
-    p.add_argument("--outbox", default="outbox", help="directory to write .eml when sendmail absent")
+    p.add_argument("--outbox", default="outbox", help="directory to write .eml for undelivered messages")
     p.add_argument("--subject", default="Daily News Digest", help="email subject")
+    p.add_argument("--html", action="store_true", default=os.getenv("NEWS_HTML") == "1", help="send HTML + plain-text multipart messages")
     args = p.parse_args()
 
-    if not args.to:
-        print("Recipient email required: pass --to or set NEWS_TO_EMAIL environment variable", file=sys.stderr)
+    recipients = load_recipients(args.to, args.recipients_file)
+    if not recipients:
+        print("Recipient email required: pass --to/--recipients-file or set NEWS_TO_EMAIL environment variable", file=sys.stderr)
         sys.exit(2)
 
     topics_path = Path(args.topics)
@@ -203,28 +454,15 @@ def main():
 
     topics = load_topics(topics_path)
     body = build_digest(topics)
-
-    # Try SMTP if configured via env or args
-    smtp_host = os.getenv("SMTP_HOST")
-    smtp_port = os.getenv("SMTP_PORT")
-    smtp_user = os.getenv("SMTP_USER")
-    smtp_pass = os.getenv("SMTP_PASS")
-
-    sent = False
-    if smtp_host:
-        sent = send_via_smtp(smtp_host, smtp_port, smtp_user, smtp_pass, args.from_addr, args.to, args.subject, body)
-        if sent:
-            print(f"Email sent to {args.to} via SMTP host {smtp_host}")
-
-    if not sent:
-        # Try local sendmail
-        sent = send_via_sendmail(args.from_addr, args.to, args.subject, body)
-        if sent:
-            print(f"Email sent to {args.to} via sendmail")
-
-    if not sent:
-        outp = write_eml(Path(args.outbox), args.from_addr, args.to, args.subject, body)
-        print(f"Sendmail/SMTP not available or failed. Wrote message to {outp}")
+    html_body = digest_to_html(body) if args.html else None
+
+    deliver(recipients, args.from_addr, args.subject, body, html_body, outbox=args.outbox,
+            smtp_host=os.getenv("SMTP_HOST"),
+            smtp_port=os.getenv("SMTP_PORT"),
+            smtp_user=os.getenv("SMTP_USER"),
+            smtp_pass=os.getenv("SMTP_PASS"),
+            throttle=float(os.getenv("SMTP_THROTTLE", "0")),
+            max_attempts=int(os.getenv("SMTP_MAX_ATTEMPTS", "3")))
 
 
 if __name__ == "__main__":
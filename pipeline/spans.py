@@ -0,0 +1,187 @@
+"""Lightweight timing spans for pipeline runs.
+
+Code under measurement is wrapped in `with spans.span('fetch', topic=...)`.
+Each finished span is appended as one JSON line to the run's span file
+(default `outbox/spans.jsonl`) and kept in memory for the end-of-run
+breakdown table. Spans cost a perf_counter call and a dict when no run is
+active, so the instrumentation can stay in place permanently.
+
+With profiling enabled, `profile_call` runs a callable under its own
+cProfile profiler (cProfile only sees the thread it runs in), and
+`save_profile` merges every profile into one pstats dump.
+"""
+
+import contextlib
+import cProfile
+import io
+import json
+import logging
+import pstats
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+_lock = threading.Lock()
+_records = []
+_file = None
+_profiles = []
+_profiling = False
+
+
+def start_run(path=Path('outbox') / 'spans.jsonl', profile=False):
+    """Start collecting spans for a run, truncating the span file."""
+    global _file, _profiling
+    with _lock:
+        _records.clear()
+        _profiles.clear()
+        if _file is not None:
+            _file.close()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _file = open(path, 'w', encoding='utf-8')
+        _profiling = profile
+
+
+def end_run():
+    """Stop writing spans; returns the records collected during the run."""
+    global _file, _profiling
+    with _lock:
+        if _file is not None:
+            _file.close()
+            _file = None
+        _profiling = False
+        return list(_records)
+
+
+def record(name, duration_s, status='ok', **attrs):
+    """Record a span measured elsewhere (e.g. work finished on another process)."""
+    rec = {
+        'span': name,
+        'start': datetime.now(timezone.utc).isoformat(),
+        'duration_ms': round(duration_s * 1000, 3),
+        'status': status,
+        'thread': threading.current_thread().name,
+    }
+    rec.update(attrs)
+    _emit(rec)
+
+
+def _emit(rec):
+    with _lock:
+        _records.append(rec)
+        if _file is not None:
+            _file.write(json.dumps(rec, ensure_ascii=False, default=str) + '\n')
+            _file.flush()
+
+
+@contextlib.contextmanager
+def span(name, **attrs):
+    """Time the enclosed block; an exception marks the span as an error and is re-raised."""
+    started = datetime.now(timezone.utc)
+    t0 = time.perf_counter()
+    status = 'ok'
+    try:
+        yield attrs
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        duration = time.perf_counter() - t0
+        rec = {
+            'span': name,
+            'start': started.isoformat(),
+            'duration_ms': round(duration * 1000, 3),
+            'status': status,
+            'thread': threading.current_thread().name,
+        }
+        rec.update(attrs)
+        _emit(rec)
+
+
+def profile_call(func, *args, **kwargs):
+    """Call `func`, under a per-call cProfile profiler when profiling is on."""
+    if not _profiling:
+        return func(*args, **kwargs)
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+ allows one active profiler; the main one still sees this call
+        return func(*args, **kwargs)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        with _lock:
+            _profiles.append(profiler)
+
+
+def add_profile(profiler):
+    """Include an externally managed profiler (e.g. the main thread's) in the dump."""
+    with _lock:
+        _profiles.append(profiler)
+
+
+def save_profile(path=Path('outbox') / 'profile.pstats', top=40):
+    """Merge collected profiles into a pstats file plus a text summary next to it.
+
+    Returns:
+        Path of the .pstats file, or None if nothing was profiled
+    """
+    with _lock:
+        profiles = list(_profiles)
+    if not profiles:
+        return None
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    stats = pstats.Stats(profiles[0])
+    for profiler in profiles[1:]:
+        stats.add(profiler)
+    stats.dump_stats(str(path))
+
+    out = io.StringIO()
+    pstats.Stats(str(path), stream=out).sort_stats('cumulative').print_stats(top)
+    path.with_suffix('.txt').write_text(out.getvalue(), encoding='utf-8')
+    logging.info(f"Profile saved to {path} (summary: {path.with_suffix('.txt')})")
+    return str(path)
+
+
+def breakdown(records=None):
+    """Aggregate spans by name.
+
+    Returns:
+        List of dicts (span, count, errors, total_s, mean_ms, p95_ms, max_ms),
+        largest total first
+    """
+    with _lock:
+        records = list(_records if records is None else records)
+    by_name = {}
+    for rec in records:
+        by_name.setdefault(rec['span'], []).append(rec)
+    rows = []
+    for name, recs in by_name.items():
+        durations = sorted(r['duration_ms'] for r in recs)
+        rows.append({
+            'span': name,
+            'count': len(recs),
+            'errors': sum(1 for r in recs if r['status'] != 'ok'),
+            'total_s': round(sum(durations) / 1000, 3),
+            'mean_ms': round(sum(durations) / len(durations), 1),
+            'p95_ms': round(durations[min(len(durations) - 1, int(0.95 * len(durations)))], 1),
+            'max_ms': round(durations[-1], 1),
+        })
+    rows.sort(key=lambda r: r['total_s'], reverse=True)
+    return rows
+
+
+def format_breakdown(rows=None):
+    """Render the breakdown as a fixed-width text table."""
+    rows = breakdown() if rows is None else rows
+    header = f"{'span':<22} {'count':>6} {'errors':>6} {'total s':>10} {'mean ms':>10} {'p95 ms':>10} {'max ms':>10}"
+    lines = ['=' * len(header), 'TIME BREAKDOWN', '=' * len(header), header, '-' * len(header)]
+    for r in rows:
+        lines.append(f"{r['span']:<22} {r['count']:>6} {r['errors']:>6} {r['total_s']:>10.3f} "
+                     f"{r['mean_ms']:>10.1f} {r['p95_ms']:>10.1f} {r['max_ms']:>10.1f}")
+    lines.append('=' * len(header))
+    return '\n'.join(lines)
@@ -0,0 +1,111 @@
+"""Staged producer/consumer executor for the pipeline.
+
+Each stage has its own worker threads and a bounded input queue. When a
+stage falls behind, the queue in front of it fills up and the upstream
+stage blocks (backpressure), so one topic can be in audio assembly while
+the next is still being fetched and summarized.
+"""
+
+import logging
+import queue
+import threading
+
+_DONE = object()
+
+
+class Stage:
+    """One step of the pipeline.
+
+    Args:
+        name: Stage name used in logs
+        func: Callable `func(item)` returning the item for the next stage,
+            or None to drop it
+        workers: Number of threads running this stage
+        queue_size: Capacity of the stage's input queue
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=2):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.queue_size = max(1, int(queue_size))
+
+
+class StagedExecutor:
+    """Run items through a list of stages connected by bounded queues."""
+
+    def __init__(self, stages, describe=repr):
+        """
+        Args:
+            stages: Ordered list of Stage objects
+            describe: Callable turning an item into a short label for logs
+        """
+        if not stages:
+            raise ValueError('StagedExecutor needs at least one stage')
+        self.stages = stages
+        self.describe = describe
+        self.errors = []
+        self._lock = threading.Lock()
+
+    def run(self, items):
+        """Push `items` through every stage and wait for them to drain.
+
+        A stage that raises for an item logs the error, records it in
+        `self.errors` and drops the item; other items keep flowing.
+
+        Returns:
+            List of items that made it out of the last stage (completion order)
+        """
+        queues = [queue.Queue(maxsize=s.queue_size) for s in self.stages]
+        remaining = [s.workers for s in self.stages]
+        results = []
+        threads = []
+
+        for idx, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                t = threading.Thread(
+                    target=self._worker,
+                    args=(idx, queues, remaining, results),
+                    name=f"{stage.name}-{n}",
+                    daemon=True
+                )
+                t.start()
+                threads.append(t)
+
+        for item in items:
+            queues[0].put(item)
+        for _ in range(self.stages[0].workers):
+            queues[0].put(_DONE)
+
+        for t in threads:
+            t.join()
+        return results
+
+    def _worker(self, idx, queues, remaining, results):
+        stage = self.stages[idx]
+        is_last = idx == len(self.stages) - 1
+        while True:
+            item = queues[idx].get()
+            if item is _DONE:
+                break
+            try:
+                out = stage.func(item)
+            except Exception as e:
+                logging.error(f"Stage {stage.name} failed for {self.describe(item)}: {e}")
+                with self._lock:
+                    self.errors.append({'stage': stage.name, 'item': self.describe(item), 'error': str(e)})
+                continue
+            if out is None:
+                continue
+            if is_last:
+                results.append(out)
+            else:
+                queues[idx + 1].put(out)
+
+        # The last worker of a stage to finish closes the next stage
+        with self._lock:
+            remaining[idx] -= 1
+            last_out = remaining[idx] == 0
+        if last_out and not is_last:
+            for _ in range(self.stages[idx + 1].workers):
+                queues[idx + 1].put(_DONE)
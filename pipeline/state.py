@@ -0,0 +1,44 @@
+"""Small JSON state files that persist between pipeline runs (outbox/state/)."""
+
+import json
+import logging
+import os
+from pathlib import Path
+
+STATE_DIR = Path('outbox') / 'state'
+
+
+def state_path(name, state_dir=None):
+    """Return the path of a named state file."""
+    return Path(state_dir or STATE_DIR) / f"{name}.json"
+
+
+def load_state(name, default=None, state_dir=None):
+    """Load a named JSON state file.
+
+    Args:
+        name: State file name without extension (e.g. 'fingerprints')
+        default: Value returned when the file is missing or unreadable
+        state_dir: Optional override of the state directory
+
+    Returns:
+        The decoded JSON value, or `default`
+    """
+    path = state_path(name, state_dir)
+    if not path.exists():
+        return {} if default is None else default
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable state file {path}: {e}")
+        return {} if default is None else default
+
+
+def save_state(name, data, state_dir=None):
+    """Write a named JSON state file atomically (temp file + rename)."""
+    path = state_path(name, state_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.json.tmp')
+    tmp.write_text(json.dumps(data, indent=2, sort_keys=True), encoding='utf-8')
+    os.replace(tmp, path)
+    return str(path)
@@ -0,0 +1,67 @@
+"""Process pool for CPU-bound audio work (pydub/ffmpeg encoding).
+
+Episode concatenation and placeholder encoding are submitted here so they
+run on every core instead of the pipeline's main process. Set
+`AUDIO_WORKERS` to the number of processes (default: CPU count) or to 0 to
+run audio tasks inline.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _worker_count():
+    value = os.getenv('AUDIO_WORKERS')
+    if value is None or value == '':
+        return os.cpu_count() or 1
+    return max(0, int(value))
+
+
+def get_pool():
+    """Return the shared audio process pool, or None when running inline."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = _worker_count()
+            if workers == 0:
+                return None
+            # spawn: the pipeline forks from a process that already runs threads
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context('spawn'))
+            logging.info(f"Started audio process pool with {workers} worker(s)")
+        return _pool
+
+
+def submit(fn, *args, **kwargs):
+    """Run `fn(*args, **kwargs)` on the audio pool.
+
+    `fn` must be a module-level function so it can be pickled.
+
+    Returns:
+        A concurrent.futures.Future with the result
+    """
+    pool = get_pool()
+    if pool is not None:
+        return pool.submit(fn, *args, **kwargs)
+
+    future = Future()
+    try:
+        future.set_result(fn(*args, **kwargs))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def shutdown(wait=True):
+    """Shut the shared pool down (a later submit starts a new one)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait)
+            _pool = None
@@ -0,0 +1,411 @@
+"""Incremental blog index built from a posts manifest.
+
+`blog_publisher` appends one line per written post to
+`content/_posts.jsonl`. Index generation reads only the manifest lines
+added since the last build (from a saved byte offset) and updates the
+pages those posts affect. The build state keeps, per page list, the entry
+count and the posts since the last full archive page, so a build costs
+the same however many posts exist; repeated records for the same post are
+compacted out of the manifest from time to time. Pages produced:
+
+- `index.md`: latest posts, paged (see feed_pages)
+- `topics/index.md` and `topics/<topic>.md`: posts per topic, paged
+- `months/index.md` and `months/YYYY-MM.md`: posts per month, paged
+
+Files starting with an underscore are ignored by Jekyll, so the manifest
+and build state live next to the posts without being published.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+from publisher import feed_pages, output_writer
+
+MANIFEST_NAME = '_posts.jsonl'
+STATE_NAME = '_index_state.json'
+
+_DATE_PREFIX = re.compile(r'^(\d{4}-\d{2}-\d{2})-(.+)$')
+_lock = threading.Lock()
+
+NAV = '[Topics](topics/index.md) · [Months](months/index.md)'
+FOOTER = [
+    '',
+    '---',
+    '',
+    '*Generated by [NewsGenerator](https://github.com/vishc0/NewsGenerator)*'
+]
+
+
+def manifest_path(content_dir='content'):
+    return Path(content_dir) / MANIFEST_NAME
+
+
+def _load_build_state(content_dir):
+    path = Path(content_dir) / STATE_NAME
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable index state {path}: {e}")
+        return {}
+
+
+def _save_build_state(content_dir, data):
+    path = Path(content_dir) / STATE_NAME
+    tmp = path.with_suffix('.json.tmp')
+    tmp.write_text(json.dumps(data, sort_keys=True), encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def _slug_from_filename(filename):
+    stem = Path(filename).stem
+    m = _DATE_PREFIX.match(stem)
+    return m.group(2) if m else stem
+
+
+def record_post(filename, topic=None, content_dir='content', when=None):
+    """Append a written post to the manifest (a rewrite of the same file replaces it).
+
+    Args:
+        filename: Post file name inside `content_dir`, e.g. 2025-11-24-World_News.md
+        topic: Topic name (default: derived from the file name)
+        content_dir: Directory holding the posts and the manifest
+        when: Publish time (default: now)
+
+    Returns:
+        The manifest record
+    """
+    when = when or datetime.now(timezone.utc)
+    slug = _slug_from_filename(filename)
+    record = {
+        'file': filename,
+        'topic': topic or slug.replace('_', ' '),
+        'slug': slug,
+        'published': when.isoformat(),
+    }
+    path = manifest_path(content_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _lock, open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return record
+
+
+def load_posts(content_dir='content', since_offset=0):
+    """Read the manifest.
+
+    Args:
+        content_dir: Directory holding the manifest
+        since_offset: Byte offset of the first line considered "new"
+
+    Returns:
+        (posts, new_posts, end_offset): all posts keyed by file (last record
+        wins), the records at or after `since_offset`, and the manifest size
+    """
+    path = manifest_path(content_dir)
+    posts, new_posts = {}, []
+    if not path.exists():
+        return posts, new_posts, 0
+    offset = 0
+    with open(path, 'rb') as f:
+        for raw in f:
+            start, offset = offset, offset + len(raw)
+            line = raw.decode('utf-8').strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                logging.warning(f"Skipping malformed manifest line in {path}")
+                continue
+            posts[rec['file']] = rec
+            if start >= since_offset:
+                new_posts.append(rec)
+    return posts, new_posts, offset
+
+
+def backfill(content_dir='content'):
+    """Seed an empty manifest from posts already in `content_dir` (one-time)."""
+    content_path = Path(content_dir)
+    if manifest_path(content_path).exists() or not content_path.exists():
+        return 0
+    count = 0
+    for md_file in sorted(content_path.glob('*.md')):
+        if md_file.name.startswith('index'):
+            continue
+        m = _DATE_PREFIX.match(md_file.stem)
+        if m:
+            when = datetime.strptime(m.group(1), '%Y-%m-%d').replace(tzinfo=timezone.utc)
+        else:
+            when = datetime.fromtimestamp(md_file.stat().st_mtime, tz=timezone.utc)
+        record_post(md_file.name, content_dir=content_path, when=when)
+        count += 1
+    if count:
+        logging.info(f"Backfilled posts manifest with {count} existing post(s)")
+    return count
+
+
+def _entry(post, prefix=''):
+    date = datetime.fromisoformat(post['published']).strftime('%Y-%m-%d %H:%M')
+    return f"- [{post['topic']}]({prefix}{post['file']}) - {date}"
+
+
+def _header(title, subtitle, updated, nav):
+    def header_for(page):
+        lines = [f'# {title}', '']
+        if updated:
+            lines += [f'*Last updated: {updated}*', '']
+        if nav:
+            lines += [nav, '']
+        heading = subtitle if page is None else f'Archive (page {page})'
+        return lines + [f'## {heading}', '']
+    return header_for
+
+
+def _updated(published):
+    """'Last updated' stamp taken from the newest post, so pages stay stable between runs."""
+    if not published:
+        return None
+    return datetime.fromisoformat(published).astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')
+
+
+def _write_list_page(path, title, links):
+    lines = [f'# {title}', ''] + [f'- [{label}]({href})' for label, href in links] + FOOTER
+    return [path] if output_writer.write_output(path, '\n'.join(lines)) else []
+
+
+def _sort_key(post):
+    return (post['published'], post['file'])
+
+
+def _head(chronological, page_size):
+    """Build state of one paged list: its size and the posts still on the current page."""
+    full = len(chronological) // page_size
+    return {
+        'count': len(chronological),
+        'last_full': chronological[(full - 1) * page_size:full * page_size] if full else [],
+        'open': chronological[full * page_size:],
+    }
+
+
+def _add(head, post, page_size):
+    """Add a post to a list's build state.
+
+    A post already on the current page is updated in place.
+
+    Returns:
+        Archive pages completed by this post, as (number, posts)
+    """
+    for key in ('open', 'last_full'):
+        for i, known in enumerate(head[key]):
+            if known['file'] == post['file']:
+                head[key][i] = post
+                head['open'].sort(key=_sort_key)
+                return []
+    head['open'].append(post)
+    head['open'].sort(key=_sort_key)
+    head['count'] += 1
+    new_pages = []
+    while len(head['open']) >= page_size:
+        head['last_full'], head['open'] = head['open'][:page_size], head['open'][page_size:]
+        new_pages.append(((head['count'] - len(head['open'])) // page_size, head['last_full']))
+    return new_pages
+
+
+def _write_head(path, header, head, new_pages, page_size, prefix=''):
+    """Write a list's newly completed archive pages and its current page."""
+    written = []
+    for number, page in new_pages:
+        target = feed_pages.write_markdown_archive(path, number, header, [_entry(p, prefix) for p in reversed(page)],
+                                                   FOOTER)
+        if target:
+            written.append(target)
+    current = (head['last_full'] + head['open'])[-page_size:]
+    written += feed_pages.write_markdown_current(path, header, [_entry(p, prefix) for p in reversed(current)],
+                                                 head['count'] // page_size, FOOTER)
+    return written
+
+
+def _write_list_pages(content_path, build_state):
+    topics = build_state['topics']
+    written = _write_list_page(content_path / 'topics' / 'index.md', 'Topics', sorted(
+        ((head['topic'], f'{slug}.md') for slug, head in topics.items()), key=lambda link: link[0].lower()))
+    written += _write_list_page(content_path / 'months' / 'index.md', 'Months',
+                                [(month, f'{month}.md') for month in sorted(build_state['months'], reverse=True)])
+    return written
+
+
+def _trim_months(build_state):
+    # Posts only go to the current month, so older months need just their count
+    newest = max(build_state['months'], default=None)
+    for month, head in build_state['months'].items():
+        if month != newest:
+            build_state['months'][month] = {'count': head['count']}
+
+
+def compact_manifest(content_dir='content', posts=None):
+    """Rewrite the manifest with one record per post, oldest first.
+
+    Returns:
+        The new manifest size in bytes
+    """
+    path = manifest_path(content_dir)
+    if posts is None:
+        posts, _, _ = load_posts(content_dir)
+    tmp = path.with_suffix('.jsonl.tmp')
+    with _lock:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for post in sorted(posts.values(), key=_sort_key):
+                f.write(json.dumps(post, ensure_ascii=False) + '\n')
+        os.replace(tmp, path)
+    return path.stat().st_size
+
+
+def _full_build(content_path, output_path, page_size):
+    """Render every page from the whole manifest and return (build_state, written)."""
+    posts, records, end_offset = load_posts(content_path)
+    if len(records) > len(posts):
+        end_offset = compact_manifest(content_path, posts)
+        logging.info(f"Compacted posts manifest: {len(records) - len(posts)} repeated record(s) dropped")
+    chronological = sorted(posts.values(), key=_sort_key)
+    by_topic, by_month = {}, {}
+    for post in chronological:
+        by_topic.setdefault(post['slug'], []).append(post)
+        by_month.setdefault(post['published'][:7], []).append(post)
+
+    newest = chronological[-1]['published'] if chronological else None
+    header = _header('NewsGenerator Blog', 'Latest Posts', _updated(newest), NAV)
+    written = feed_pages.write_paged_markdown(output_path, header, [_entry(p) for p in reversed(chronological)],
+                                              FOOTER, page_size)
+    for slug, topic_posts in sorted(by_topic.items()):
+        header = _header(topic_posts[-1]['topic'], 'Posts', None, '[All topics](index.md)')
+        written += feed_pages.write_paged_markdown(
+            content_path / 'topics' / f'{slug}.md', header, [_entry(p, '../') for p in reversed(topic_posts)],
+            FOOTER, page_size)
+    for month, month_posts in sorted(by_month.items()):
+        header = _header(f'Posts from {month}', 'Posts', None, '[All months](index.md)')
+        written += feed_pages.write_paged_markdown(
+            content_path / 'months' / f'{month}.md', header, [_entry(p, '../') for p in reversed(month_posts)],
+            FOOTER, page_size)
+
+    build_state = {
+        'offset': end_offset,
+        'page_size': page_size,
+        'lines': len(posts),
+        'newest': newest,
+        'latest': _head(chronological, page_size),
+        'topics': {slug: dict(_head(topic_posts, page_size), topic=topic_posts[-1]['topic'])
+                   for slug, topic_posts in by_topic.items()},
+        'months': {month: _head(month_posts, page_size) for month, month_posts in by_month.items()},
+    }
+    written += _write_list_pages(content_path, build_state)
+    return build_state, written
+
+
+def _read_from(path, offset):
+    """Manifest records from byte `offset` on, and the offset after the last one."""
+    records = []
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for raw in f:
+            offset += len(raw)
+            line = raw.decode('utf-8').strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logging.warning(f"Skipping malformed manifest line in {path}")
+    return records, offset
+
+
+def build_index(content_dir='content', output_file=None, page_size=None, full=False):
+    """Bring the blog index pages up to date with the posts manifest.
+
+    Only manifest lines added since the previous build are read, and only
+    the lists they belong to are re-rendered. A full rebuild happens on
+    first use, when the page size changes, when the manifest was replaced
+    or when `full` is set.
+
+    Args:
+        content_dir: Directory containing the posts and the manifest
+        output_file: Path of the latest-posts page (default content/index.md)
+        page_size: Entries per page (default FEED_PAGE_SIZE or 50)
+        full: Re-render every page regardless of the build state
+
+    Returns:
+        Dict with 'posts' (total count) and 'written' (list of page paths)
+    """
+    content_path = Path(content_dir)
+    output_path = Path(output_file) if output_file else content_path / 'index.md'
+    page_size = page_size or feed_pages.page_size_from_env()
+
+    backfill(content_path)
+    build_state = _load_build_state(content_path)
+    path = manifest_path(content_path)
+    size = path.stat().st_size if path.exists() else 0
+    offset = build_state.get('offset', 0)
+    if (build_state.get('page_size') != page_size or 'latest' not in build_state or not output_path.exists()
+            or offset > size):
+        full = True
+
+    new_posts = []
+    if not full and offset < size:
+        records, end_offset = _read_from(path, offset)
+        latest = {}
+        for rec in records:
+            latest[rec['file']] = rec  # last record wins
+        new_posts = sorted(latest.values(), key=_sort_key)
+        # A post for a month whose pages are no longer tracked needs the whole manifest
+        full = any('open' not in build_state['months'].get(p['published'][:7], {'open': []}) for p in new_posts)
+
+    if full:
+        build_state, written = _full_build(content_path, output_path, page_size)
+    else:
+        written = []
+        if new_posts:
+            written += _build_incremental(content_path, output_path, page_size, build_state, new_posts)
+            build_state['offset'] = end_offset
+            build_state['lines'] += len(records)
+            repeats = build_state['lines'] - build_state['latest']['count']
+            if repeats > max(page_size, build_state['latest']['count'] // 4):
+                build_state['offset'] = compact_manifest(content_path)
+                build_state['lines'] = build_state['latest']['count']
+                logging.info(f"Compacted posts manifest: {repeats} repeated record(s) dropped")
+    _trim_months(build_state)
+
+    _save_build_state(content_path, build_state)
+    total = build_state['latest']['count']
+    logging.info(f"Blog index: {total} post(s), {len(written)} page(s) rewritten")
+    return {'posts': total, 'written': [str(p) for p in written]}
+
+
+def _build_incremental(content_path, output_path, page_size, build_state, new_posts):
+    """Add `new_posts` to the build state and write the pages they affect."""
+    latest_pages = []
+    dirty_topics, dirty_months = {}, {}
+    for post in new_posts:
+        latest_pages += _add(build_state['latest'], post, page_size)
+        topic = build_state['topics'].setdefault(post['slug'], dict(_head([], page_size), topic=post['topic']))
+        topic['topic'] = post['topic']
+        dirty_topics.setdefault(post['slug'], []).extend(_add(topic, post, page_size))
+        month = build_state['months'].setdefault(post['published'][:7], _head([], page_size))
+        dirty_months.setdefault(post['published'][:7], []).extend(_add(month, post, page_size))
+        build_state['newest'] = max(build_state.get('newest') or '', post['published'])
+
+    header = _header('NewsGenerator Blog', 'Latest Posts', _updated(build_state['newest']), NAV)
+    written = _write_head(output_path, header, build_state['latest'], latest_pages, page_size)
+    for slug, new_pages in sorted(dirty_topics.items()):
+        head = build_state['topics'][slug]
+        header = _header(head['topic'], 'Posts', None, '[All topics](index.md)')
+        written += _write_head(content_path / 'topics' / f'{slug}.md', header, head, new_pages, page_size, '../')
+    for month, new_pages in sorted(dirty_months.items()):
+        header = _header(f'Posts from {month}', 'Posts', None, '[All months](index.md)')
+        written += _write_head(content_path / 'months' / f'{month}.md', header, build_state['months'][month],
+                               new_pages, page_size, '../')
+    return written + _write_list_pages(content_path, build_state)
@@ -1,9 +1,13 @@
 from pathlib import Path
 
+from publisher import blog_index, output_writer
 
-def write_markdown_to_content(markdown_text, filename):
+
+def write_markdown_to_content(markdown_text, filename, topic=None):
     content_dir = Path('content')
     content_dir.mkdir(exist_ok=True)
     target = content_dir / filename
-    target.write_text(markdown_text, encoding='utf-8')
+    # Record changed posts so the blog index never has to scan content/
+    if output_writer.write_output(target, markdown_text):
+        blog_index.record_post(filename, topic, content_dir)
     return str(target)
@@ -0,0 +1,246 @@
+"""Persistent podcast episode manifest (JSON lines) and dated episode archive.
+
+Every built episode is copied to a dated file next to `episode.mp3` and
+recorded once in `outbox/podcasts/episodes.jsonl` with its size, duration,
+GUID and URL. Feeds are generated from the manifest alone, so feed builds
+never stat or probe audio files and keep history across runs.
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+from publisher import mp3_info
+
+PODCAST_DIR = Path('outbox') / 'podcasts'
+MANIFEST_NAME = 'episodes.jsonl'
+
+_lock = threading.Lock()
+
+
+def manifest_path(podcast_dir=PODCAST_DIR):
+    return Path(podcast_dir) / MANIFEST_NAME
+
+
+def archive_episode(episode_path, when=None):
+    """Keep a dated copy of a freshly built episode (and its sidecar).
+
+    A hard link is used when the filesystem allows it, so no bytes are copied.
+
+    Returns:
+        Path of the dated MP3, e.g. World_News/episode-20251124T060000Z.mp3
+    """
+    episode_path = Path(episode_path)
+    when = when or datetime.now(timezone.utc)
+    dated = episode_path.with_name(f"{episode_path.stem}-{when.strftime('%Y%m%dT%H%M%SZ')}.mp3")
+    for src, dst in ((episode_path, dated),
+                     (mp3_info.sidecar_path(episode_path), mp3_info.sidecar_path(dated))):
+        if not src.exists():
+            continue
+        if dst.exists():
+            dst.unlink()
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+    return dated
+
+
+def _append(record, podcast_dir):
+    path = manifest_path(podcast_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _lock, open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def record_episode(topic_name, episode_path, podcast_dir=PODCAST_DIR, audio_url=None, when=None):
+    """Append a new episode to the manifest.
+
+    Size and duration come from the MP3 sidecar written at concat time.
+
+    Args:
+        topic_name: Topic the episode belongs to
+        episode_path: Path of the (dated) MP3 inside `podcast_dir`
+        podcast_dir: Root podcasts directory holding the manifest
+        audio_url: Public URL of the audio, if already known
+        when: Publish time (default: now)
+
+    Returns:
+        The manifest record
+    """
+    episode_path = Path(episode_path)
+    when = when or datetime.now(timezone.utc)
+    info = mp3_info.episode_info(episode_path) or {}
+    date_str = when.strftime('%Y-%m-%d')
+    try:
+        rel = episode_path.resolve().relative_to(Path(podcast_dir).resolve())
+    except ValueError:
+        rel = episode_path
+    record = {
+        'guid': f"{episode_path.parent.name}-{when.strftime('%Y%m%dT%H%M%SZ')}",
+        'topic': topic_name,
+        'title': f"{topic_name} - {date_str}",
+        'description': f"Automated news curation for {topic_name} on {date_str}",
+        'file': rel.as_posix(),
+        'audio_url': audio_url,
+        'file_size': info.get('file_size', 0),
+        'duration_us': info.get('duration_us', 0),
+        'published': when.isoformat(),
+    }
+    _append(record, podcast_dir)
+    return record
+
+
+def update_episode(guid, podcast_dir=PODCAST_DIR, **fields):
+    """Record changed fields (e.g. audio_url and uploaded time after upload) for an episode."""
+    _append(dict(fields, guid=guid), podcast_dir)
+
+
+def load_episodes(podcast_dir=PODCAST_DIR, topic=None):
+    """Read the manifest, merging update lines into their episode.
+
+    Returns:
+        List of episode records, oldest first
+    """
+    path = manifest_path(podcast_dir)
+    episodes = {}
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                logging.warning(f"Skipping malformed manifest line in {path}")
+                continue
+            if rec['guid'] in episodes:
+                episodes[rec['guid']].update(rec)
+            elif 'topic' in rec:
+                episodes[rec['guid']] = rec
+    result = [e for e in episodes.values() if topic is None or e['topic'] == topic]
+    result.sort(key=lambda e: e['published'])
+    return result
+
+
+def episode_url(record, base_url=None):
+    """Public URL for an episode: uploaded URL, else base_url + file, else local path."""
+    if record.get('audio_url'):
+        return record['audio_url']
+    if base_url:
+        return f"{base_url.rstrip('/')}/{record['file']}"
+    return record['file']
+
+
+def to_feed_episode(record, base_url=None):
+    """Convert a manifest record to the episode dict used by podcast_rss."""
+    return {
+        'title': record['title'],
+        'description': record['description'],
+        'audio_url': episode_url(record, base_url),
+        'file_size': record.get('file_size', 0),
+        'duration': record.get('duration_us', 0) / 1_000_000,
+        'publish_date': datetime.fromisoformat(record['published']),
+        'guid': record['guid'],
+    }
+
+
+def feed_episodes(podcast_dir=PODCAST_DIR, topic=None, base_url=None, uploaded_only=False):
+    """Feed-ready episode dicts from the manifest, newest first.
+
+    Every manifest record keeps its place in the list, so feed page
+    boundaries never move. Episodes whose local file was pruned and that
+    were never uploaded are returned as placeholders (`{'guid',
+    'publish_date', 'placeholder': True}`), which feed_pages counts but
+    does not write.
+
+    With `uploaded_only`, episodes enter the list only once uploaded, in
+    upload order (`uploaded`, else `published`): an upload that completes
+    late is added as the newest item instead of into an archived page.
+    """
+    records = load_episodes(podcast_dir, topic)
+    if uploaded_only:
+        records = sorted((rec for rec in records if rec.get('audio_url')),
+                         key=lambda rec: rec.get('uploaded') or rec['published'])
+    result = []
+    for rec in reversed(records):
+        if not rec.get('audio_url') and rec.get('pruned'):
+            result.append({'guid': rec['guid'], 'publish_date': datetime.fromisoformat(rec['published']),
+                           'placeholder': True})
+            continue
+        result.append(to_feed_episode(rec, base_url))
+    return result
+
+
+def published_count(episodes):
+    """Number of episodes in a feed_episodes list that are not placeholders."""
+    return sum(1 for ep in episodes if not ep.get('placeholder'))
+
+
+def apply_retention(keep_per_topic, podcast_dir=PODCAST_DIR, protect=()):
+    """Delete local dated MP3s beyond the newest `keep_per_topic` per topic.
+
+    Records stay in the manifest (marked `pruned`) so uploaded episodes
+    remain in the feeds; the manifest is compacted in the process.
+
+    Args:
+        keep_per_topic: Number of local episode files kept per topic
+        podcast_dir: Root podcasts directory holding the manifest
+        protect: File paths that must not be deleted (e.g. pending uploads)
+
+    Returns:
+        Number of local files removed
+    """
+    podcast_dir = Path(podcast_dir)
+    episodes = load_episodes(podcast_dir)
+    by_topic = {}
+    for ep in episodes:
+        by_topic.setdefault(ep['topic'], []).append(ep)
+
+    removed = 0
+    for topic_eps in by_topic.values():
+        local = [e for e in topic_eps if not e.get('pruned')]
+        for ep in local[:max(0, len(local) - keep_per_topic)]:
+            mp3 = podcast_dir / ep['file']
+            if any(Path(p).resolve() == mp3.resolve() for p in protect):
+                continue
+            for path in (mp3, mp3_info.sidecar_path(mp3)):
+                if path.exists():
+                    path.unlink()
+            ep['pruned'] = True
+            removed += 1
+
+    if removed:
+        path = manifest_path(podcast_dir)
+        tmp = path.with_suffix('.jsonl.tmp')
+        with _lock:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for ep in episodes:
+                    f.write(json.dumps(ep, ensure_ascii=False) + '\n')
+            os.replace(tmp, path)
+        logging.info(f"Retention: removed {removed} old local episode file(s)")
+    return removed
+
+
+def backfill(podcast_dir=PODCAST_DIR):
+    """Seed an empty manifest from existing `<topic>/episode.mp3` files (one-time)."""
+    podcast_dir = Path(podcast_dir)
+    if manifest_path(podcast_dir).exists() or not podcast_dir.exists():
+        return 0
+    count = 0
+    for episode in sorted(podcast_dir.glob('*/episode.mp3')):
+        info = mp3_info.episode_info(episode) or {}
+        when = (datetime.fromisoformat(info['created']) if info.get('created')
+                else datetime.fromtimestamp(episode.stat().st_mtime, tz=timezone.utc))
+        dated = archive_episode(episode, when)
+        record_episode(episode.parent.name.replace('_', ' '), dated, podcast_dir, when=when)
+        count += 1
+    if count:
+        logging.info(f"Backfilled episode manifest with {count} existing episode(s)")
+    return count
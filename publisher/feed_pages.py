@@ -0,0 +1,183 @@
+"""Paged feeds (RFC 5005 "Archived Feeds") for podcasts and the blog index.
+
+The subscription ("current") document holds only the newest `page_size`
+items. Older items live in numbered archive pages of exactly `page_size`
+items, counted from the oldest item, so a page never changes once it is
+full: it is written once and can be cached forever. Each document links
+to the previous archive page, letting clients walk back through history.
+"""
+
+import logging
+import os
+from pathlib import Path
+
+from publisher import feed_writer, output_writer
+
+DEFAULT_PAGE_SIZE = 50
+
+
+def page_size_from_env():
+    """Page size from FEED_PAGE_SIZE (default 50)."""
+    return max(1, int(os.getenv('FEED_PAGE_SIZE', DEFAULT_PAGE_SIZE)))
+
+
+def archive_name(path, number):
+    """Name of archive page `number` (1 = oldest) for a feed file."""
+    path = Path(path)
+    return f"{path.stem}-archive-{number:04d}{path.suffix}"
+
+
+def plan_pages(total, page_size):
+    """Split `total` chronologically ordered items into pages.
+
+    Returns:
+        (archive_pages, current) where archive_pages is a list of
+        (number, start, end) slices of full pages and current is the
+        (start, end) slice of the newest `page_size` items
+    """
+    full = total // page_size
+    archives = [(n + 1, n * page_size, (n + 1) * page_size) for n in range(full)]
+    return archives, (max(0, total - page_size), total)
+
+
+def _newest_date(episodes):
+    # lastBuildDate follows the content so an unchanged feed stays byte-identical
+    dates = [ep['publish_date'] for ep in episodes if ep.get('publish_date') and not ep.get('placeholder')]
+    return max(dates) if dates else None
+
+
+def _items(episodes):
+    # Placeholders hold a slot in the paging but are not written
+    return [ep for ep in episodes if not ep.get('placeholder')]
+
+
+def _href(name, base_url):
+    return f"{base_url.rstrip('/')}/{name}" if base_url else name
+
+
+def write_paged_feed(output_file, channel, episodes, page_size=None, base_url=None):
+    """Write a podcast feed as a bounded current document plus archive pages.
+
+    Args:
+        output_file: Path of the current (subscription) feed
+        channel: Channel metadata (see feed_writer.write_channel_header)
+        episodes: Episode dicts, newest first (as episode_manifest.feed_episodes);
+            placeholders count towards page boundaries but are not written
+        page_size: Items per page (default FEED_PAGE_SIZE or 50)
+        base_url: Public URL of the feed's directory, used for paging links
+
+    Returns:
+        Number of archive pages written by this call (existing pages are kept)
+    """
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    page_size = page_size or page_size_from_env()
+    chronological = list(reversed(episodes))
+    archives, (cur_start, cur_end) = plan_pages(len(chronological), page_size)
+    current_href = _href(output_file.name, base_url)
+
+    written = 0
+    for number, start, end in archives:
+        target = output_file.with_name(archive_name(output_file, number))
+        if target.exists():
+            continue  # full pages are immutable
+        links = [('current', current_href)]
+        if number > 1:
+            links.append(('prev-archive', _href(archive_name(output_file, number - 1), base_url)))
+        page_channel = dict(channel, atom_links=links, archive=True)
+        page_channel.setdefault('build_date', _newest_date(chronological[start:end]))
+        with output_writer.open_output(target) as f:
+            feed_writer.write_feed(f, page_channel, reversed(_items(chronological[start:end])))
+        written += 1
+
+    links = [('self', current_href)]
+    if archives:
+        links.append(('prev-archive', _href(archive_name(output_file, archives[-1][0]), base_url)))
+    current = dict(channel, atom_links=links)
+    current.setdefault('build_date', _newest_date(chronological[cur_start:cur_end]))
+    with output_writer.open_output(output_file) as f:
+        feed_writer.write_feed(f, current, reversed(_items(chronological[cur_start:cur_end])))
+    if written:
+        logging.info(f"Wrote {written} new archive page(s) for {output_file}")
+    return written
+
+
+def write_markdown_archive(output_file, number, header_for, entries, footer_lines, nav_label='posts'):
+    """Write archive page `number` of a markdown index unless it already exists.
+
+    Args:
+        output_file: Path of the current index page the archive belongs to
+        number: Archive page number (1 = oldest)
+        header_for: See write_paged_markdown
+        entries: The page's markdown list lines, newest first
+        footer_lines: Lines written at the bottom of the page
+        nav_label: Noun used in the navigation links
+
+    Returns:
+        The page path if it was written, else None
+    """
+    output_file = Path(output_file)
+    target = output_file.with_name(archive_name(output_file, number))
+    if target.exists():
+        return None  # full pages are immutable
+    nav = [f'[Latest {nav_label}]({output_file.name})']
+    if number > 1:
+        nav.append(f'[Older {nav_label}]({archive_name(output_file, number - 1)})')
+    lines = header_for(number) + list(entries) + ['', ' · '.join(nav)] + footer_lines
+    output_writer.write_output(target, '\n'.join(lines))
+    return target
+
+
+def write_markdown_current(output_file, header_for, entries, archive_count, footer_lines, nav_label='posts'):
+    """Write the current page of a markdown index (left alone if unchanged).
+
+    Args:
+        output_file: Path of the current index page
+        header_for: See write_paged_markdown
+        entries: The newest entries (at most a page), newest first
+        archive_count: Number of full archive pages before it
+        footer_lines: Lines written at the bottom of the page
+        nav_label: Noun used in the "Older ..." navigation link
+
+    Returns:
+        [output_file] if it was rewritten, else []
+    """
+    output_file = Path(output_file)
+    lines = header_for(None) + list(entries)
+    if archive_count:
+        lines += ['', f'[Older {nav_label}]({archive_name(output_file, archive_count)})']
+    return [output_file] if output_writer.write_output(output_file, '\n'.join(lines + footer_lines)) else []
+
+
+def write_paged_markdown(output_file, header_for, entries, footer_lines, page_size=None,
+                         nav_label='posts'):
+    """Write a markdown index as a current page plus immutable archive pages.
+
+    Pages whose text is unchanged are left untouched.
+
+    Args:
+        output_file: Path of the current index page (e.g. content/index.md)
+        header_for: Callable `header_for(number)` returning the header lines of
+            archive page `number` (None for the current page)
+        entries: Markdown list lines, newest first
+        footer_lines: Lines written at the bottom of every page
+        page_size: Entries per page (default FEED_PAGE_SIZE or 50)
+        nav_label: Noun used in the "Latest/Older ..." navigation links
+
+    Returns:
+        List of page paths written by this call
+    """
+    output_file = Path(output_file)
+    page_size = page_size or page_size_from_env()
+    chronological = list(reversed(entries))
+    archives, (cur_start, cur_end) = plan_pages(len(chronological), page_size)
+
+    written = []
+    for number, start, end in archives:
+        target = write_markdown_archive(output_file, number, header_for, reversed(chronological[start:end]),
+                                        footer_lines, nav_label)
+        if target:
+            written.append(target)
+    written += write_markdown_current(output_file, header_for, reversed(chronological[cur_start:cur_end]),
+                                      len(archives), footer_lines, nav_label)
+    return written
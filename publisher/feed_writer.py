@@ -0,0 +1,118 @@
+"""Streaming RSS 2.0 / iTunes podcast feed writer.
+
+Items are written straight to a file handle as they are pulled from an
+episode iterator, so rendering is linear in the number of episodes and
+memory stays flat. All text and attribute values are XML-escaped.
+"""
+
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape, quoteattr
+
+ITUNES_NS = 'http://www.itunes.com/dtds/podcast-1.0.dtd'
+CONTENT_NS = 'http://purl.org/rss/1.0/modules/content/'
+ATOM_NS = 'http://www.w3.org/2005/Atom'
+HISTORY_NS = 'http://purl.org/syndication/history/1.0'  # RFC 5005
+
+
+def format_rfc2822(dt):
+    """Format a datetime as RFC 2822 for RSS feeds (UTC)."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.strftime('%a, %d %b %Y %H:%M:%S +0000')
+
+
+def format_duration(seconds):
+    """Format a duration in seconds as HH:MM:SS (or MM:SS under an hour)."""
+    seconds = int(seconds)
+    hours, rem = divmod(seconds, 3600)
+    minutes, secs = divmod(rem, 60)
+    if hours > 0:
+        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
+
+
+def _el(fh, indent, tag, body, **attrs):
+    attr_str = ''.join(f' {k}={quoteattr(str(v))}' for k, v in attrs.items())
+    if body is None:
+        fh.write(f'{indent}<{tag}{attr_str}/>\n')
+    else:
+        fh.write(f'{indent}<{tag}{attr_str}>{escape(str(body))}</{tag}>\n')
+
+
+def write_channel_header(fh, channel):
+    """Write the XML declaration, <rss> and channel-level elements.
+
+    Args:
+        fh: Text file handle
+        channel: Dict with 'title' and 'description' and optional 'link',
+            'language', 'author', 'email', 'image_url', 'category',
+            'explicit', 'copyright', 'build_date', 'atom_links' (list of
+            (rel, href) pairs, e.g. for feed paging) and 'archive' (marks
+            an RFC 5005 archive page)
+    """
+    history = f' xmlns:fh="{HISTORY_NS}"' if channel.get('archive') else ''
+    fh.write('<?xml version="1.0" encoding="utf-8"?>\n')
+    fh.write(f'<rss version="2.0" xmlns:itunes="{ITUNES_NS}" xmlns:content="{CONTENT_NS}" '
+             f'xmlns:atom="{ATOM_NS}"{history}>\n')
+    fh.write('  <channel>\n')
+    i = '    '
+    _el(fh, i, 'title', channel['title'])
+    _el(fh, i, 'description', channel['description'])
+    if channel.get('link'):
+        _el(fh, i, 'link', channel['link'])
+    _el(fh, i, 'language', channel.get('language', 'en-us'))
+    if channel.get('copyright'):
+        _el(fh, i, 'copyright', channel['copyright'])
+    _el(fh, i, 'lastBuildDate', format_rfc2822(channel.get('build_date') or datetime.now(timezone.utc)))
+    for rel, href in channel.get('atom_links', []):
+        _el(fh, i, 'atom:link', None, rel=rel, href=href)
+    if channel.get('archive'):
+        _el(fh, i, 'fh:archive', None)
+
+    author = channel.get('author', 'NewsGenerator')
+    _el(fh, i, 'itunes:author', author)
+    _el(fh, i, 'itunes:summary', channel['description'])
+    _el(fh, i, 'itunes:explicit', 'yes' if channel.get('explicit') else 'no')
+    _el(fh, i, 'itunes:category', None, text=channel.get('category', 'News'))
+    if channel.get('image_url'):
+        _el(fh, i, 'itunes:image', None, href=channel['image_url'])
+    if channel.get('email'):
+        fh.write(f'{i}<itunes:owner>\n')
+        _el(fh, i + '  ', 'itunes:name', author)
+        _el(fh, i + '  ', 'itunes:email', channel['email'])
+        fh.write(f'{i}</itunes:owner>\n')
+
+
+def write_item(fh, ep):
+    """Write one <item> for an episode dict (see podcast_rss.create_podcast_rss)."""
+    i = '      '
+    audio_url = ep.get('audio_url', '')
+    fh.write('    <item>\n')
+    _el(fh, i, 'title', ep.get('title', 'Untitled Episode'))
+    _el(fh, i, 'description', ep.get('description', ''))
+    _el(fh, i, 'enclosure', None, url=audio_url, length=ep.get('file_size', 0), type='audio/mpeg')
+    _el(fh, i, 'guid', ep.get('guid', audio_url), isPermaLink='false')
+    _el(fh, i, 'pubDate', format_rfc2822(ep.get('publish_date') or datetime.now(timezone.utc)))
+    _el(fh, i, 'itunes:duration', format_duration(ep.get('duration', 0)))
+    _el(fh, i, 'itunes:explicit', 'no')
+    fh.write('    </item>\n')
+
+
+def write_feed(fh, channel, episodes):
+    """Stream a complete podcast feed to `fh`.
+
+    Args:
+        fh: Text file handle
+        channel: Channel metadata (see write_channel_header)
+        episodes: Iterable of episode dicts, written in the order given
+
+    Returns:
+        Number of items written
+    """
+    write_channel_header(fh, channel)
+    count = 0
+    for ep in episodes:
+        write_item(fh, ep)
+        count += 1
+    fh.write('  </channel>\n</rss>\n')
+    return count
@@ -1,119 +1,60 @@
 """Generate podcast RSS feed for iPhone and other podcast apps."""
-import os
-import subprocess
+import sys
 from pathlib import Path
-from datetime import datetime, timezone
-import xml.etree.ElementTree as ET
+
+# Allow `python publisher/generate_rss.py` to import sibling packages
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from publisher import blog_index, episode_manifest, feed_pages, feed_writer, mp3_info, output_writer, precompress
 
 
 def get_audio_duration(file_path):
-    """Get audio duration using ffprobe if available.
+    """Get audio duration from the episode sidecar (or MP3 frame headers).
 
-    Returns duration as HH:MM:SS string, or None if ffprobe is not available.
+    Returns duration as an HH:MM:SS (MM:SS under an hour) string, or None if
+    the file is not readable MP3.
     """
-    try:
-        result = subprocess.run(
-            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
-             '-of', 'default=noprint_wrappers=1:nokey=1', str(file_path)],
-            capture_output=True, text=True, timeout=10
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            seconds = float(result.stdout.strip())
-            hours = int(seconds // 3600)
-            minutes = int((seconds % 3600) // 60)
-            secs = int(seconds % 60)
-            return f'{hours:02d}:{minutes:02d}:{secs:02d}'
-    except (subprocess.TimeoutExpired, FileNotFoundError, ValueError):
-        pass
-    return None
+    info = mp3_info.episode_info(file_path)
+    if info is None:
+        return None
+    return feed_writer.format_duration(info['duration_us'] / 1_000_000)
 
 
 def generate_podcast_rss(podcast_dir='outbox/podcasts', output_file='outbox/podcast_feed.xml',
                          title='NewsGenerator Podcast', description='Automated news summaries podcast',
-                         base_url=None):
+                         base_url=None, feed_base_url=None):
     """Generate an RSS 2.0 podcast feed from generated episodes.
 
     Args:
-        podcast_dir: Directory containing topic subdirectories with episode.mp3 files
+        podcast_dir: Directory holding the episode manifest (episodes.jsonl)
         output_file: Path to write the RSS feed
         title: Podcast title
         description: Podcast description
         base_url: Base URL where episodes will be hosted (e.g., Internet Archive URL or GitHub Pages)
+        feed_base_url: Public URL of the feed's directory, used for RFC 5005 paging links
+
+    Only the newest FEED_PAGE_SIZE episodes go into `output_file`; older
+    episodes are kept in immutable archive pages next to it.
     """
     podcast_path = Path(podcast_dir)
     output_path = Path(output_file)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Create RSS structure
-    rss = ET.Element('rss', version='2.0')
-    rss.set('xmlns:itunes', 'http://www.itunes.com/dtds/podcast-1.0.dtd')
-    rss.set('xmlns:content', 'http://purl.org/rss/1.0/modules/content/')
-
-    channel = ET.SubElement(rss, 'channel')
-
-    # Channel metadata
-    now_utc = datetime.now(timezone.utc)
-    ET.SubElement(channel, 'title').text = title
-    ET.SubElement(channel, 'description').text = description
-    ET.SubElement(channel, 'language').text = 'en-us'
-    ET.SubElement(channel, 'pubDate').text = now_utc.strftime('%a, %d %b %Y %H:%M:%S GMT')
-
-    # iTunes-specific tags for better podcast app support
-    itunes_author = ET.SubElement(channel, '{http://www.itunes.com/dtds/podcast-1.0.dtd}author')
-    itunes_author.text = 'NewsGenerator'
-
-    itunes_summary = ET.SubElement(channel, '{http://www.itunes.com/dtds/podcast-1.0.dtd}summary')
-    itunes_summary.text = description
-
-    itunes_category = ET.SubElement(channel, '{http://www.itunes.com/dtds/podcast-1.0.dtd}category')
-    itunes_category.set('text', 'News')
-
-    # Find all episodes
-    episodes_found = 0
-    if podcast_path.exists():
-        for topic_dir in sorted(podcast_path.iterdir()):
-            if topic_dir.is_dir():
-                episode_file = topic_dir / 'episode.mp3'
-                if episode_file.exists():
-                    episodes_found += 1
-                    topic_name = topic_dir.name.replace('_', ' ')
-                    episode_date = datetime.fromtimestamp(
-                        episode_file.stat().st_mtime, tz=timezone.utc
-                    )
-                    file_size = episode_file.stat().st_size
-
-                    item = ET.SubElement(channel, 'item')
-                    ET.SubElement(item, 'title').text = f'{topic_name} - {episode_date.strftime("%Y-%m-%d")}'
-                    ET.SubElement(item, 'description').text = f'Automated news summary for {topic_name}'
-                    ET.SubElement(item, 'pubDate').text = episode_date.strftime('%a, %d %b %Y %H:%M:%S GMT')
-
-                    # Enclosure (the audio file)
-                    enclosure = ET.SubElement(item, 'enclosure')
-                    if base_url:
-                        audio_url = f'{base_url.rstrip("/")}/{topic_dir.name}/episode.mp3'
-                    else:
-                        # Relative path for local use
-                        audio_url = str(episode_file)
-                    enclosure.set('url', audio_url)
-                    enclosure.set('length', str(file_size))
-                    enclosure.set('type', 'audio/mpeg')
-
-                    # iTunes duration - try to get actual duration from file
-                    itunes_duration = ET.SubElement(item, '{http://www.itunes.com/dtds/podcast-1.0.dtd}duration')
-                    duration = get_audio_duration(episode_file)
-                    if duration:
-                        itunes_duration.text = duration
-                    else:
-                        # Estimate based on file size (64kbps mono = ~8KB/sec)
-                        estimated_seconds = file_size / 8000
-                        mins = int(estimated_seconds // 60)
-                        secs = int(estimated_seconds % 60)
-                        itunes_duration.text = f'00:{mins:02d}:{secs:02d}'
-
-    # Write RSS feed
-    tree = ET.ElementTree(rss)
-    ET.indent(tree, space='  ')
-    tree.write(output_path, encoding='utf-8', xml_declaration=True)
+    channel = {
+        'title': title,
+        'description': description,
+        'language': 'en-us',
+        'author': 'NewsGenerator',
+        'category': 'News',
+    }
+
+    # Episodes come from the manifest; audio files are never opened here
+    episode_manifest.backfill(podcast_path)
+    episodes = episode_manifest.feed_episodes(podcast_path, base_url=base_url)
+    episodes_found = episode_manifest.published_count(episodes)
+    feed_pages.write_paged_feed(output_path, channel, episodes, base_url=feed_base_url)
 
     print(f'Generated podcast RSS feed: {output_path}')
     print(f'Episodes found: {episodes_found}')
@@ -122,7 +63,12 @@ def generate_podcast_rss(podcast_dir='outbox/podcasts', output_file='outbox/podc
 
 
 def generate_blog_index(content_dir='content', output_file='content/index.md'):
-    """Generate a simple index page for blog posts.
+    """Update the blog index pages from the posts manifest.
+
+    `output_file` lists the newest FEED_PAGE_SIZE posts and links to
+    immutable `index-archive-NNNN.md` pages holding older ones; per-topic
+    and per-month pages are written under `topics/` and `months/`. Only
+    pages affected by newly recorded posts are re-rendered.
 
     Args:
         content_dir: Directory containing markdown blog posts
@@ -135,41 +81,9 @@ def generate_blog_index(content_dir='content', output_file='content/index.md'):
         print(f'Content directory not found: {content_path}')
         return None
 
-    posts = []
-    for md_file in sorted(content_path.glob('*.md')):
-        if md_file.name != 'index.md':
-            topic_name = md_file.stem.replace('_', ' ')
-            mod_time = datetime.fromtimestamp(md_file.stat().st_mtime, tz=timezone.utc)
-            posts.append({
-                'name': topic_name,
-                'file': md_file.name,
-                'date': mod_time.strftime('%Y-%m-%d %H:%M')
-            })
-
-    # Generate index
-    now_utc = datetime.now(timezone.utc)
-    lines = [
-        '# NewsGenerator Blog',
-        '',
-        f'*Last updated: {now_utc.strftime("%Y-%m-%d %H:%M UTC")}*',
-        '',
-        '## Latest Posts',
-        ''
-    ]
-
-    for post in posts:
-        lines.append(f'- [{post["name"]}]({post["file"]}) - {post["date"]}')
-
-    lines.extend([
-        '',
-        '---',
-        '',
-        '*Generated by [NewsGenerator](https://github.com/vishc0/NewsGenerator)*'
-    ])
-
-    output_path.write_text('\n'.join(lines), encoding='utf-8')
+    result = blog_index.build_index(content_path, output_path)
     print(f'Generated blog index: {output_path}')
-    print(f'Posts found: {len(posts)}')
+    print(f'Posts found: {result["posts"]} (pages rewritten: {len(result["written"])})')
 
     return str(output_path)
 
@@ -177,3 +91,8 @@ def generate_blog_index(content_dir='content', output_file='content/index.md'):
 if __name__ == '__main__':
     generate_podcast_rss()
     generate_blog_index()
+    # Precompressed .gz/.br variants and ETags for changed outputs
+    for served_dir in ('outbox', 'content'):
+        changed = precompress.precompress_tree(served_dir)
+        print(f'Precompressed {len(changed)} changed file(s) in {served_dir}/')
+    output_writer.save_changes(merge=True)
@@ -0,0 +1,288 @@
+"""Header-only MP3 duration probing and episode sidecar metadata.
+
+Durations are computed from MPEG frame headers (and the Xing/Info or VBRI
+header when the encoder wrote one) without decoding any audio, so feed
+generation never needs pydub or ffprobe.
+"""
+
+import json
+import logging
+import os
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Bitrates in kbps indexed by [version_key][layer][bitrate_index]
+_BITRATES = {
+    1: {
+        1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+        2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+        3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    },
+    2: {
+        1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+        2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+        3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    },
+}
+
+# Sample rates indexed by the 2-bit version field (0=MPEG2.5, 2=MPEG2, 3=MPEG1)
+_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+
+_LAYERS = {1: 3, 2: 2, 3: 1}  # 2-bit layer field -> layer number
+
+_MAX_SYNC_SEARCH = 64 * 1024
+
+
+def _parse_header(data):
+    """Parse a 4-byte MPEG audio frame header.
+
+    Returns:
+        Dict with frame properties, or None if the bytes are not a valid header
+    """
+    if len(data) < 4:
+        return None
+    (h,) = struct.unpack('>I', data[:4])
+    if (h >> 21) & 0x7FF != 0x7FF:
+        return None
+
+    version_bits = (h >> 19) & 0x3
+    layer = _LAYERS.get((h >> 17) & 0x3)
+    bitrate_index = (h >> 12) & 0xF
+    sample_rate_index = (h >> 10) & 0x3
+    if version_bits == 1 or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    version_key = 1 if version_bits == 3 else 2
+    bitrate = _BITRATES[version_key][layer][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][sample_rate_index]
+    padding = (h >> 9) & 0x1
+    mono = ((h >> 6) & 0x3) == 3
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 576 if (layer == 3 and version_key == 2) else 1152
+        length = (samples // 8) * bitrate // sample_rate + padding
+
+    if layer == 3:
+        if version_key == 1:
+            side_info = 17 if mono else 32
+        else:
+            side_info = 9 if mono else 17
+    else:
+        side_info = 0
+
+    return {
+        'mpeg1': version_key == 1,
+        'layer': layer,
+        'bitrate': bitrate,
+        'sample_rate': sample_rate,
+        'samples': samples,
+        'length': length,
+        'side_info': side_info,
+    }
+
+
+def _id3v2_size(head):
+    """Return the byte size of a leading ID3v2 tag (0 if there is none)."""
+    if len(head) < 10 or head[:3] != b'ID3':
+        return 0
+    size = 0
+    for b in head[6:10]:
+        size = (size << 7) | (b & 0x7F)
+    footer = 10 if head[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _find_first_frame(f, start, end):
+    """Locate the first frame header at or after `start`, confirmed by the next frame."""
+    f.seek(start)
+    window = f.read(min(_MAX_SYNC_SEARCH, max(0, end - start)))
+    i = window.find(b'\xff')
+    while 0 <= i < len(window) - 3:
+        header = _parse_header(window[i:i + 4])
+        if header and header['length'] > 0:
+            nxt = start + i + header['length']
+            f.seek(nxt)
+            if nxt >= end or _parse_header(f.read(4)):
+                return start + i, header
+        i = window.find(b'\xff', i + 1)
+    return None, None
+
+
+def _read_xing(frame, header):
+    """Read frame count and encoder delay/padding from a Xing/Info header."""
+    offset = 4 + header['side_info']
+    tag = frame[offset:offset + 4]
+    if tag not in (b'Xing', b'Info') or len(frame) < offset + 8:
+        return None
+    (flags,) = struct.unpack('>I', frame[offset + 4:offset + 8])
+    pos = offset + 8
+    frames = None
+    if flags & 0x1:
+        (frames,) = struct.unpack('>I', frame[pos:pos + 4])
+        pos += 4
+    if flags & 0x2:
+        pos += 4
+    if flags & 0x4:
+        pos += 100
+    if flags & 0x8:
+        pos += 4
+    if frames is None:
+        return None
+
+    delay = padding = 0
+    # LAME-style extension: 9-byte encoder string, delay/padding 21 bytes in
+    if frame[pos:pos + 4] in (b'LAME', b'Lavf', b'Lavc', b'L3.9') and len(frame) >= pos + 24:
+        b0, b1, b2 = frame[pos + 21:pos + 24]
+        delay = (b0 << 4) | (b1 >> 4)
+        padding = ((b1 & 0x0F) << 8) | b2
+    return {'frames': frames, 'delay': delay, 'padding': padding}
+
+
+def _read_vbri(frame):
+    """Read the frame count from a Fraunhofer VBRI header."""
+    if frame[36:40] != b'VBRI' or len(frame) < 54:
+        return None
+    (frames,) = struct.unpack('>I', frame[50:54])
+    return {'frames': frames, 'delay': 0, 'padding': 0}
+
+
+def probe(path):
+    """Probe an MP3 file's duration from frame headers only.
+
+    Args:
+        path: Path to the MP3 file
+
+    Returns:
+        Dict with 'duration_us', 'sample_rate', 'bitrate', 'frames', 'method'
+        and 'file_size', or None if no MPEG audio frames were found
+    """
+    path = Path(path)
+    try:
+        file_size = path.stat().st_size
+        with open(path, 'rb') as f:
+            audio_start = _id3v2_size(f.read(10))
+            audio_end = file_size
+            if file_size >= 128:
+                f.seek(file_size - 128)
+                if f.read(3) == b'TAG':
+                    audio_end -= 128
+
+            first_pos, first = _find_first_frame(f, audio_start, audio_end)
+            if first is None:
+                return None
+
+            f.seek(first_pos)
+            frame = f.read(max(first['length'], 192))
+            xing = _read_xing(frame, first)
+            vbr = xing or _read_vbri(frame)
+            if vbr:
+                method = 'xing' if xing else 'vbri'
+                samples = vbr['frames'] * first['samples'] - vbr['delay'] - vbr['padding']
+                frames = vbr['frames']
+                bitrate = (8 * (audio_end - first_pos - first['length']) * first['sample_rate']
+                           // max(1, vbr['frames'] * first['samples']))
+            else:
+                method = 'scan'
+                frames, samples = _scan_frames(f, first_pos, audio_end)
+                bitrate = first['bitrate']
+    except OSError as e:
+        logging.warning(f"Failed to probe MP3 {path}: {e}")
+        return None
+
+    sample_rate = first['sample_rate']
+    return {
+        'duration_us': max(0, samples) * 1_000_000 // sample_rate,
+        'sample_rate': sample_rate,
+        'bitrate': bitrate,
+        'frames': frames,
+        'method': method,
+        'file_size': file_size,
+    }
+
+
+def _scan_frames(f, pos, end):
+    """Walk frame headers from `pos`, summing samples without reading payloads."""
+    frames = 0
+    samples = 0
+    while pos + 4 <= end:
+        f.seek(pos)
+        header = _parse_header(f.read(4))
+        if header is None or header['length'] <= 0:
+            break
+        frames += 1
+        samples += header['samples']
+        pos += header['length']
+    return frames, samples
+
+
+def sidecar_path(mp3_path):
+    """Return the sidecar metadata path for an MP3 (episode.mp3 -> episode.json)."""
+    return Path(mp3_path).with_suffix('.json')
+
+
+def write_sidecar(mp3_path, extra=None):
+    """Probe an MP3 and record its size and duration in a JSON sidecar file.
+
+    Args:
+        mp3_path: Path to the MP3 file
+        extra: Optional dict of additional fields to store
+
+    Returns:
+        The sidecar metadata dict, or None if the file could not be probed
+    """
+    info = probe(mp3_path)
+    if info is None:
+        logging.warning(f"Could not read MP3 headers from {mp3_path}; no sidecar written")
+        return None
+
+    meta = {
+        'file': Path(mp3_path).name,
+        'file_size': info['file_size'],
+        'duration_us': info['duration_us'],
+        'sample_rate': info['sample_rate'],
+        'bitrate': info['bitrate'],
+        'created': datetime.now(timezone.utc).isoformat(),
+    }
+    if extra:
+        meta.update(extra)
+
+    target = sidecar_path(mp3_path)
+    tmp = target.with_name(target.name + '.tmp')
+    tmp.write_text(json.dumps(meta, indent=2), encoding='utf-8')
+    os.replace(tmp, target)
+    return meta
+
+
+def read_sidecar(mp3_path):
+    """Load an MP3's sidecar metadata.
+
+    Returns:
+        The sidecar dict, or None if it is missing, unreadable, or stale
+        (file size no longer matches the MP3 on disk)
+    """
+    target = sidecar_path(mp3_path)
+    try:
+        meta = json.loads(target.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+    mp3 = Path(mp3_path)
+    if mp3.exists() and mp3.stat().st_size != meta.get('file_size'):
+        return None
+    return meta
+
+
+def episode_info(mp3_path):
+    """Return sidecar metadata for an episode, probing headers if the sidecar is missing."""
+    meta = read_sidecar(mp3_path)
+    if meta is None and Path(mp3_path).exists():
+        meta = write_sidecar(mp3_path)
+    return meta
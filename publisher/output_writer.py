@@ -0,0 +1,133 @@
+"""Atomic, change-detecting writes for everything published from outbox/ and content/.
+
+`write_output` compares the new content's hash with the file on disk and
+leaves an identical file alone (same bytes, same mtime); otherwise it
+writes a temp file and renames it over the target, so readers never see
+a half-written file. `open_output` does the same for outputs streamed to
+a file handle. Every path that actually changed is recorded, and
+`save_changes` writes the list to `outbox/state/changed_outputs.json` so
+upload and deploy steps can ship only the delta.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+CHANGES_FILE = Path('outbox') / 'state' / 'changed_outputs.json'
+
+_changed = []
+_lock = threading.Lock()
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _record(path):
+    path = str(path)
+    with _lock:
+        if path not in _changed:
+            _changed.append(path)
+
+
+def _tmp_path(path):
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def write_output(path, content, encoding='utf-8'):
+    """Write `content` (str or bytes) to `path` if it differs from what is there.
+
+    Returns:
+        True if the file was created or replaced, False if it was unchanged
+    """
+    path = Path(path)
+    data = content.encode(encoding) if isinstance(content, str) else content
+    try:
+        if path.stat().st_size == len(data) and _file_hash(path) == hashlib.sha256(data).hexdigest():
+            return False
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_path(path)
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    _record(path)
+    return True
+
+
+@contextlib.contextmanager
+def open_output(path, encoding='utf-8'):
+    """Stream a text output to a temp file, then replace `path` only if it changed.
+
+    Usage:
+        with open_output('outbox/podcast.rss') as f:
+            feed_writer.write_feed(f, channel, episodes)
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_path(path)
+    try:
+        with open(tmp, 'w', encoding=encoding) as f:
+            yield f
+        if path.exists() and path.stat().st_size == tmp.stat().st_size and _file_hash(path) == _file_hash(tmp):
+            tmp.unlink()
+            return
+        os.replace(tmp, path)
+        _record(path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def changed_outputs():
+    """Paths written (created or changed) by this process so far."""
+    with _lock:
+        return list(_changed)
+
+
+def record_change(path):
+    """Add a path written elsewhere (e.g. by a pipeline shard) to the change list."""
+    _record(path)
+
+
+def reset():
+    """Forget the recorded changes (e.g. between runs in one process)."""
+    with _lock:
+        _changed.clear()
+
+
+def save_changes(changes_file=CHANGES_FILE, merge=False):
+    """Write the changed paths to a JSON file for downstream upload/deploy steps.
+
+    Args:
+        changes_file: Where to write the list
+        merge: Add to the paths already listed in `changes_file` (for a
+            second step of the same run, e.g. generate_rss after run.py)
+
+    Returns:
+        The list of changed paths written
+    """
+    changes_file = Path(changes_file)
+    paths = changed_outputs()
+    if merge and changes_file.exists():
+        try:
+            previous = json.loads(changes_file.read_text(encoding='utf-8')).get('changed', [])
+        except ValueError:
+            previous = []
+        paths = previous + [p for p in paths if p not in previous]
+    changes_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = changes_file.with_suffix('.json.tmp')
+    tmp.write_text(json.dumps({
+        'updated': datetime.now(timezone.utc).isoformat(),
+        'changed': paths,
+    }, indent=2), encoding='utf-8')
+    os.replace(tmp, changes_file)
+    return paths
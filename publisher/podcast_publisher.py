@@ -1,20 +1,37 @@
-from pydub import AudioSegment
 from pathlib import Path
 import os
 import logging
+import re
 from datetime import datetime, timezone
 
+from publisher import audio_pool, mp3_info
+
 
 def utc_now():
     """Get current UTC time as timezone-aware datetime."""
     return datetime.now(timezone.utc)
 
 
+def ia_identifier(*parts):
+    """Internet Archive identifier from `parts`, reduced to `[a-z0-9._-]`.
+
+    E.g. ("newsgenerator", "H1-B / Immigration", "2025-11-24") ->
+    "newsgenerator-h1-b-immigration-2025-11-24".
+    """
+    return '-'.join(filter(None, (re.sub(r'[^a-z0-9._-]+', '-', str(part).lower()).strip('-._')
+                                  for part in parts)))
+
+
 def concat_segments(segment_paths, out_path):
     """Concatenate MP3 segments into a single MP3 episode.
 
     Requires `ffmpeg` available in PATH for pydub to export reliably.
+    Also writes an `episode.json` sidecar with the episode's size and
+    header-derived duration (see `publisher.mp3_info`).
     """
+    # pydub probes for ffmpeg on import; only load it when audio is encoded
+    from pydub import AudioSegment
+
     combined = None
     for p in segment_paths:
         seg = AudioSegment.from_file(p, format='mp3')
@@ -28,11 +45,27 @@ def concat_segments(segment_paths, out_path):
 
     out_path = Path(out_path)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    combined.export(out_path, format='mp3', bitrate='64k')
+    # Export to a temp file and rename so dated hard links of the previous
+    # episode (see episode_manifest.archive_episode) are never overwritten
+    tmp_path = out_path.with_name(out_path.name + '.tmp')
+    combined.export(tmp_path, format='mp3', bitrate='64k')
+    os.replace(tmp_path, out_path)
+    # Record size/duration now so feed generation never re-reads the audio
+    mp3_info.write_sidecar(out_path)
     return str(out_path)
 
 
-def upload_to_internet_archive(file_path, metadata, access_key=None, secret=None, dry_run=False):
+def submit_concat(segment_paths, out_path):
+    """Queue `concat_segments` on the audio process pool.
+
+    Returns:
+        A Future resolving to the episode path
+    """
+    return audio_pool.submit(concat_segments, [str(p) for p in segment_paths], str(out_path))
+
+
+def upload_to_internet_archive(file_path, metadata, access_key=None, secret=None, dry_run=False,
+                               endpoint=None):
     """Upload a file to Internet Archive.
     
     Args:
@@ -41,14 +74,15 @@ def upload_to_internet_archive(file_path, metadata, access_key=None, secret=None
         access_key: IA access key
         secret: IA secret key
         dry_run: If True, only log what would be uploaded without actually uploading
+        endpoint: Optional IA-S3-compatible base URL (defaults to the
+            INTERNET_ARCHIVE_S3_ENDPOINT env var). When set, the file is PUT
+            directly instead of going through the `internetarchive` package,
+            which also allows pointing uploads at a local stand-in server.
     
     Returns:
         True if successful (or if dry_run), False otherwise
     """
-    try:
-        from internetarchive import upload, get_item
-    except Exception:
-        raise RuntimeError('internetarchive package not installed')
+    endpoint = endpoint or os.getenv('INTERNET_ARCHIVE_S3_ENDPOINT')
 
     identifier = metadata.get('identifier')
     if not identifier:
@@ -69,8 +103,14 @@ def upload_to_internet_archive(file_path, metadata, access_key=None, secret=None
         return True
     
     try:
-        # Upload the file
-        upload(identifier, file_path, metadata=metadata, access_key=access_key, secret=secret)
+        if endpoint:
+            _s3_put(endpoint, file_path, metadata, access_key, secret)
+        else:
+            try:
+                from internetarchive import upload
+            except Exception:
+                raise RuntimeError('internetarchive package not installed')
+            upload(identifier, file_path, metadata=metadata, access_key=access_key, secret=secret)
         logging.info(f"Successfully uploaded {file_path} to Internet Archive: https://archive.org/details/{identifier}")
         return True
     except Exception as e:
@@ -78,6 +118,38 @@ def upload_to_internet_archive(file_path, metadata, access_key=None, secret=None
         return False
 
 
+def _s3_put(endpoint, file_path, metadata, access_key, secret):
+    """PUT a file through Internet Archive's S3-like API.
+
+    Metadata is sent as `x-archive-meta-*` headers; list values use the
+    numbered `x-archive-metaNN-*` form.
+    """
+    import requests
+    from urllib.parse import quote
+
+    headers = {
+        'authorization': f'LOW {access_key}:{secret}',
+        'x-amz-auto-make-bucket': '1',
+        'x-archive-queue-derive': '0',
+    }
+    for key, value in metadata.items():
+        if key == 'identifier':
+            continue
+        values = value if isinstance(value, (list, tuple)) else [value]
+        for n, v in enumerate(values, start=1):
+            v = str(v)
+            if not v.isascii():
+                v = f'uri({quote(v)})'
+            name = f'x-archive-meta{n:02d}-{key}' if len(values) > 1 else f'x-archive-meta-{key}'
+            headers[name] = v
+
+    file_path = Path(file_path)
+    url = f"{endpoint.rstrip('/')}/{quote(metadata['identifier'], safe='')}/{quote(file_path.name)}"
+    with open(file_path, 'rb') as f:
+        r = requests.put(url, data=f, headers=headers, timeout=300)
+    r.raise_for_status()
+
+
 def generate_ia_metadata(topic_name, description=None):
     """Generate metadata for Internet Archive upload.
     
@@ -90,7 +162,7 @@ def generate_ia_metadata(topic_name, description=None):
     """
     now = utc_now()
     date_str = now.strftime('%Y-%m-%d')
-    identifier = f"newsgenerator-{topic_name.lower().replace(' ', '-')}-{date_str}"
+    identifier = ia_identifier('newsgenerator', topic_name, date_str)
     
     return {
         'identifier': identifier,
@@ -0,0 +1,144 @@
+"""Precompressed variants and an ETag manifest for static outputs.
+
+For every text output under a served directory (`outbox/`, `content/`)
+this writes `<file>.gz` and, when the `brotli` package (listed in
+requirements.txt) is installed, `<file>.br` next to it, and records the file's content hash in
+`<dir>/_etags.json`. Static servers that support precompressed files
+(nginx `gzip_static`/`brotli_static`, Caddy `precompressed`, most CDNs)
+can then send the small variant, and the hashes serve as strong ETags.
+
+Files whose size and mtime match the manifest are not even read, and
+only files whose hash differs are recompressed, so a run that changed
+one feed costs one compression.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional: only .gz variants are written
+    brotli = None
+
+# Allow `python publisher/precompress.py` to import sibling packages
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from publisher import output_writer
+
+MANIFEST_NAME = '_etags.json'
+TEXT_SUFFIXES = {'.xml', '.rss', '.md', '.html', '.json', '.txt', '.css', '.js'}
+SKIP_DIRS = {'state'}
+MIN_SIZE = 256  # smaller files gain nothing from compression
+
+
+def _is_output(path, root):
+    rel = path.relative_to(root)
+    if path.suffix not in TEXT_SUFFIXES or path.name.startswith(('_', '.')):
+        return False
+    return not any(part in SKIP_DIRS or part.startswith('.') for part in rel.parts[:-1])
+
+
+def etag_for(data):
+    """Strong ETag (quoted, truncated SHA-256) for file contents."""
+    return '"' + hashlib.sha256(data).hexdigest()[:32] + '"'
+
+
+def _compress(path, data):
+    """Write the .gz/.br variants of `path`; returns the encodings written."""
+    encodings = {}
+    variants = [('gzip', '.gz', lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('br', '.br', lambda d: brotli.compress(d, quality=11)))
+    for encoding, suffix, compress in variants:
+        target = path.with_name(path.name + suffix)
+        payload = compress(data)
+        if len(payload) >= len(data):
+            if target.exists():
+                target.unlink()
+            continue
+        output_writer.write_output(target, payload)
+        encodings[encoding] = len(payload)
+    return encodings
+
+
+def _remove_variants(path):
+    for suffix in ('.gz', '.br'):
+        variant = path.with_name(path.name + suffix)
+        if variant.exists():
+            variant.unlink()
+
+
+def precompress_tree(root):
+    """Refresh precompressed variants and the ETag manifest under `root`.
+
+    Args:
+        root: Served directory, e.g. 'outbox' or 'content'
+
+    Returns:
+        List of files (relative to root) that changed since the last call
+    """
+    root = Path(root)
+    if not root.exists():
+        return []
+    manifest_file = root / MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_file.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        manifest = {}
+    except ValueError:
+        logging.warning(f"Rebuilding unreadable ETag manifest {manifest_file}")
+        manifest = {}
+
+    seen = set()
+    changed = []
+    touched = False
+    for path in sorted(root.rglob('*')):
+        if not path.is_file() or not _is_output(path, root):
+            continue
+        rel = path.relative_to(root).as_posix()
+        seen.add(rel)
+        st = path.stat()
+        entry = manifest.get(rel)
+        variants_ok = entry is not None and all(
+            path.with_name(path.name + ('.gz' if enc == 'gzip' else '.br')).exists()
+            for enc in entry.get('encodings', {}))
+        # Same size and mtime as last time: trust the recorded hash
+        if variants_ok and entry['size'] == st.st_size and entry.get('mtime_ns') == st.st_mtime_ns:
+            continue
+        data = path.read_bytes()
+        etag = etag_for(data)
+        if variants_ok and entry['etag'] == etag:
+            entry['mtime_ns'] = st.st_mtime_ns
+            touched = True
+            continue
+        if len(data) >= MIN_SIZE:
+            encodings = _compress(path, data)
+        else:
+            _remove_variants(path)
+            encodings = {}
+        manifest[rel] = {'etag': etag, 'size': len(data), 'mtime_ns': st.st_mtime_ns, 'encodings': encodings}
+        changed.append(rel)
+
+    for rel in set(manifest) - seen:
+        _remove_variants(root / rel)
+        del manifest[rel]
+        changed.append(rel)
+
+    if changed or touched or not manifest_file.exists():
+        output_writer.write_output(manifest_file, json.dumps(manifest, indent=2, sort_keys=True))
+    if changed:
+        logging.info(f"Precompressed {len(changed)} changed file(s) under {root}"
+                     + ('' if brotli is not None else ' (gzip only; install brotli for .br)'))
+    return changed
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    for served_dir in sys.argv[1:] or ['outbox', 'content']:
+        precompress_tree(served_dir)
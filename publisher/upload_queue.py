@@ -0,0 +1,206 @@
+"""Persistent background upload queue for podcast episodes.
+
+Uploads are handed to worker threads so the pipeline can carry on with the
+next topic while an episode is being transferred. Every queued item is
+persisted to disk, so anything still pending (or failed) when a run ends is
+picked up again by the next run.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import uuid
+from pathlib import Path
+
+DEFAULT_STATE_FILE = Path('outbox') / 'state' / 'upload_queue.json'
+
+
+class UploadQueue:
+    """Drain uploads on worker threads with retries and exponential backoff."""
+
+    def __init__(self, uploader, state_file=DEFAULT_STATE_FILE, workers=2,
+                 max_attempts=4, backoff_base=2.0, backoff_max=60.0):
+        """
+        Args:
+            uploader: Callable `uploader(file_path, metadata)` returning True on
+                success; False or an exception counts as a failed attempt
+            state_file: JSON file where queued items are persisted
+            workers: Number of upload threads
+            max_attempts: Attempts per item before it is reported as failed
+            backoff_base: First retry delay in seconds (doubles per attempt)
+            backoff_max: Upper bound for a single retry delay
+        """
+        self.uploader = uploader
+        self.state_file = Path(state_file)
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._items = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._load()
+
+    def _load(self):
+        """Re-enqueue items left pending or failed by a previous run."""
+        if not self.state_file.exists():
+            return
+        try:
+            items = json.loads(self.state_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable upload queue {self.state_file}: {e}")
+            return
+
+        for item in items:
+            if not Path(item['file_path']).exists():
+                logging.warning(f"Dropping queued upload with missing file: {item['file_path']}")
+                continue
+            item['status'] = 'pending'
+            item['attempts'] = 0
+            item['resumed'] = True
+            self._items[item['id']] = item
+            self._queue.put(item['id'])
+        if self._items:
+            logging.info(f"Resuming {len(self._items)} pending upload(s) from {self.state_file}")
+
+    def _persist(self):
+        """Write every item that is not yet uploaded to the state file."""
+        with self._lock:
+            pending = [i for i in self._items.values() if i['status'] != 'done']
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_file.with_suffix('.json.tmp')
+            tmp.write_text(json.dumps(pending, indent=2), encoding='utf-8')
+            os.replace(tmp, self.state_file)
+
+    def start(self):
+        """Start the worker threads (idempotent)."""
+        if self._threads:
+            return self
+        for n in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"upload-{n}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def submit(self, file_path, metadata, extra=None):
+        """Queue a file for upload.
+
+        A pending item for the same file and topic (`extra['topic_name']`)
+        is replaced rather than uploaded twice. Identifiers are not compared:
+        they contain the date, so a file resubmitted after midnight (e.g. by
+        a resumed run) would otherwise be uploaded again under a new one.
+
+        Args:
+            file_path: Local path of the file to upload
+            metadata: Upload metadata (must include 'identifier')
+            extra: Optional JSON-serialisable context returned in the report
+
+        Returns:
+            The queued item's id
+        """
+        file_path = str(file_path)
+        topic_name = (extra or {}).get('topic_name')
+        with self._lock:
+            for item in self._items.values():
+                if (item['status'] == 'pending' and item['file_path'] == file_path
+                        and item['extra'].get('topic_name') == topic_name):
+                    item['metadata'] = metadata
+                    item['extra'] = extra or {}
+                    item['resumed'] = False
+                    item_id = item['id']
+                    break
+            else:
+                item_id = uuid.uuid4().hex
+                self._items[item_id] = {
+                    'id': item_id,
+                    'file_path': file_path,
+                    'metadata': metadata,
+                    'extra': extra or {},
+                    'status': 'pending',
+                    'attempts': 0,
+                    'last_error': None,
+                    'resumed': False,
+                }
+                self._queue.put(item_id)
+        self._persist()
+        return item_id
+
+    def _worker(self):
+        while True:
+            item_id = self._queue.get()
+            if item_id is None:
+                self._queue.task_done()
+                return
+            try:
+                self._process(self._items[item_id])
+            finally:
+                self._queue.task_done()
+
+    def _process(self, item):
+        while item['attempts'] < self.max_attempts and not self._stop.is_set():
+            item['attempts'] += 1
+            item['status'] = 'uploading'
+            try:
+                ok = self.uploader(item['file_path'], item['metadata'])
+                error = None if ok else 'uploader returned False'
+            except Exception as e:
+                ok, error = False, str(e)
+
+            if ok:
+                item['status'] = 'done'
+                item['last_error'] = None
+                self._persist()
+                return
+
+            item['last_error'] = error
+            logging.warning(f"Upload attempt {item['attempts']}/{self.max_attempts} failed for "
+                            f"{item['file_path']}: {error}")
+            if item['attempts'] < self.max_attempts:
+                delay = min(self.backoff_max, self.backoff_base * (2 ** (item['attempts'] - 1)))
+                self._stop.wait(delay)
+
+        # Interrupted by close(): leave it pending so the next run resumes it
+        stopped = self._stop.is_set() and item['attempts'] < self.max_attempts
+        item['status'] = 'pending' if stopped else 'failed'
+        self._persist()
+
+    def flush(self):
+        """Wait for all queued uploads, stop the workers and report the outcome.
+
+        Returns:
+            Dict with 'completed', 'failed' and 'pending' lists of items
+        """
+        self.start()
+        self._queue.join()
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+        self._threads = []
+        self._persist()
+
+        report = {'completed': [], 'failed': [], 'pending': []}
+        for item in self._items.values():
+            key = {'done': 'completed', 'failed': 'failed'}.get(item['status'], 'pending')
+            report[key].append(item)
+
+        logging.info(f"Uploads: {len(report['completed'])} completed, {len(report['failed'])} failed, "
+                     f"{len(report['pending'])} pending")
+        for item in report['failed']:
+            logging.error(f"Upload failed after {item['attempts']} attempt(s): {item['file_path']} "
+                          f"({item['last_error']}); it will be retried on the next run")
+        return report
+
+    def stop_retrying(self):
+        """Let in-flight uploads finish but leave every other item pending for the next run."""
+        self._stop.set()
+
+    def close(self):
+        """Stop retrying and shut the workers down without waiting for backoff."""
+        self.stop_retrying()
+        return self.flush()
@@ -7,15 +7,19 @@ load_dotenv()
 
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 HUGGINGFACE_API_KEY = os.getenv('HUGGINGFACE_API_KEY')
+# Endpoints can be pointed at compatible servers (or the benchmark stubs)
+HUGGINGFACE_API_URL = os.getenv('HUGGINGFACE_API_URL', 'https://api-inference.huggingface.co/models')
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', 'https://api.openai.com/v1')
 
 
-def summarize(text, model='hf-small', max_words=160):
+def summarize(text, model='hf-small', max_words=160, local_only=False):
     """Simple adapter: prefer Hugging Face Inference API when available, then OpenAI, else fallback.
     
     Args:
         text: The text to summarize
         model: The model to use (for HF)
         max_words: Target maximum words for the summary (for podcast segments)
+        local_only: Skip the remote APIs and use the local fallback (e.g. when over budget)
     
     This function is intentionally minimal so callers can extend prompt/args.
     """
@@ -24,7 +28,7 @@ def summarize(text, model='hf-small', max_words=160):
     if len(words) > 3000:
         text = ' '.join(words[:3000])
     
-    if HUGGINGFACE_API_KEY:
+    if HUGGINGFACE_API_KEY and not local_only:
         try:
             summary = _hf_summarize(text, model, max_words)
             token_tracker.get_tracker().record_call(text, summary, 'huggingface', success=True)
@@ -33,7 +37,7 @@ def summarize(text, model='hf-small', max_words=160):
             logging.warning(f"HF summarizer failed: {e}")
             token_tracker.get_tracker().record_call(text, '', 'huggingface', success=False)
 
-    if OPENAI_API_KEY:
+    if OPENAI_API_KEY and not local_only:
         try:
             summary = _openai_summarize(text, max_words)
             token_tracker.get_tracker().record_call(text, summary, 'openai', success=True)
@@ -55,7 +59,7 @@ def _naive_summary(text, sentences=3):
 
 def _hf_summarize(text, model='google/flan-t5-small', max_words=160):
     import requests
-    url = f"https://api-inference.huggingface.co/models/{model}"
+    url = f"{HUGGINGFACE_API_URL.rstrip('/')}/{model}"
     headers = {"Authorization": f"Bearer {HUGGINGFACE_API_KEY}"}
     
     # Better prompt for news summarization
@@ -76,6 +80,7 @@ def _hf_summarize(text, model='google/flan-t5-small', max_words=160):
 def _openai_summarize(text, max_words=160):
     import openai
     openai.api_key = OPENAI_API_KEY
+    openai.api_base = OPENAI_BASE_URL
     resp = openai.ChatCompletion.create(
         model='gpt-3.5-turbo',
         messages=[{'role': 'system', 'content': 'You are a concise news summarizer for podcast segments.'},
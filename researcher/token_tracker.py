@@ -1,6 +1,8 @@
 """Token usage estimation and reporting for LLM API calls."""
 
+import json
 import logging
+import threading
 from datetime import datetime, timezone
 
 
@@ -18,6 +20,7 @@ class TokenUsageTracker:
         self.api_calls = 0
         self.failed_calls = 0
         self.provider_usage = {}  # Track usage per provider (hf, openai, etc.)
+        self._lock = threading.Lock()  # pipeline stages record calls from worker threads
     
     def estimate_tokens(self, text):
         """Rough token estimation: ~0.75 tokens per word for English text."""
@@ -29,6 +32,10 @@ class TokenUsageTracker:
         input_tokens = self.estimate_tokens(input_text)
         output_tokens = self.estimate_tokens(output_text) if output_text else 0
         
+        with self._lock:
+            self._add_usage(input_tokens, output_tokens, provider, success)
+    
+    def _add_usage(self, input_tokens, output_tokens, provider, success):
         self.total_input_tokens += input_tokens
         self.total_output_tokens += output_tokens
         self.api_calls += 1
@@ -96,16 +103,48 @@ class TokenUsageTracker:
             f.write(f"Token Usage Report - {utc_now().isoformat()}\n")
             f.write(self.get_report())
 
+    def to_dict(self):
+        """Usage counts as a JSON-serializable dict."""
+        with self._lock:
+            return {
+                'api_calls': self.api_calls,
+                'failed_calls': self.failed_calls,
+                'input_tokens': self.total_input_tokens,
+                'output_tokens': self.total_output_tokens,
+                'providers': {name: dict(usage) for name, usage in self.provider_usage.items()},
+            }
+
+    def add_usage(self, data):
+        """Add the counts of a `to_dict` report (e.g. one saved by another shard)."""
+        with self._lock:
+            self.api_calls += data.get('api_calls', 0)
+            self.failed_calls += data.get('failed_calls', 0)
+            self.total_input_tokens += data.get('input_tokens', 0)
+            self.total_output_tokens += data.get('output_tokens', 0)
+            for provider, usage in data.get('providers', {}).items():
+                totals = self.provider_usage.setdefault(provider, {'input_tokens': 0, 'output_tokens': 0,
+                                                                   'calls': 0})
+                for key in totals:
+                    totals[key] += usage.get(key, 0)
+
+    def save_json(self, output_path):
+        """Save the usage counts as JSON (machine-readable, mergeable across shards)."""
+        data = dict(self.to_dict(), updated=utc_now().isoformat())
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+
 
 # Global tracker instance
 _global_tracker = None
+_global_lock = threading.Lock()
 
 
 def get_tracker():
     """Get the global token usage tracker instance."""
     global _global_tracker
-    if _global_tracker is None:
-        _global_tracker = TokenUsageTracker()
+    with _global_lock:
+        if _global_tracker is None:
+            _global_tracker = TokenUsageTracker()
     return _global_tracker
 
 
@@ -1,11 +1,12 @@
-from gtts import gTTS
-from gtts.tts import gTTSError
 import logging
 from pathlib import Path
-import requests
 
 
 def text_to_speech_gtts(text, out_path, lang='en'):
+    import requests
+    from gtts import gTTS
+    from gtts.tts import gTTSError
+
     try:
         tts = gTTS(text=text, lang=lang)
         tts.save(out_path)
@@ -18,11 +19,19 @@ def text_to_speech_gtts(text, out_path, lang='en'):
 
 
 def _create_silent_mp3(out_path):
-    """Create a minimal silent MP3 file as a placeholder when gTTS is unavailable."""
+    """Create a minimal silent MP3 file as a placeholder when gTTS is unavailable.
+
+    Encoding runs on the audio process pool; this call waits for the file.
+    """
+    from publisher import audio_pool
+
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    audio_pool.submit(_export_silence, str(out_path)).result()
+
+
+def _export_silence(out_path):
+    """Encode 1 second of silence to MP3 (runs in an audio pool process)."""
     from pydub import AudioSegment
     
-    # Create 1 second of silence
     silence = AudioSegment.silent(duration=1000)
-    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
     silence.export(out_path, format='mp3', bitrate='64k')
-
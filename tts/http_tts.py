@@ -0,0 +1,23 @@
+import logging
+import os
+from pathlib import Path
+
+# Any service that takes {"text": ..., "lang": ...} and answers with MP3 bytes
+TTS_HTTP_URL = os.getenv('TTS_HTTP_URL')
+
+
+def text_to_speech_http(text, out_path, lang='en', url=None, timeout=60):
+    """Synthesize speech with an HTTP TTS backend and save the MP3 to `out_path`.
+
+    Raises:
+        requests.RequestException: if the backend fails or is unreachable
+    """
+    import requests
+
+    url = url or TTS_HTTP_URL
+    r = requests.post(url, json={'text': text, 'lang': lang}, timeout=timeout)
+    r.raise_for_status()
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    Path(out_path).write_bytes(r.content)
+    logging.debug(f"HTTP TTS wrote {len(r.content)} bytes to {out_path}")
+    return out_path